@@ -16,22 +16,17 @@
 # You should have received a copy of the GNU General Public License
 # along with dingDONG.  If not, see <http://www.gnu.org/licenses/>.
 
-try:
-    import queue
-except ImportError:
-    import Queue as queue
-
-import traceback
-import sys
-from threading import Thread
-
 from dingDONG.bl.ddNodeExec import nodeExec
+from dingDONG.bl.ddBackfill import getBackfillNodes
+from dingDONG.bl.ddJournal  import RUN_JOURNAL, getJournalKey, isNodeDone
+from dingDONG.bl.ddScheduler    import dongScheduler, getNodeName, getNodesDependencies, getNodeConnections
 
 from dingDONG.config            import config
 from dingDONG.misc.logger       import p, LOGGER_OBJECT
 from dingDONG.bl.jsonParser     import jsonParser
-from dingDONG.misc.enums        import eJson, eConn
+from dingDONG.misc.enums        import eJson, eConn, eParallel
 from dingDONG.conn.baseConnManager import mngConnectors as connManager
+from dingDONG.conn.connMetaCache import META_CACHE
 
 ## Execters
 from dingDONG.executers.executeSql import execQuery
@@ -40,10 +35,24 @@ from dingDONG.executers.executeMicrosoftOLAP import OLAP_Process
 from dingDONG.executers.executeVersionsGit import dbVersions
 
 
+""" Config properties that are sent to worker processes """
+def _getConfigSnapshot ():
+    return {k:v for k,v in vars(config).items() if k.isupper() and (v is None or isinstance(v, (str, int, float, bool, list, dict, tuple)))}
+
+""" Executed in worker process: connectors are created from json node and connDict, not from live objects """
+def _execDongProcess (jMap, procNum, procTotal, connDict, configDict, journalKey=None, resume=False):
+    for k in configDict:
+        setattr(config, k, configDict[k])
+
+    dingObject = nodeExec(node=jMap, connDict=connDict, journalKey=journalKey, resume=resume)
+    if procTotal > 1:
+        p("DONG PROCESS NUMBER %s OUT OF %s" % (str(procNum), str(procTotal)))
+    dingObject.dong()
+
 class dingDONG:
     def __init__ (self,  dicObj=None, filePath=None,
                 dirData=None, includeFiles=None, notIncludeFiles=None,
-                dirLogs=None,connDict=None, processes=None, sqlFolder=None):
+                dirLogs=None,connDict=None, processes=None, sqlFolder=None, parallelMode=None):
 
         self._dicObj        = dicObj
         self._filePath      = filePath
@@ -52,14 +61,16 @@ class dingDONG:
         self._notIncludeFiles=notIncludeFiles
         self._dirLogs       = None
         self.propcesses     = config.DONG_MAX_PARALLEL_THREADS
+        self.parallelMode   = config.DONG_PARALLEL_MODE
         self.sqlFolder      = config.SQL_FOLDER_DIR if not sqlFolder else sqlFolder
         self.connDict       = connDict
         self.setCounter     = 0
+        self.dongResults    = None
 
         self.Set(dicObj=self._dicObj, filePath=self._filePath,
                 dirData=self._dirData, includeFiles=self._includeFiles,
                 notIncludeFiles=self._notIncludeFiles,dirLogs=dirLogs,
-                connDict=self.connDict, processes=processes, sqlFolder=sqlFolder)
+                connDict=self.connDict, processes=processes, sqlFolder=sqlFolder, parallelMode=parallelMode)
 
         self.msg = executeAddMsg()
 
@@ -71,7 +82,7 @@ class dingDONG:
 
     def Set (self, dicObj=None, filePath=None,
                 dirData=None, includeFiles=None, notIncludeFiles=None,
-                dirLogs=None,connDict=None, processes=None, sqlFolder=None):
+                dirLogs=None,connDict=None, processes=None, sqlFolder=None, parallelMode=None):
 
         self.sqlFolder = sqlFolder if sqlFolder else self.sqlFolder
         self._dicObj    = dicObj
@@ -91,6 +102,7 @@ class dingDONG:
             self.connDict = self.jsonParser.connDict
 
         self.propcesses = processes if processes else self.propcesses
+        self.parallelMode = parallelMode if parallelMode else self.parallelMode
 
         self._dirLogs = dirLogs if dirLogs else config.LOGS_DIR
 
@@ -100,75 +112,86 @@ class dingDONG:
 
     def ding (self, destList=None, jsName=None, jsonNodes=None):
         p('STARTING TO MODEL DATA STRUCURE >>>>>' , "i")
+        META_CACHE.reset()
         allNodes = self.__getNodes(destList=destList, jsName=jsName, jsonNodes=jsonNodes)
 
+        processList = []
+        nodeList    = []
+        nodeConns   = {}
+
         ## ALL Files
         for jsName, jsonNodes in allNodes:
             ## ALL On all nodes
             for jMap in jsonNodes:
-                dingObject = nodeExec(node=jMap, connDict=self.connDict, versionManager=self.versionManager)
-                dingObject.ding()
+                nodeName = getNodeName(jMap=jMap, procNum=len(processList)+1)
+                nodeList.append((nodeName, jMap))
+                nodeConns[nodeName] = getNodeConnections(jMap=jMap, connDict=self.connDict)
+                processList.append((nodeName, (jMap,)))
                 self.msg.addStateCnt()
 
+        # Target created by one node can be source of other node
+        depends = getNodesDependencies(nodeList=nodeList, connDict=self.connDict) if config.DONG_NODES_DEPENDENCIES else None
+
+        scheduler = dongScheduler(processes=config.DING_MAX_PARALLEL_THREADS, raiseOnError=config.DING_RAISE_ON_NODE_ERROR, parallelMode=eParallel.THREAD)
+        scheduler.execute(processList=processList, execFunc=self.execDing, depends=depends,
+                          nodeConns=nodeConns, connLimit=config.DING_MAX_CONN_THREADS, orderedLogs=True)
+
+        META_CACHE.save()
         p('FINSHED TO MODEL DATA STRUCURE >>>>>', "i")
         p('>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>', "ii")
 
     ## There is parrallel processing option
-    def dong (self, destList=None, jsName=None, jsonNodes=None):
+    ## resume: nodes loaded by last run are skipped, batch ordered nodes continue from last committed batch
+    def dong (self, destList=None, jsName=None, jsonNodes=None, resume=False):
         p('STARTING TO EXTRACT AND LOAD >>>>>', "i")
+        META_CACHE.reset()
+        if not RUN_JOURNAL.getFile():
+            p("RUN JOURNAL FILE IS NOT DEFINED (DONG_JOURNAL_FILE, LOGS_DIR), RUN CANNOT BE RESUMED", "w" if resume else "ii")
+        if not resume:
+            RUN_JOURNAL.clear()
+
         allNodes = self.__getNodes(destList=destList, jsName=jsName, jsonNodes=jsonNodes)
         processList = []
+        nodeList    = []
+        isProcess   = str(self.parallelMode).lower() == eParallel.PROCESS
+        configDict  = _getConfigSnapshot() if isProcess else None
 
         for jsName, jsonNodes in allNodes:
+            # Backfill node is executed as one node for each time window
+            jsonNodes = [x for jMap in jsonNodes for x in (getBackfillNodes(jMap=jMap, connDict=self.connDict) if eJson.BACKFILL in jMap else [jMap])]
             procTotal = len(jsonNodes)
             for procNum, jMap in  enumerate (jsonNodes):
-                processList.append((jMap, procNum, procTotal))
+                journalKey = getJournalKey(jMap=jMap)
+                if resume and isNodeDone(journalKey):
+                    p("RESUME: %s LOADED BY PREVIOUS RUN, SKIP NODE" % (journalKey), "i")
+                    continue
+
+                nodeName = getNodeName(jMap=jMap, procNum=len(processList)+1)
+                nodeList.append((nodeName, jMap))
+                if isProcess:
+                    processList.append((nodeName, (jMap, procNum, procTotal, self.connDict, configDict, journalKey, resume)))
+                else:
+                    processList.append((nodeName, (jMap, procNum, procTotal, journalKey, resume)))
                 self.msg.addStateCnt()
 
+        depends = getNodesDependencies(nodeList=nodeList, connDict=self.connDict) if config.DONG_NODES_DEPENDENCIES else None
 
-        numOfProcesses = min (len(processList), self.propcesses)
-
-        if numOfProcesses==1:
-            for proc in processList:
-                dingObject = nodeExec(node=proc[0], connDict=self.connDict)
-                dingObject.dong()
-
-        elif numOfProcesses > 1:
-            q = queue.Queue(maxsize=0)
-            for i, processParams in enumerate (processList):
-                q.put(processParams)
-                if i%2 ==0 and i>0:
-                    for i in range(q.qsize()):
-                        worker = Thread(target=self.execDong, args=(q,))
-                        worker.setDaemon(True)
-                        worker.start()
-                    q.join()
-
-            for i in range(q.qsize()):
-                worker = Thread(target=self.execDong, args=(q,))
-                worker.setDaemon(True)
-                worker.start()
-            q.join()
-        else:
-            p("THERE IS NO MODEL TO EXTRACT", "w")
+        scheduler = dongScheduler(processes=self.propcesses, parallelMode=self.parallelMode)
+        self.dongResults = scheduler.execute(processList=processList, execFunc=_execDongProcess if isProcess else self.execDong, depends=depends)
+
+        META_CACHE.save()
         p('FINISHED TO EXTRACT AND LOAD >>>>>', "i")
         p('>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>', "ii")
 
-    def execDong (self, q):
-        while True:
-            try:
-                (jMap, procNum, procTotal) = q.get()
-                dingObject =  nodeExec(node=jMap, connDict=self.connDict)
-                if procTotal > 1:
-                    p("DONG PROCESS NUMBER %s OUT OF %s" % (str(procNum), str(procTotal)))
-                dingObject.dong()
-            except Exception as e:
-                err = traceback.print_exc(e)
-                p("MULTI THREADING ERROR:\n%s " % e, "e")
-                for er in err:
-                    p(er , "e")
-            finally:
-                q.task_done()
+    def execDing (self, jMap):
+        dingObject = nodeExec(node=jMap, connDict=self.connDict, versionManager=self.versionManager)
+        dingObject.ding()
+
+    def execDong (self, jMap, procNum, procTotal, journalKey=None, resume=False):
+        dingObject =  nodeExec(node=jMap, connDict=self.connDict, journalKey=journalKey, resume=resume)
+        if procTotal > 1:
+            p("DONG PROCESS NUMBER %s OUT OF %s" % (str(procNum), str(procTotal)))
+        dingObject.dong()
 
     def setLoggingLevel (self, val):
         CRITICAL = 50
@@ -194,6 +217,8 @@ class dingDONG:
         if connUrl  : connPropDic[eConn.props.URL] = connUrl
         connObj = connManager(propertyDict=connPropDic , connLoadProp=self.connDict)
         execQuery(sqlWithParamList=queries, connObj=connObj, msg=self.msg)
+        # Queries can change any object
+        META_CACHE.clear()
 
     def test (self):
         for connProp in self.connDict:
@@ -0,0 +1,87 @@
+# Copyright (c) 2017-2021, BPMK LTD (BiSkilled) Tal Shany <tal@biSkilled.com>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+#
+# This file is part of dingDONG
+#
+# dingDong is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# dingDong is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with dingDong.  If not, see <http://www.gnu.org/licenses/>.
+
+import copy
+
+from dingDONG.conn.baseConnManager import mngConnectors as connManager
+from dingDONG.bl.ddState    import STATE_STORE
+from dingDONG.misc.enums    import eJson, eConn, eState
+from dingDONG.misc.logger   import p
+
+""" Return backfill state key of node: source and target objects """
+def getBackfillKey (jMap):
+    srcKey = eJson.SOURCE if eJson.SOURCE in jMap else eJson.QUERY
+    src, tar = jMap.get(srcKey, {}), jMap.get(eJson.TARGET, {})
+    return "%s:%s>%s:%s" % (src.get(eConn.props.TYPE), " ".join(str(src.get(eConn.props.TBL)).split()),
+                            tar.get(eConn.props.TYPE), " ".join(str(tar.get(eConn.props.TBL)).split()))
+
+""" Return window state key """
+def getWindowKey (nodeKey, window):
+    return "%s|%s" % (nodeKey, window[0])
+
+""" Target delete rows of one window: getRangeFilter and preLoading by filter (DB, Mongo), file target is loaded at once """
+def isWindowTarget (jMap, connDict=None):
+    if eJson.TARGET not in jMap:
+        return False
+
+    tarProp = copy.deepcopy(jMap[eJson.TARGET])
+    tarProp[eConn.props.IS_TARGET] = True
+    tar = connManager(propertyDict=tarProp, connLoadProp=connDict)
+    try:
+        return hasattr(tar, 'getRangeFilter')
+    finally:
+        tar.close()
+
+""" BACKFILL: Split node into time windows on source date column (connDb.minValues), each window is one dong node
+    executed in parallel by dong scheduler. Window node delete target rows of the window and load source rows of the window.
+    Windows loaded successfully on previous runs are skipped (rerun: load all windows) """
+def getBackfillNodes (jMap, connDict=None):
+    backfill= jMap[eJson.BACKFILL]
+    nodeKey = getBackfillKey(jMap)
+    srcKey  = eJson.SOURCE if eJson.SOURCE in jMap else eJson.QUERY
+    windows = None
+
+    if isWindowTarget(jMap=jMap, connDict=connDict):
+        srcProp = copy.deepcopy(jMap[srcKey])
+        srcProp[eConn.props.IS_SOURCE] = True
+        src = connManager(propertyDict=srcProp, connLoadProp=connDict)
+        try:
+            windows = src.minValues(colToFilter=backfill[eJson.backfill.COLUMN], resolution=backfill[eJson.backfill.RESOLUTION],
+                                    periods=backfill[eJson.backfill.PERIODS], startDate=backfill[eJson.backfill.START])
+        finally:
+            src.close()
+    else:
+        p("BACKFILL: %s, TARGET CANNOT DELETE WINDOW ROWS" % (nodeKey), "w")
+
+    if windows is None:
+        p("BACKFILL: %s, SOURCE OR TARGET DO NOT SUPPORT BACKFILL, FULL LOAD" % (nodeKey), "w")
+        jMap = copy.copy(jMap)
+        del jMap[eJson.BACKFILL]
+        return [jMap]
+
+    ret = []
+    for window in windows:
+        if not backfill[eJson.backfill.RERUN] and STATE_STORE.get(getWindowKey(nodeKey, window), eState.WINDOW) == eState.WINDOW_OK:
+            continue
+        windowMap = copy.deepcopy(jMap)
+        windowMap[eJson.BACKFILL][eJson.backfill.WINDOW] = window
+        windowMap[eJson.BACKFILL][eJson.backfill.NODE]   = nodeKey
+        ret.append(windowMap)
+
+    p("BACKFILL: %s, %s WINDOWS BY %s, LOADED BY PREVIOUS RUNS: %s, WINDOWS TO LOAD: %s" % (nodeKey, str(len(windows)), backfill[eJson.backfill.RESOLUTION], str(len(windows) - len(ret)), str(len(ret))), "i")
+    return ret
@@ -0,0 +1,90 @@
+# Copyright (c) 2017-2021, BPMK LTD (BiSkilled) Tal Shany <tal@biSkilled.com>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+#
+# This file is part of dingDONG
+#
+# dingDong is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# dingDong is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with dingDong.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import os
+import json
+import time
+import hashlib
+
+from dingDONG.bl.ddState    import stateStore
+from dingDONG.bl.ddScheduler import getNodeName
+from dingDONG.misc.enums    import eState
+from dingDONG.misc.logger   import p
+from dingDONG.config        import config
+
+JOURNAL_FILE_NAME = 'dingDong.journal.json'
+
+""" RUN JOURNAL: status of each dong node and committed rows of batch ordered extracts.
+    File is config.DONG_JOURNAL_FILE or LOGS_DIR/dingDong.journal.json, cleared by each dong run which is not resumed """
+class runJournal (stateStore):
+    def getFile (self):
+        if self.fileName:
+            return self.fileName
+        if config.DONG_JOURNAL_FILE:
+            return config.DONG_JOURNAL_FILE
+        if config.LOGS_DIR and os.path.isdir(config.LOGS_DIR):
+            return os.path.join(config.LOGS_DIR, JOURNAL_FILE_NAME)
+        return None
+
+RUN_JOURNAL = runJournal()
+
+""" Return journal key of node: node name and node properties hash, same node have the same key on each run """
+def getJournalKey (jMap):
+    nodeHash = hashlib.md5(json.dumps(jMap, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+    return "%s|%s" % (getNodeName(jMap=jMap), nodeHash[:10])
+
+""" Node is loaded by previous run """
+def isNodeDone (journalKey):
+    return RUN_JOURNAL.get(journalKey, eState.NODE) == eState.NODE_OK
+
+""" CHECKPOINT: Last ORDER BY key and rows committed into target by batch ordered extract (source query ORDER BY one column).
+    Checkpoint is saved into journal every config.DONG_CHECKPOINT_SEC seconds, resumed node delete target rows above
+    checkpoint key (loaded after last saved checkpoint) and extract source rows above the key """
+class nodeCheckpoint (object):
+    def __init__ (self, journalKey, rows=0, key=None):
+        self.journalKey = journalKey
+        self.rows       = rows if rows else 0
+        self.key        = key
+        self.saveTime   = time.time()
+
+    def commit (self, rows, key):
+        self.rows += rows
+        self.key   = key
+        if time.time() - self.saveTime >= (config.DONG_CHECKPOINT_SEC if config.DONG_CHECKPOINT_SEC else 0):
+            self.save()
+
+    def save (self):
+        if self.key is not None:
+            RUN_JOURNAL.set(self.journalKey, eState.CHECKPOINT, {'rows': self.rows, 'key': self.key})
+            self.saveTime = time.time()
+
+""" Set node as running and return checkpoint of batch ordered extract, None: node is fully loaded.
+    Resumed partial node which is not batch ordered is loaded again from start """
+def getCheckpoint (journalKey, isOrdered=False, resume=False):
+    checkpoint = RUN_JOURNAL.get(journalKey, eState.CHECKPOINT) if resume else None
+    RUN_JOURNAL.set(journalKey, eState.NODE, eState.NODE_RUNNING)
+
+    if checkpoint and isOrdered:
+        p("RESUME: %s, LOAD ROWS ABOVE KEY %s, %s ROWS COMMITTED" % (journalKey, str(checkpoint['key']), str(checkpoint['rows'])), "i")
+        return nodeCheckpoint(journalKey=journalKey, rows=checkpoint['rows'], key=checkpoint['key'])
+
+    if checkpoint:
+        p("RESUME: %s, EXTRACT IS NOT ORDERED (ORDER BY), LOADING NODE FROM START" % (journalKey), "w")
+        RUN_JOURNAL.remove(journalKey, eState.CHECKPOINT)
+    return nodeCheckpoint(journalKey=journalKey) if isOrdered else None
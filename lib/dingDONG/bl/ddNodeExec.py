@@ -20,21 +20,31 @@ import re
 import copy
 from collections import OrderedDict
 
-from dingDONG.misc.enums           import eJson, eConn
+from dingDONG.misc.enums           import eJson, eConn, eState
 from dingDONG.misc.logger          import p
 from dingDONG.conn.baseConnManager import mngConnectors as connManager
+from dingDONG.bl.ddPipeline        import pipelineLoader
+from dingDONG.bl.ddPartition       import partitionExtract
+from dingDONG.bl.ddState           import STATE_STORE
+from dingDONG.bl.ddBackfill        import getWindowKey
+from dingDONG.bl.ddJournal         import RUN_JOURNAL, getCheckpoint
 from dingDONG.misc.globalMethods import uniocdeStr
 from dingDONG.config               import config
 
 
 class nodeExec (object):
-    def __init__(self, node, connDict=None, versionManager=None):
+    def __init__(self, node, connDict=None, versionManager=None, journalKey=None, resume=False):
         self.stt            = None
         self.addSourceColumn= True
         self.addIndex       = None
+        self.partition      = None
+        self.incremental    = None
+        self.backfill       = None
         self.nodes          = None
         self.connDict       = connDict if connDict else config.CONNECTIONS
         self.versionManager = versionManager
+        self.journalKey     = journalKey
+        self.resume         = resume
 
         jsonNodes           = []
 
@@ -80,7 +90,23 @@ class nodeExec (object):
                 if eJson.INDEX in node:
                     self.addIndex = node[eJson.INDEX]
 
+                # ADD Partition
+                if eJson.PARTITION in node:
+                    self.partition = node[eJson.PARTITION]
+
+                # ADD Incremental
+                if eJson.INC in node:
+                    self.incremental = node[eJson.INC]
+
+                # ADD Backfill window
+                if eJson.BACKFILL in node:
+                    self.backfill = node[eJson.BACKFILL]
+
                 for i,k in enumerate (node):
+                    # Used only by dong scheduler / partition extract
+                    if eJson.DEPENDS == k or eJson.PARTITION == k or eJson.INC == k or eJson.BACKFILL == k:
+                        continue
+
                     if eJson.SOURCE == k or eJson.SOURCE in node[k]:
                         node[k][eConn.props.IS_SOURCE] = True
                         modelDict[eJson.SOURCE] = connManager(propertyDict=node[k], connLoadProp=self.connDict)
@@ -321,12 +347,26 @@ class nodeExec (object):
                 p("STT TAREGT %s HAVE INVALID SOURCE %s --> ignore COLUMN " % (col, self.stt[col][eJson.stt.SOURCE]),"w")
                 del self.stt[col]
 
+    """ Run journal: node is set as loaded only after all nodes are loaded and merged, failed node is loaded again by resumed run """
     def dong( self ):
+        try:
+            self.__dongNodes()
+        except Exception:
+            if self.journalKey:
+                RUN_JOURNAL.set(self.journalKey, eState.NODE, eState.NODE_FAILED)
+            raise
+
+        if self.journalKey:
+            RUN_JOURNAL.set(self.journalKey, eState.NODE, eState.NODE_OK)
+
+    def __dongNodes( self ):
         if self.nodes and len(self.nodes)>0:
             src         = None
             tar         = None
             mrg         = None
             mrgSource   = None
+            # State saved after all nodes are loaded and merged: (state key, property, value)
+            nodeStates  = []
             for node in self.nodes:
                 for k in node:
                     ## Exec METHOD
@@ -347,12 +387,47 @@ class nodeExec (object):
                     if src and tar:
                         """ TRANSFER DATA FROM SOURCE TO TARGET """
                         srcDictStructure = src.getStructure()
-                        tar.preLoading(dictObj=srcDictStructure)
+                        incState = self.setIncremental(src=src, tar=tar) if self.incremental else None
+                        windowKey= self.setBackfill(src=src, tar=tar, srcDictStructure=srcDictStructure) if self.backfill and self.backfill.get(eJson.backfill.WINDOW) else None
+
+                        # Checkpoint only for batch ordered extract loaded by one reader into database target (batch is committed by load)
+                        # Incremental and backfill window nodes load rows into target with existing rows, loaded again from start
+                        isOrdered  = hasattr(src, 'isOrderedExtract') and src.isOrderedExtract() and hasattr(tar, 'deleteAbove') and tar.isSingleObject \
+                                     and not self.partition and not config.DONG_PIPELINE and not incState and not windowKey
+                        checkpoint = getCheckpoint(journalKey=self.journalKey, isOrdered=isOrdered, resume=self.resume) if self.journalKey else None
+                        isResumed  = checkpoint is not None and checkpoint.key is not None
+
+                        # Incremental node is appended into target, merge node target is staging table loaded with new rows only
+                        # Backfill window node: target rows of the window are deleted by setBackfill
+                        # Resumed node: target keeps rows committed by previous run
+                        if not windowKey and not isResumed and (not incState or incState[1] is None or eJson.MERGE in node):
+                            tar.preLoading(dictObj=srcDictStructure)
 
                         mrgSource = tar
                         tarToSrcDict = self.mappingLoadingSourceToTarget(srcDictStructure=srcDictStructure, src=src, tar=tar)
 
-                        src.extract(tar=tar, tarToSrcDict=tarToSrcDict)
+                        if not isResumed and hasattr(src, 'pushDown') and src.pushDown(tar=tar, tarToSrcDict=tarToSrcDict):
+                            pass
+                        elif checkpoint:
+                            src.extract(tar=tar, tarToSrcDict=tarToSrcDict, checkpoint=checkpoint)
+                        elif self.partition:
+                            partitionExtract(src=src, tar=tar, tarToSrcDict=tarToSrcDict, partition=self.partition)
+                        elif config.DONG_PIPELINE:
+                            loader = pipelineLoader(tar=tar)
+                            try:
+                                src.extract(tar=loader, tarToSrcDict=tarToSrcDict)
+                            finally:
+                                loader.close()
+                        else:
+                            src.extract(tar=tar, tarToSrcDict=tarToSrcDict)
+
+                        if hasattr(tar, 'rejects'):
+                            tar.rejects.report()
+
+                        if incState and incState[2] is not None:
+                            nodeStates.append((incState[0], eState.WATERMARK, incState[2]))
+                        if windowKey:
+                            nodeStates.append((windowKey, eState.WINDOW, eState.WINDOW_OK))
                         tar.close()
                         src.close()
                         src = None
@@ -365,6 +440,51 @@ class nodeExec (object):
                         mrgSource.merge(mergeTable=mergeTarget, mergeKeys=mergeKeys, sourceTable=None)
                         mrgSource.close()
 
+            for stateKey, stateProp, stateVal in nodeStates:
+                STATE_STORE.set(stateKey, stateProp, stateVal)
+
+    """ INCREMENTAL: Add watermark filter to source, extract rows above last run watermark up to current maximum.
+        Return (state key, last watermark, current watermark), None: full load """
+    def setIncremental (self, src, tar):
+        column = self.incremental[eJson.inc.COLUMN]
+        if not hasattr(src, 'getWatermark') or src.connIsSql:
+            p("INCREMENTAL: SOURCE %s IS NOT TABLE, FULL LOAD" % (src.connType), "w")
+            return None
+
+        # Connection name: sources with the same type and table on different databases keep different watermarks
+        stateKey = "%s:%s>%s:%s" % (src.connName, src.connTbl, tar.connName, tar.connTbl)
+        lastMark = STATE_STORE.get(stateKey, eState.WATERMARK)
+        newMark  = src.getWatermark(column=column)
+
+        if lastMark is None:
+            p("INCREMENTAL: %s, NO WATERMARK, FULL LOAD UP TO %s = %s" % (stateKey, column, str(newMark)), "i")
+        else:
+            p("INCREMENTAL: %s, LOAD %s > %s AND <= %s" % (stateKey, column, str(lastMark), str(newMark)), "i")
+
+        src.addWatermarkFilter(column=column, fromVal=lastMark, toVal=newMark if newMark is not None else lastMark)
+        return stateKey, lastMark, newMark
+
+    """ BACKFILL: Delete target rows of window and add window filter to source. Return window state key """
+    def setBackfill (self, src, tar, srcDictStructure=None):
+        column          = self.backfill[eJson.backfill.COLUMN]
+        fromVal, toVal  = self.backfill[eJson.backfill.WINDOW]
+        windowKey       = getWindowKey(self.backfill[eJson.backfill.NODE], self.backfill[eJson.backfill.WINDOW])
+
+        # Target column mapped from source column
+        tarColumn = column
+        if self.stt:
+            for col in self.stt:
+                if eJson.stt.SOURCE in self.stt[col] and str(self.stt[col][eJson.stt.SOURCE]).lower() == column.lower():
+                    tarColumn = col
+                    break
+
+        STATE_STORE.set(windowKey, eState.WINDOW, eState.WINDOW_RUNNING)
+        p("BACKFILL: WINDOW %s >= %s AND < %s" % (column, str(fromVal), str(toVal)), "i")
+
+        tar.preLoading(dictObj=srcDictStructure, sqlFilter=tar.getRangeFilter(column=tarColumn, fromVal=fromVal, toVal=toVal))
+        src.addFilter(sqlFilter=src.getRangeFilter(column=column, fromVal=fromVal, toVal=toVal))
+        return windowKey
+
     def ding( self ):
         if self.nodes and len(self.nodes) > 0:
             src         = None
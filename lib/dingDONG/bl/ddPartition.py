@@ -0,0 +1,92 @@
+# Copyright (c) 2017-2021, BPMK LTD (BiSkilled) Tal Shany <tal@biSkilled.com>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+#
+# This file is part of dingDONG
+#
+# dingDong is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# dingDong is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with dingDong.  If not, see <http://www.gnu.org/licenses/>.
+
+import sys
+import copy
+import time
+import six
+from concurrent.futures import ThreadPoolExecutor
+
+from dingDONG.bl.ddPipeline import pipelineLoader
+from dingDONG.misc.enums    import eJson, eConn
+from dingDONG.misc.logger   import p
+from dingDONG.config        import config
+
+""" PARTITION EXTRACT: Split source table into ranges on partition column. Each range is extracted by copy of the source
+    connected to a new connection, all ranges are loaded into the same target.
+    Targets which support one writer (file, sqlite) are loaded by one pipeline writer. File sources are read in parallel chunks """
+def partitionExtract (src, tar, tarToSrcDict, partition, maxThreads=None):
+    maxThreads  = maxThreads if maxThreads else config.DONG_PARTITION_MAX_THREADS
+    column      = partition[eJson.partition.COLUMN]
+
+    # File source: file is split into chunks read by parts processes
+    if eConn.types.FILE == src.connType:
+        src.extract(tar=tar, tarToSrcDict=tarToSrcDict, parallel=partition.get(eJson.partition.PARTS))
+        return
+
+    if not column or not hasattr(src, 'getPartitionFilters'):
+        p("SOURCE %s DO NOT SUPPORT PARTITION, EXTRACT WITHOUT PARTITION" % (str(src.connType)), "w")
+        src.extract(tar=tar, tarToSrcDict=tarToSrcDict)
+        return
+
+    sqlFilters = src.getPartitionFilters(column=column, parts=partition.get(eJson.partition.PARTS), ranges=partition.get(eJson.partition.RANGES))
+
+    if len(sqlFilters) < 2:
+        src.extract(tar=tar, tarToSrcDict=tarToSrcDict)
+        return
+
+    loader = None
+    if tar.connType in (eConn.types.FILE, eConn.types.FOLDER, eConn.types.LITE):
+        loader = pipelineLoader(tar=tar, writers=1)
+
+    p("PARTITION: SOURCE %s, COLUMN %s, %s PARTITIONS, %s THREADS >>>>" % (str(src.connType), str(column), str(len(sqlFilters)), str(min(maxThreads, len(sqlFilters)))), "i")
+
+    def extractPartition (sqlFilter):
+        startTime = time.time()
+        srcPart = copy.copy(src)
+        srcPart.connect()
+        tarPart = loader
+        if not tarPart:
+            tarPart = copy.copy(tar)
+            tarPart.connect()
+        try:
+            if sqlFilter:
+                srcPart.addFilter(sqlFilter=sqlFilter)
+            srcPart.extract(tar=tarPart, tarToSrcDict=tarToSrcDict)
+        finally:
+            srcPart.close()
+            if not loader:
+                tarPart.close()
+        p("PARTITION: %s FINISHED, EXEC TIME: %s SEC" % (str(sqlFilter), str(round(time.time() - startTime, 2))), "ii")
+
+    errors = []
+    try:
+        with ThreadPoolExecutor(max_workers=min(maxThreads, len(sqlFilters))) as executor:
+            futures = [executor.submit(extractPartition, sqlFilter) for sqlFilter in sqlFilters]
+            for future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    p("PARTITION: ERROR %s" % (str(e)), "e")
+                    errors.append(sys.exc_info())
+    finally:
+        if loader:
+            loader.close()
+
+    if len(errors) > 0:
+        six.reraise(*errors[0])
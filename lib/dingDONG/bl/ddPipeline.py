@@ -0,0 +1,115 @@
+# Copyright (c) 2017-2021, BPMK LTD (BiSkilled) Tal Shany <tal@biSkilled.com>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+#
+# This file is part of dingDONG
+#
+# dingDong is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# dingDong is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with dingDong.  If not, see <http://www.gnu.org/licenses/>.
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+import sys
+import copy
+import six
+from threading import Thread
+
+from dingDONG.misc.enums    import eConn
+from dingDONG.misc.logger   import p
+from dingDONG.config        import config
+
+""" PIPELINE LOADER: Wrap target connector. Source extract push transformed batches into a bounded queue
+    and writers threads drain the queue into target load. Extra writers are using copy of the target connected
+    to a new connection """
+class pipelineLoader (object):
+    def __init__ (self, tar, queueSize=None, writers=None):
+        self.tar        = tar
+        self.queueSize  = queueSize if queueSize else config.DONG_PIPELINE_QUEUE_SIZE
+        self.writers    = writers if writers else config.DONG_PIPELINE_WRITERS
+        self.q          = queue.Queue(maxsize=self.queueSize)
+        self.errors     = []
+        self.threads    = []
+        self.writerTars = []
+        self.cntBatches = 0
+
+        if self.writers > 1 and self.tar.connType in (eConn.types.FILE, eConn.types.FOLDER, eConn.types.LITE):
+            p("PIPELINE: %s TARGET SUPPORT ONE WRITER ONLY, USING 1 WRITER" %(str(self.tar.connType)), "w")
+            self.writers = 1
+
+        for i in range(self.writers):
+            if i == 0:
+                writerTar = self.tar
+            else:
+                writerTar = copy.copy(self.tar)
+                writerTar.connect()
+                self.writerTars.append(writerTar)
+
+            worker = Thread(target=self.__write, args=(writerTar,))
+            worker.setDaemon(True)
+            worker.start()
+            self.threads.append(worker)
+
+        p("PIPELINE: QUEUE SIZE %s, WRITERS %s, TARGET: %s" % (str(self.queueSize), str(self.writers), str(self.tar.connType)), "ii")
+
+    """ Used by source extract method as target load, block when queue is full """
+    def load(self, rows, targetColumn, objectName=None):
+        if len(self.errors) > 0:
+            six.reraise(*self.errors[0])
+
+        targetColumn = list(targetColumn) if targetColumn else targetColumn
+        self.q.put((rows, targetColumn, objectName))
+        self.cntBatches += 1
+
+    """ Wait for all batches to load, close extra writers and raise first writer error """
+    def close(self):
+        for worker in self.threads:
+            self.q.put(None)
+
+        for worker in self.threads:
+            worker.join()
+
+        for writerTar in self.writerTars:
+            writerTar.close()
+
+        p("PIPELINE: TARGET %s, TOTAL BATCHES %s" % (str(self.tar.connType), str(self.cntBatches)), "ii")
+
+        if len(self.errors) > 0:
+            p("PIPELINE: %s WRITERS ERRORS" % (str(len(self.errors))), "e")
+            six.reraise(*self.errors[0])
+
+    def __write(self, tar):
+        while True:
+            item = self.q.get()
+            try:
+                if item is None:
+                    return
+
+                # Error in other writer - drain the queue
+                if len(self.errors) > 0:
+                    continue
+
+                rows, targetColumn, objectName = item
+                if objectName:
+                    tar.load(rows=rows, targetColumn=targetColumn, objectName=objectName)
+                else:
+                    tar.load(rows=rows, targetColumn=targetColumn)
+            except Exception as e:
+                self.errors.append(sys.exc_info())
+                p("PIPELINE: WRITER ERROR, TARGET %s: %s" % (str(tar.connType), str(e)), "e")
+            finally:
+                self.q.task_done()
+
+    def __getattr__(self, item):
+        return getattr(self.tar, item)
@@ -0,0 +1,379 @@
+# Copyright (c) 2017-2021, BPMK LTD (BiSkilled) Tal Shany <tal@biSkilled.com>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+#
+# This file is part of dingDONG
+#
+# dingDong is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# dingDong is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with dingDong.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import time
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from dingDONG.misc.enums    import eJson, eConn, eParallel
+from dingDONG.misc.logger   import p, LOGGER_OBJECT
+from dingDONG.conn.connDBParser import extract_tables
+from dingDONG.config        import config
+
+class nodeProp (object):
+    NUM     = "NUM."
+    NAME    = "NODE"
+    STATUS  = "STATUS"
+    START   = "START"
+    TIME    = "EXEC TIME"
+    ERROR   = "ERROR"
+    LOGS    = "LOGS"
+    DEPENDS = "DEPENDS ON"
+
+    STATUS_OK       = "OK"
+    STATUS_FAILED   = "FAILED"
+    STATUS_SKIPPED  = "SKIPPED"
+
+    _NAME_MAX_LEN   = 60
+
+""" Return readable node name: target, source or query object name """
+def getNodeName (jMap, procNum=None):
+    nodeName = None
+    if isinstance(jMap, dict):
+        for k in (eJson.TARGET, eJson.SOURCE, eJson.QUERY, eJson.MERGE):
+            if k in jMap and isinstance(jMap[k], dict) and eConn.props.TBL in jMap[k]:
+                connType = jMap[k][eConn.props.TYPE] if eConn.props.TYPE in jMap[k] else ''
+                nodeName = u"%s:%s" % (str(connType), " ".join(str(jMap[k][eConn.props.TBL]).split()))
+                break
+
+    nodeName = nodeName if nodeName else "NODE"
+    if len(nodeName) > nodeProp._NAME_MAX_LEN:
+        nodeName = nodeName[:nodeProp._NAME_MAX_LEN] + "..."
+    return "%s_%s" % (nodeName, str(procNum)) if procNum is not None else nodeName
+
+""" Return (connection url or name, object name) used to compare objects between nodes """
+def _getObjKey (connDict, connName, objName):
+    connKey = connName
+    if connDict and connName in connDict:
+        connProp = connDict[connName]
+        if isinstance(connProp, dict) and connProp.get(eConn.props.URL):
+            connKey = str(connProp[eConn.props.URL])
+        elif isinstance(connProp, str):
+            connKey = connProp
+
+    objName = str(objName).strip().lower()
+    for c in ('[', ']', '"', '`'):
+        objName = objName.replace(c, '')
+    return (str(connKey).lower(), objName)
+
+def _isSameObj (obj1, obj2):
+    if obj1[0] != obj2[0]:
+        return False
+    name1, name2 = obj1[1], obj2[1]
+    if name1 == name2:
+        return True
+    # Object name with and without schema: dbo.tbl, tbl
+    if os.sep not in name1 and os.sep not in name2:
+        if '.' not in name1 and name2.split('.')[-1] == name1:
+            return True
+        if '.' not in name2 and name1.split('.')[-1] == name2:
+            return True
+    return False
+
+""" Return connections used by node (connection url or name), used to limit parallel work on each connection """
+def getNodeConnections (jMap, connDict=None):
+    ret = set([])
+    for k in (eJson.SOURCE, eJson.QUERY, eJson.TARGET, eJson.MERGE):
+        if k in jMap and isinstance(jMap[k], dict) and jMap[k].get(eConn.props.TYPE):
+            ret.add(_getObjKey(connDict, jMap[k][eConn.props.TYPE], '')[0])
+    return ret
+
+""" Return objects used by node: (set of read objects, set of write objects) """
+def _getNodeObjects (jMap, connDict):
+    readObj, writeObj = set([]), set([])
+
+    for k in (eJson.SOURCE, eJson.QUERY):
+        if k in jMap and isinstance(jMap[k], dict) and jMap[k].get(eConn.props.TBL):
+            connName = jMap[k].get(eConn.props.TYPE)
+            objName  = jMap[k][eConn.props.TBL]
+            if k == eJson.QUERY or jMap[k].get(eConn.props.IS_SQL):
+                sql = objName
+                sqlFile = jMap[k].get(eConn.props.SQL_FILE)
+                if sqlFile and os.path.isfile(sqlFile):
+                    with open(sqlFile) as f:
+                        sql = f.read()
+                try:
+                    for tbl in extract_tables(sql)[0] or []:
+                        tblName = "%s.%s" % (tbl[2], tbl[3]) if tbl[2] else tbl[3]
+                        readObj.add(_getObjKey(connDict, connName, tblName))
+                except Exception as e:
+                    p("CANNOT FIND QUERY TABLES, QUERY DEPENDENCIES ARE IGNORED: %s" % (str(e)), "w")
+            else:
+                readObj.add(_getObjKey(connDict, connName, objName))
+
+    if eJson.TARGET in jMap and isinstance(jMap[eJson.TARGET], dict) and jMap[eJson.TARGET].get(eConn.props.TBL):
+        writeObj.add(_getObjKey(connDict, jMap[eJson.TARGET].get(eConn.props.TYPE), jMap[eJson.TARGET][eConn.props.TBL]))
+
+    if eJson.MERGE in jMap and isinstance(jMap[eJson.MERGE], dict) and jMap[eJson.MERGE].get(eJson.merge.TARGET):
+        writeObj.add(_getObjKey(connDict, jMap[eJson.MERGE].get(eConn.props.TYPE), jMap[eJson.MERGE][eJson.merge.TARGET]))
+
+    return readObj, writeObj
+
+def _isSameBackfill (jMap1, jMap2):
+    bf1, bf2 = jMap1.get(eJson.BACKFILL), jMap2.get(eJson.BACKFILL)
+    return bool(bf1 and bf2 and bf1.get(eJson.backfill.NODE) and bf1.get(eJson.backfill.NODE) == bf2.get(eJson.backfill.NODE))
+
+""" Infer nodes dependencies from source, query, target and merge objects and explicit depends keys
+    nodeList: list of (node name, jMap). Node depends on earlier node if one writes an object the other reads or writes,
+    so each object is used by nodes in the list order. Return OrderedDict {node name: [depends on node names]} """
+def getNodesDependencies (nodeList, connDict=None):
+    nodesObj = [_getNodeObjects(jMap, connDict) for nodeName, jMap in nodeList]
+    ret = OrderedDict()
+
+    def isShared (objSet1, objSet2):
+        for o1 in objSet1:
+            for o2 in objSet2:
+                if _isSameObj(o1, o2):
+                    return True
+        return False
+
+    for j, (nodeName, jMap) in enumerate(nodeList):
+        readJ, writeJ = nodesObj[j]
+        ret[nodeName] = []
+
+        for i in range(j):
+            readI, writeI = nodesObj[i]
+            # Backfill windows of the same node load different rows of the target
+            if _isSameBackfill(jMap, nodeList[i][1]):
+                continue
+            if isShared(writeI, readJ) or isShared(writeI, writeJ) or isShared(readI, writeJ):
+                ret[nodeName].append(nodeList[i][0])
+
+        if eJson.DEPENDS in jMap and jMap[eJson.DEPENDS]:
+            depends = jMap[eJson.DEPENDS] if isinstance(jMap[eJson.DEPENDS], (list, tuple)) else [jMap[eJson.DEPENDS]]
+            for dep in depends:
+                depKey  = _getObjKey(None, '', dep)
+                found   = False
+                for i, (depNodeName, depJMap) in enumerate(nodeList):
+                    if i == j:
+                        continue
+                    if any(_isSameObj(depKey, ('', o[1])) for o in nodesObj[i][1]):
+                        found = True
+                        if depNodeName not in ret[nodeName]:
+                            ret[nodeName].append(depNodeName)
+                if not found:
+                    p("NODE %s: DEPENDS ON %s, THERE IS NO NODE THAT LOAD THIS OBJECT, IGNORED" % (nodeName, str(dep)), "w")
+    return ret
+
+""" Execute one node, bufferLogs: keep node log records and return them (used in worker process) """
+def _execNode (execFunc, params, bufferLogs=False):
+    ret = OrderedDict()
+    ret[nodeProp.START] = time.time()
+    if bufferLogs:
+        LOGGER_OBJECT.startBuffer()
+    try:
+        execFunc(*params)
+        ret[nodeProp.STATUS] = nodeProp.STATUS_OK
+        ret[nodeProp.ERROR]  = None
+    except Exception as e:
+        ret[nodeProp.STATUS] = nodeProp.STATUS_FAILED
+        ret[nodeProp.ERROR]  = "%s\n%s" % (str(e), traceback.format_exc())
+    ret[nodeProp.TIME] = round(time.time() - ret[nodeProp.START], 2)
+    ret[nodeProp.LOGS] = LOGGER_OBJECT.stopBuffer() if bufferLogs else None
+    return ret
+
+""" Execute list of nodes using fixed pool of workers. Node start as soon as all nodes it depends on are done
+    processList: list of (node name, params tuple) , execFunc(*params) execute one node
+    depends: {node name: [depends on node names]}, nodes with failed dependency are skipped
+    nodeConns, connLimit: {node name: [connections]}, maximum nodes running in parallel on each connection
+    orderedLogs: buffer nodes logs and print them grouped by node in processList order
+    parallelMode: thread / process. in process mode execFunc and params must be picklable """
+class dongScheduler (object):
+    def __init__ (self, processes=None, raiseOnError=None, parallelMode=None):
+        self.processes      = processes if processes else config.DONG_MAX_PARALLEL_THREADS
+        self.parallelMode   = parallelMode if parallelMode else config.DONG_PARALLEL_MODE
+        self.raiseOnError   = raiseOnError if raiseOnError is not None else config.DONG_RAISE_ON_NODE_ERROR
+        self.results        = OrderedDict()
+        self.depends        = {}
+        self.startTime      = None
+        self.orderedLogs    = False
+        self.nodeLogs       = {}
+        self.flushPos       = 0
+
+    def execute (self, processList, execFunc, depends=None, nodeConns=None, connLimit=None, orderedLogs=False):
+        self.results    = OrderedDict()
+        self.depends    = depends if depends else {}
+        self.startTime  = time.time()
+        self.orderedLogs= orderedLogs
+        self.nodeLogs   = {}
+        self.flushPos   = 0
+        nodeConns       = nodeConns if nodeConns else {}
+        connUsed        = {}
+        numOfProcesses  = min(len(processList), self.processes)
+
+        if numOfProcesses < 1:
+            p("THERE IS NO MODEL TO EXTRACT", "w")
+            return self.results
+
+        pending = OrderedDict()
+        for num, (nodeName, params) in enumerate(processList):
+            self.results[nodeName] = OrderedDict([(nodeProp.NUM, num + 1), (nodeProp.NAME, nodeName), (nodeProp.STATUS, None),
+                                                  (nodeProp.DEPENDS, [x for x in self.depends.get(nodeName, []) if x != nodeName])])
+            pending[nodeName] = params
+
+        if numOfProcesses == 1:
+            while len(pending) > 0:
+                ready = self.__getReady(pending=pending)
+                if len(ready) == 0:
+                    self.__setCircular(pending=pending)
+                    break
+                self.__setResult(nodeName=ready[0], ret=_execNode(execFunc, pending.pop(ready[0])))
+        else:
+            isProcess = str(self.parallelMode).lower() == eParallel.PROCESS
+            poolExecutor = ProcessPoolExecutor if isProcess else ThreadPoolExecutor
+            p("EXECUTING %s NODES USING %s %s WORKERS >>>>" % (str(len(processList)), str(numOfProcesses), eParallel.PROCESS if isProcess else eParallel.THREAD), "i")
+            with poolExecutor(max_workers=numOfProcesses) as executor:
+                running = {}
+                while len(pending) > 0 or len(running) > 0:
+                    for nodeName in self.__getReady(pending=pending):
+                        if len(running) >= numOfProcesses:
+                            break
+                        conns = nodeConns.get(nodeName, [])
+                        if connLimit and any(connUsed.get(c, 0) >= connLimit for c in conns):
+                            continue
+                        for c in conns:
+                            connUsed[c] = connUsed.get(c, 0) + 1
+                        running[executor.submit(_execNode, execFunc, pending.pop(nodeName), isProcess or orderedLogs)] = nodeName
+
+                    if len(running) == 0:
+                        self.__setCircular(pending=pending)
+                        break
+
+                    finished, notFinished = wait(list(running), return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        nodeName = running.pop(future)
+                        for c in nodeConns.get(nodeName, []):
+                            connUsed[c] -= 1
+                        try:
+                            ret = future.result()
+                        except Exception as e:
+                            # Worker process crashed or node is not picklable
+                            ret = OrderedDict([(nodeProp.STATUS, nodeProp.STATUS_FAILED), (nodeProp.ERROR, "%s\n%s" % (str(e), traceback.format_exc()))])
+                        self.__setResult(nodeName=nodeName, ret=ret)
+
+        self.report()
+        return self.results
+
+    def report (self):
+        failed  = [x for x in self.results if self.results[x][nodeProp.STATUS] == nodeProp.STATUS_FAILED]
+        skipped = [x for x in self.results if self.results[x][nodeProp.STATUS] == nodeProp.STATUS_SKIPPED]
+
+        for nodeName in self.results:
+            res = self.results[nodeName]
+            depNums = [str(self.results[x][nodeProp.NUM]) for x in res[nodeProp.DEPENDS] if x in self.results]
+            p("NODE %s: %s, STATUS: %s, EXEC TIME: %s SEC%s" % (str(res[nodeProp.NUM]), nodeName, str(res[nodeProp.STATUS]), str(res.get(nodeProp.TIME)),
+                                                             ", DEPENDS ON: %s" % (",".join(depNums)) if len(depNums) > 0 else ""), "i")
+
+        self.reportCriticalPath()
+        p("TOTAL NODES: %s, SUCCEEDED: %s, FAILED: %s, SKIPPED: %s" % (str(len(self.results)), str(len(self.results) - len(failed) - len(skipped)), str(len(failed)), str(len(skipped))), "i")
+
+        if len(failed) > 0 or len(skipped) > 0:
+            err = "%s NODES FAILED: %s" % (str(len(failed) + len(skipped)), ", ".join(failed + skipped))
+            if self.raiseOnError:
+                raise ValueError(err)
+            p(err, "e")
+
+    """ Longest chain of dependent nodes by execution time - the minimum total time with unlimited workers """
+    def reportCriticalPath (self):
+        pathTime, pathPrev = {}, {}
+        for nodeName in self.__getExecOrder():
+            res = self.results[nodeName]
+            if res.get(nodeProp.TIME) is None:
+                continue
+            pathTime[nodeName], pathPrev[nodeName] = res[nodeProp.TIME], None
+            for dep in res[nodeProp.DEPENDS]:
+                if dep in pathTime and pathTime[dep] + res[nodeProp.TIME] > pathTime[nodeName]:
+                    pathTime[nodeName], pathPrev[nodeName] = pathTime[dep] + res[nodeProp.TIME], dep
+
+        if len(pathTime) == 0:
+            return
+
+        nodeName = max(pathTime, key=lambda x: pathTime[x])
+        totalTime= pathTime[nodeName]
+        path = []
+        while nodeName:
+            path.insert(0, "%s (%s SEC)" % (nodeName, str(self.results[nodeName][nodeProp.TIME])))
+            nodeName = pathPrev[nodeName]
+
+        p("CRITICAL PATH: %s SEC, TOTAL EXEC TIME: %s SEC, PATH: %s" % (str(round(totalTime, 2)), str(round(time.time() - self.startTime, 2)), " -> ".join(path)), "i")
+
+    """ Nodes order where each node is after all the nodes it depends on (nodes in cycle are ignored) """
+    def __getExecOrder (self):
+        order, done = [], set([])
+        while True:
+            added = False
+            for nodeName in self.results:
+                if nodeName not in done and all(x in done or x not in self.results for x in self.results[nodeName][nodeProp.DEPENDS]):
+                    order.append(nodeName)
+                    done.add(nodeName)
+                    added = True
+            if not added:
+                return order
+
+    """ Return pending nodes that all their dependencies are done. Node with failed dependency is skipped """
+    def __getReady (self, pending):
+        ready = []
+        for nodeName in list(pending.keys()):
+            isReady = True
+            for dep in self.results[nodeName][nodeProp.DEPENDS]:
+                if dep not in self.results:
+                    continue
+                depStatus = self.results[dep][nodeProp.STATUS]
+                if depStatus in (nodeProp.STATUS_FAILED, nodeProp.STATUS_SKIPPED):
+                    del pending[nodeName]
+                    self.__setResult(nodeName=nodeName, ret=OrderedDict([(nodeProp.STATUS, nodeProp.STATUS_SKIPPED), (nodeProp.ERROR, "DEPENDS ON %s WHICH DID NOT SUCCEED" % (dep))]))
+                    # Skipped node may block nodes which already checked
+                    return self.__getReady(pending=pending)
+                elif depStatus is None:
+                    isReady = False
+            if isReady:
+                ready.append(nodeName)
+        return ready
+
+    def __setCircular (self, pending):
+        for nodeName in list(pending.keys()):
+            del pending[nodeName]
+            self.__setResult(nodeName=nodeName, ret=OrderedDict([(nodeProp.STATUS, nodeProp.STATUS_FAILED), (nodeProp.ERROR, "CIRCULAR DEPENDENCY: %s" % (", ".join(self.results[nodeName][nodeProp.DEPENDS])))]))
+
+    def __setResult (self, nodeName, ret):
+        logs = ret.pop(nodeProp.LOGS, None)
+        self.results[nodeName].update(ret)
+
+        if not self.orderedLogs:
+            LOGGER_OBJECT.flushRecords(logs)
+            self.__printResult(nodeName=nodeName)
+            return
+
+        # Print all finished nodes logs up to first running node
+        self.nodeLogs[nodeName] = logs
+        nodeNames = list(self.results.keys())
+        while self.flushPos < len(nodeNames) and self.results[nodeNames[self.flushPos]][nodeProp.STATUS] is not None:
+            LOGGER_OBJECT.flushRecords(self.nodeLogs.pop(nodeNames[self.flushPos], None))
+            self.__printResult(nodeName=nodeNames[self.flushPos])
+            self.flushPos += 1
+
+    def __printResult (self, nodeName):
+        ret = self.results[nodeName]
+        if ret[nodeProp.STATUS] == nodeProp.STATUS_FAILED:
+            p("NODE %s FAILED, ERROR:\n%s" % (nodeName, ret[nodeProp.ERROR]), "e")
+        elif ret[nodeProp.STATUS] == nodeProp.STATUS_SKIPPED:
+            p("NODE %s SKIPPED: %s" % (nodeName, ret[nodeProp.ERROR]), "e")
+        else:
+            p("NODE %s FINISHED, EXEC TIME: %s SEC" % (nodeName, str(ret.get(nodeProp.TIME))), "ii")
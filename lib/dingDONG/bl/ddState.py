@@ -0,0 +1,170 @@
+# Copyright (c) 2017-2021, BPMK LTD (BiSkilled) Tal Shany <tal@biSkilled.com>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+#
+# This file is part of dingDONG
+#
+# dingDong is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# dingDong is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with dingDong.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import io
+import json
+import time
+import datetime
+import decimal
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+from dingDONG.misc.logger   import p
+from dingDONG.config        import config
+
+STATE_FILE_NAME = 'dingDong.state.json'
+
+""" INTERNAL USED: State values are saved as json, dates as string and decimal as number """
+def _jsonValue (val):
+    if isinstance(val, datetime.datetime):
+        return val.strftime('%Y-%m-%d %H:%M:%S')
+    elif isinstance(val, datetime.date):
+        return val.strftime('%Y-%m-%d')
+    elif isinstance(val, decimal.Decimal):
+        return int(val) if val == val.to_integral_value() else float(val)
+    return str(val)
+
+""" INTERNAL USED: Replace file, os.replace not exists in python 2 and os.rename do not overwrite file on windows """
+def _replaceFile (srcFile, dstFile):
+    if hasattr(os, 'replace'):
+        os.replace(srcFile, dstFile)
+    else:
+        if os.name == 'nt' and os.path.isfile(dstFile):
+            os.remove(dstFile)
+        os.rename(srcFile, dstFile)
+
+""" INTERNAL USED: Inter process lock on <state file>.lock, state is updated by dong worker processes """
+class _fileLock (object):
+    def __init__ (self, fileName):
+        self.fileName   = "%s.lock" % (fileName) if fileName else None
+        self.lockFile   = None
+
+    def __enter__ (self):
+        if not self.fileName:
+            return self
+
+        try:
+            self.lockFile = open(self.fileName, 'a+')
+        except (IOError, OSError) as e:
+            p("STATE: CANNOT OPEN LOCK FILE %s: %s" % (self.fileName, str(e)), "w")
+            return self
+
+        if fcntl:
+            fcntl.flock(self.lockFile.fileno(), fcntl.LOCK_EX)
+        else:
+            # msvcrt.LK_LOCK raise IOError after 10 seconds
+            while True:
+                try:
+                    self.lockFile.seek(0)
+                    msvcrt.locking(self.lockFile.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except IOError:
+                    pass
+        return self
+
+    def __exit__ (self, excType, excVal, excTb):
+        if not self.lockFile:
+            return
+        try:
+            if fcntl:
+                fcntl.flock(self.lockFile.fileno(), fcntl.LOCK_UN)
+            else:
+                self.lockFile.seek(0)
+                msvcrt.locking(self.lockFile.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self.lockFile.close()
+            self.lockFile = None
+
+""" NODES STATE: JSON file with properties of each node kept between runs (incremental watermark ...)
+    File is config.DONG_STATE_FILE or LOGS_DIR/dingDong.state.json, without file state is kept for current run only.
+    Each update read and write the file under threads lock and file lock, properties set by other processes are kept """
+class stateStore (object):
+    def __init__ (self, fileName=None):
+        self.fileName   = fileName
+        self.lock       = threading.Lock()
+        self.state      = {}
+
+    def getFile (self):
+        if self.fileName:
+            return self.fileName
+        if config.DONG_STATE_FILE:
+            return config.DONG_STATE_FILE
+        if config.LOGS_DIR and os.path.isdir(config.LOGS_DIR):
+            return os.path.join(config.LOGS_DIR, STATE_FILE_NAME)
+        return None
+
+    def get (self, key, prop):
+        with self.lock, _fileLock(self.getFile()):
+            state = self.__read()
+            return state[key].get(prop) if key in state else None
+
+    def set (self, key, prop, val):
+        with self.lock, _fileLock(self.getFile()):
+            state = self.__read()
+            state.setdefault(key, {})[prop] = val
+            state[key]['updated'] = time.strftime('%Y-%m-%d %H:%M:%S')
+            self.__write(state)
+
+    def remove (self, key, prop=None):
+        with self.lock, _fileLock(self.getFile()):
+            state = self.__read()
+            if key in state:
+                if prop:
+                    state[key].pop(prop, None)
+                else:
+                    del state[key]
+                self.__write(state)
+
+    def clear (self):
+        with self.lock, _fileLock(self.getFile()):
+            self.__write({})
+
+    def __read (self):
+        stateFile = self.getFile()
+        if not stateFile or not os.path.isfile(stateFile):
+            return self.state
+
+        try:
+            with io.open(stateFile, 'r', encoding='utf-8') as f:
+                self.state = json.load(f)
+        except Exception as e:
+            p("STATE: CANNOT READ %s, USING LAST STATE: %s" % (stateFile, str(e)), "w")
+        return self.state
+
+    """ File is replaced at once, partial file is not left on failure """
+    def __write (self, state):
+        self.state = state
+        stateFile = self.getFile()
+        if not stateFile:
+            return
+
+        tmpFile = "%s.%s.tmp" % (stateFile, str(os.getpid()))
+        try:
+            with io.open(tmpFile, 'w', encoding='utf-8') as f:
+                f.write(u"%s" % json.dumps(state, indent=2, default=_jsonValue))
+            _replaceFile(tmpFile, stateFile)
+        except Exception as e:
+            p("STATE: CANNOT SAVE %s: %s" % (stateFile, str(e)), "w")
+
+STATE_STORE = stateStore()
@@ -23,7 +23,7 @@ import json
 from collections import OrderedDict
 
 from dingDONG.misc.logger import p
-from dingDONG.misc.enums import eJson, eConn
+from dingDONG.misc.enums import eJson, eConn, eResolution
 from dingDONG.misc.globalMethods import findEnum, getAllProp
 from dingDONG.config      import config
 
@@ -208,6 +208,20 @@ class jsonParser (object):
                                 newDict[eJson.INDEX] = index
                         elif k == eJson.CREATE:
                             newDict[k] = self.__createFrom(propVal=node[prop])
+                        elif k == eJson.PARTITION:
+                            partition = self.__partition(propVal=node[prop])
+                            if partition:
+                                newDict[k] = partition
+                        elif k == eJson.INC:
+                            inc = self.__incremental(propVal=node[prop])
+                            if inc:
+                                newDict[k] = inc
+                        elif k == eJson.BACKFILL:
+                            backfill = self.__backfill(propVal=node[prop])
+                            if backfill:
+                                newDict[k] = backfill
+                        elif k == eJson.DEPENDS:
+                            newDict[k] = list(node[prop]) if isinstance(node[prop], (list, tuple)) else [node[prop]]
                         else:
                             p ("%s not implemented !" %(k), "e")
                     else:
@@ -416,6 +430,81 @@ class jsonParser (object):
             ret.append(indexDict)
         return ret
 
+    # [column, parts], [column, [[from, to], ..]], {column:.., parts:.., ranges:..}
+    def __partition (self, propVal):
+        ret = {eJson.partition.COLUMN:None, eJson.partition.PARTS:None, eJson.partition.RANGES:None}
+        # Number of parts only, used by file sources
+        if isinstance(propVal, int) or (isinstance(propVal, str) and propVal.isdigit()):
+            ret[eJson.partition.PARTS] = int(propVal)
+        elif isinstance(propVal, (list, tuple)) and len(propVal) == 2:
+            ret[eJson.partition.COLUMN] = propVal[0]
+            if isinstance(propVal[1], (list, tuple)):
+                ret[eJson.partition.RANGES] = propVal[1]
+            else:
+                ret[eJson.partition.PARTS] = int(propVal[1])
+        elif isinstance(propVal, dict):
+            for k in propVal:
+                origK = findEnum(prop=str(k).lower(), obj=eJson.partition)
+                if origK:
+                    ret[origK] = propVal[k]
+                else:
+                    p("PARTITION: %s IS NOT VALID PROPERTY, IGNORE" % (str(k)), "e")
+        else:
+            p("PARTITION: NOT VALID VALUES, MUST BE parts, [column, parts] OR DICTIONARY: %s " % (str(propVal)), "e")
+            return None
+
+        if not ret[eJson.partition.COLUMN] and not ret[eJson.partition.PARTS]:
+            p("PARTITION: COLUMN OR PARTS ARE NOT DEFINED, IGNORE PARTITION: %s " % (str(propVal)), "e")
+            return None
+        return ret
+
+    # column, [column], {column:..}
+    def __incremental (self, propVal):
+        ret = {eJson.inc.COLUMN:None}
+        if isinstance(propVal, str):
+            ret[eJson.inc.COLUMN] = propVal
+        elif isinstance(propVal, (list, tuple)) and len(propVal) == 1:
+            ret[eJson.inc.COLUMN] = propVal[0]
+        elif isinstance(propVal, dict):
+            for k in propVal:
+                origK = findEnum(prop=str(k).lower(), obj=eJson.inc)
+                if origK:
+                    ret[origK] = propVal[k]
+                else:
+                    p("INCREMENTAL: %s IS NOT VALID PROPERTY, IGNORE" % (str(k)), "e")
+
+        if not ret[eJson.inc.COLUMN]:
+            p("INCREMENTAL: WATERMARK COLUMN IS NOT DEFINED, MUST BE column, [column] OR DICTIONARY: %s " % (str(propVal)), "e")
+            return None
+        return ret
+
+    # [column, resolution], [column, resolution, start], [column, resolution, start, periods], {column:.., resolution:.., start:.., periods:.., rerun:..}
+    def __backfill (self, propVal):
+        ret = {eJson.backfill.COLUMN:None, eJson.backfill.RESOLUTION:eResolution.DAY, eJson.backfill.START:None, eJson.backfill.PERIODS:None, eJson.backfill.RERUN:False}
+        if isinstance(propVal, (list, tuple)) and 2 <= len(propVal) <= 4:
+            for k, val in zip((eJson.backfill.COLUMN, eJson.backfill.RESOLUTION, eJson.backfill.START, eJson.backfill.PERIODS), propVal):
+                ret[k] = val
+        elif isinstance(propVal, dict):
+            for k in propVal:
+                origK = findEnum(prop=str(k).lower(), obj=eJson.backfill)
+                if origK:
+                    ret[origK] = propVal[k]
+                else:
+                    p("BACKFILL: %s IS NOT VALID PROPERTY, IGNORE" % (str(k)), "e")
+        else:
+            p("BACKFILL: NOT VALID VALUES, MUST BE [column, resolution, <?start>, <?periods>] OR DICTIONARY: %s " % (str(propVal)), "e")
+            return None
+
+        if not ret[eJson.backfill.COLUMN]:
+            p("BACKFILL: COLUMN IS NOT DEFINED, IGNORE BACKFILL: %s " % (str(propVal)), "e")
+            return None
+
+        ret[eJson.backfill.RESOLUTION] = str(ret[eJson.backfill.RESOLUTION]).lower()
+        if not findEnum(prop=ret[eJson.backfill.RESOLUTION], obj=eResolution):
+            p("BACKFILL: RESOLUTION %s IS NOT VALID, MUST BE day, week OR month, IGNORE BACKFILL" % (str(ret[eJson.backfill.RESOLUTION])), "e")
+            return None
+        return ret
+
     def __createFrom(self, propVal):
         ret = OrderedDict()
         if isinstance(propVal, str):
@@ -38,9 +38,68 @@ class config:
 
     DING_TRACK_OBJECT_HISTORY   = True
     DING_ADD_OBJECT_DATA        = True
+    DING_MAX_PARALLEL_THREADS   = 4
+    DING_MAX_CONN_THREADS       = 2             # Maximum nodes modeled in parallel on the same connection
+    DING_RAISE_ON_NODE_ERROR    = True
+    DING_FILE_INFER_TYPES       = True          # File sources columns types inferred from sample rows (FILE_MAX_LINES_PARSE)
+    DING_MONGO_SAMPLE_DOCS      = 100           # Mongo collection structure: fields of sample documents, nested fields by dotted path
     
     DONG_LOOP_ON_FAILED_BATCH   = True
+    DONG_REJECT_BISECT          = True          # Failed batch is split into halves until failed rows found, False: row by row
+    DONG_REJECT_DIR             = None          # Rejected rows csv files directory, default LOGS_DIR
+    DONG_REJECT_MAX_PCT         = 1             # Failed batch: load is aborted if rejected rows are more than % of batch rows. None: no limit
     DONG_MAX_PARALLEL_THREADS   = 4
+    DONG_RAISE_ON_NODE_ERROR    = False
+    DONG_PARALLEL_MODE          = 'thread'      # thread / process (eParallel), process used for CPU bound transformations
+    DONG_NODES_DEPENDENCIES     = True          # Infer nodes dependencies from source / target / merge objects
+
+    ## Adaptive batch size: batch rows set by memory budget and load time, connection batch size (bs) is the maximum
+    DONG_ADAPTIVE_BATCH         = True
+    DONG_BATCH_MEMORY_MB        = 256
+    DONG_BATCH_TARGET_SEC       = 10
+    DONG_BATCH_START_ROWS       = 10000
+    DONG_BATCH_MIN_ROWS         = 1000
+
+    ## STT pure functions (fDCast, fR ...) results cached by column value, disabled on low hit rate
+    DONG_TRANSFORM_CACHE        = True
+    DONG_TRANSFORM_CACHE_SIZE   = 100000        # Maximum cached values for each column function
+    DONG_TRANSFORM_CACHE_SAMPLE = 10000         # Values checked before disabling cache
+    DONG_TRANSFORM_CACHE_MIN_HIT= 0.5
+
+    DONG_PUSHDOWN               = True          # Source and target on the same database loaded by INSERT ... SELECT
+    DONG_MERGE_CHUNK_ROWS       = 500000        # Merge source rows by one statement, split by first merge key range. None: one statement
+    DONG_STATE_FILE             = None          # Nodes state (incremental watermark) json file, default LOGS_DIR/dingDong.state.json
+    DONG_JOURNAL_FILE           = None          # Run journal (done nodes, committed rows) used by dong(resume=True), default LOGS_DIR/dingDong.journal.json
+    DONG_CHECKPOINT_SEC         = 30            # Ordered extract checkpoint is saved into run journal every X seconds
+
+    DONG_STREAM_EXTRACT         = True          # Server side cursors (PostgreSQL named cursor, MySQL SSCursor), memory is kept by batch size
+    DONG_PG_COPY                = True          # PostgreSQL targets loaded by COPY FROM STDIN, executemany used if COPY fails
+    DONG_MONGO_BATCH_MB         = 16            # Mongo targets: documents sent by one insert_many / bulk_write (wire message limit)
+
+    ## Pipelined extract / load: reader thread push batches into bounded queue, writers threads load it
+    DONG_PIPELINE               = False
+    DONG_PIPELINE_QUEUE_SIZE    = 4
+    DONG_PIPELINE_WRITERS       = 1
+
+    ## Partition extract: maximum source ranges extracted in parallel
+    DONG_PARTITION_MAX_THREADS  = 4
+
+    ## Parallel file read (node partition parts): file split into line aligned chunks parsed by worker processes
+    DONG_FILE_PARALLEL_MIN_MB   = 64            # Smaller files are read by one thread
+    DONG_FILE_CHUNK_MB          = 64            # Maximum chunk size parsed by one worker
+    DONG_FILE_ORDERED           = True          # Load chunks by file order, False: load chunks as soon as parsed
+
+    ## DB connection pool: connectors borrow connections on connect and return them on close
+    CONN_POOL                   = True
+    CONN_POOL_MAX_SIZE          = 8             # Maximum idle connections for each connection type and url
+    CONN_POOL_IDLE_TIMEOUT      = 300           # Seconds idle connection is kept
+    CONN_POOL_HEALTH_CHECK      = True
+    CONN_POOL_ROLLBACK_ON_RELEASE = True
+
+    ## Tables metadata cache (exists / structure), snapshot file is used by next runs up to META_CACHE_TTL seconds
+    META_CACHE                  = True
+    META_CACHE_FILE             = None
+    META_CACHE_TTL              = 3600
 
     #LOGGING Properties
     LOGS_DEBUG = logging.DEBUG
@@ -23,7 +23,7 @@ import re
 from collections import OrderedDict
 
 from dingDONG.misc.enums import eConn
-from dingDONG.misc.globalMethods import setProperty, replaceStr, uniocdeStr
+from dingDONG.misc.globalMethods import setProperty, uniocdeStr
 
 DEFAULTS = {
     eConn.defaults.DEFAULT_TYPE:eConn.dataTypes.B_STR,
@@ -31,6 +31,60 @@ DEFAULTS = {
     eConn.defaults.UPDATABLE:False
     }
 
+""" COMPILED TRANSFORM: STT functions (f) and execution templates (e) compiled once per node.
+    Batch is transformed column by column, empty strings are set to None in the same pass (emptyToNone) """
+class transformPlan (object):
+    def __init__ (self, functionDict=None, execDict=None, emptyToNone=False):
+        self.functions  = [(ind, functionDict[ind]) for ind in functionDict] if functionDict else []
+        self.execs      = [(ind,) + self.__compileExec(execDict[ind]) for ind in execDict] if execDict else []
+        self.emptyToNone= emptyToNone
+
+    def isEmpty (self):
+        return len(self.functions) == 0 and len(self.execs) == 0 and not self.emptyToNone
+
+    """ Template {n} columns are replaced by python format fields, return format string and columns numbers """
+    def __compileExec (self, execStr):
+        fmt     = u""
+        colNums = []
+        pos     = 0
+        for match in re.finditer(r"(\{.*?\})", execStr, re.MULTILINE | re.DOTALL):
+            colNum = match.group(1).replace('{', '').replace('}', '').strip()
+            if not colNum.isdigit():
+                continue
+            fmt += execStr[pos:match.start()].replace(u"{", u"{{").replace(u"}", u"}}")
+            fmt += u"{%s}" % str(len(colNums))
+            colNums.append(int(colNum))
+            pos = match.end()
+        fmt += execStr[pos:].replace(u"{", u"{{").replace(u"}", u"}}")
+        return fmt, tuple(colNums)
+
+    """ Log columns functions cache statistics """
+    def report (self):
+        for ind, fncList in self.functions:
+            for fn in fncList:
+                if hasattr(fn, 'cacheReport'):
+                    fn.cacheReport(colNum=ind)
+
+    def execute (self, data):
+        if not data or len(self.functions) == 0 and len(self.execs) == 0:
+            if data and self.emptyToNone:
+                return [[i if i != '' else None for i in row] for row in data]
+            return data
+
+        columns = [list(col) for col in zip(*data)]
+
+        for ind, fncList in self.functions:
+            for fn in fncList:
+                columns[ind] = fn.columnHandler(columns[ind], ind)
+
+        for ind, fmt, colNums in self.execs:
+            execColumns = [[uniocdeStr(v, decode=True) if v else u'' for v in columns[num]] for num in colNums]
+            columns[ind] = [fmt.format(*vals) for vals in zip(*execColumns)] if len(execColumns) > 0 else [fmt.format()] * len(data)
+
+        if self.emptyToNone:
+            return [[i if i != '' else None for i in row] for row in zip(*columns)]
+        return [list(row) for row in zip(*columns)]
+
 DATA_TYPES = {
     eConn.dataTypes.B_STR: None,
     eConn.dataTypes.B_INT: None,
@@ -73,7 +127,8 @@ class baseConn ():
         dataTypeTree = dataTypeTree if dataTypeTree else copy.copy(self.dataTypes)
         for k in dataTypeTree:
             k = str(k)
-            if k.lower() == dataType.lower():
+            # Base type with the same name as data type (int, float, datetime) - use data type under the base type
+            if k.lower() == dataType.lower() and not (isinstance(dataTypeTree[k], dict) and dataType.lower() in [str(x).lower() for x in dataTypeTree[k]]):
                 ret.append(k)
                 return ret
             if isinstance(dataTypeTree[k], dict):
@@ -126,33 +181,12 @@ class baseConn ():
     """ -----------------   GLOBAL METHODS -------------------------------------"""
     """ General method - implemented localy """
     def dataTransform(self, data, functionDict=None, execDict=None):
-        regex = r"(\{.*?\})"
-        if (functionDict and len(functionDict) > 0) or (execDict and len(execDict) > 0):
-            for num, dataRow in enumerate(data):
-                row = list(dataRow)
-                for ind in functionDict:
-                    newVal = row[ind]
-                    for fn in functionDict[ind]:
-                        newVal = fn.handler(newVal, ind)
-                    row[ind] = newVal
-
-                for ind in execDict:
-                    newVal = execDict[ind]
-                    matches = re.finditer(regex, execDict[ind], re.MULTILINE | re.DOTALL)
-                    for matchNum, match in enumerate(matches):
-                        for groupNum in range(0, len(match.groups())):
-                            colNum = match.group(1).replace('{', '').replace('}', '')
-                            colVal = row[int(colNum)]
-                            colVal = uniocdeStr(colVal,decode=True ) if colVal else ''
-                            newVal = replaceStr(sString=str(newVal), findStr=match.group(1), repStr=colVal, ignoreCase=False, addQuotes=None)
-                    row[ind] = newVal
-                data[num] = row
+        return self.getTransformPlan(functionDict=functionDict, execDict=execDict).execute(data)
 
+    """ Compile node transformations once, used by extract for all batches """
+    def getTransformPlan (self, functionDict=None, execDict=None):
         ## ceOBDC - convert data to None
-        if self.connType == eConn.types.SQLSERVER:
-            for num, row in enumerate(data):
-                data[num] = [i if i!='' else None for i in row]
-        return data
+        return transformPlan(functionDict=functionDict, execDict=execDict, emptyToNone=self.connType == eConn.types.SQLSERVER)
 
     def getStt (self,sttDict, k=None):
         if k and sttDict and k in sttDict:
@@ -0,0 +1,91 @@
+# Copyright (c) 2017-2021, BPMK LTD (BiSkilled) Tal Shany <tal@biSkilled.com>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+#
+# This file is part of dingDONG
+#
+# dingDong is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# dingDong is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with dingDong.  If not, see <http://www.gnu.org/licenses/>.
+
+import sys
+import time
+
+from dingDONG.misc.logger   import p
+from dingDONG.config        import config
+
+""" ADAPTIVE BATCH SIZE: Batch rows are set by average row size (memory budget) and by load time of previous batches.
+    maxRows is the connection batch size (bs), batch grows up to x2 each batch and shrinks at once """
+class batchSizer (object):
+    def __init__ (self, name, maxRows):
+        self.name       = name
+        self.maxRows    = maxRows
+        self.isAdaptive = config.DONG_ADAPTIVE_BATCH and maxRows and maxRows > 0
+        self.batchRows  = min(maxRows, config.DONG_BATCH_START_ROWS) if self.isAdaptive else maxRows
+        self.rowBytes   = None
+        self.cntBatches = 0
+        self.cntRows    = 0
+        self.minRows    = None
+        self.maxUsed    = None
+
+    def getSize (self):
+        return self.batchRows
+
+    """ Set next batch size from current batch rows and seconds used to transform and load them """
+    def update (self, rows, execSec):
+        cntRows = len(rows) if rows else 0
+        if cntRows == 0:
+            return self.batchRows
+
+        self.cntBatches += 1
+        self.cntRows    += cntRows
+        self.minRows    = cntRows if self.minRows is None else min(self.minRows, cntRows)
+        self.maxUsed    = cntRows if self.maxUsed is None else max(self.maxUsed, cntRows)
+
+        # Last batch of source has less rows, nothing to adapt
+        if not self.isAdaptive or cntRows < self.batchRows:
+            return self.batchRows
+
+        self.rowBytes = self.__rowBytes(rows)
+        newRows = self.maxRows
+
+        memRows = int(config.DONG_BATCH_MEMORY_MB * 1024 * 1024 / self.rowBytes)
+        newRows = min(newRows, memRows)
+
+        if execSec and execSec > 0 and config.DONG_BATCH_TARGET_SEC:
+            newRows = min(newRows, int(cntRows * config.DONG_BATCH_TARGET_SEC / execSec))
+
+        newRows = min(newRows, self.batchRows * 2)
+        newRows = max(newRows, min(config.DONG_BATCH_MIN_ROWS, self.maxRows))
+
+        if newRows != self.batchRows:
+            p("BATCH SIZE %s: %s -> %s ROWS, ROW SIZE %s BYTES, BATCH TIME %s SEC" % (str(self.name), str(self.batchRows), str(newRows), str(self.rowBytes), str(round(execSec, 2))), "ii")
+        self.batchRows = newRows
+        return self.batchRows
+
+    def report (self):
+        if self.cntBatches > 0:
+            p("BATCH SIZE %s: %s ROWS IN %s BATCHES, BATCH ROWS MIN: %s, MAX: %s, ROW SIZE: %s BYTES" % (str(self.name), str(self.cntRows), str(self.cntBatches), str(self.minRows), str(self.maxUsed), str(self.rowBytes)), "i")
+
+    """ Estimated python memory of row, by sample of rows """
+    def __rowBytes (self, rows, sampleSize=100):
+        step    = max(1, len(rows) // sampleSize)
+        sample  = rows[::step][:sampleSize]
+        total   = 0
+        for r in sample:
+            total += sys.getsizeof(r) + sum([sys.getsizeof(c) for c in r])
+        return max(1, int(total / len(sample)))
+
+    """ Run func(rows) and update batch size by its execution time """
+    def execute (self, rows, func):
+        startTime = time.time()
+        func(rows)
+        return self.update(rows=rows, execSec=time.time() - startTime)
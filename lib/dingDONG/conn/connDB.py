@@ -18,19 +18,30 @@
 
 import os
 import io
+import re
 import sys
 import time
+import datetime
+import decimal
+import math
+import six
+import uuid
+from operator    import itemgetter
 from collections import OrderedDict
 
 from dingDONG.conn.baseConnBatch import baseConnBatch
 from dingDONG.conn.transformMethods import *
-from dingDONG.misc.enums            import eConn, eSql, eJson, eObj
+from dingDONG.misc.enums            import eConn, eSql, eJson, eObj, eResolution
 from dingDONG.misc.globalMethods import uniocdeStr, setProperty
 from dingDONG.config                import config
 from dingDONG.misc.logger           import p
 
 import dingDONG.conn.connDBParser as qp
 from dingDONG.conn.connDBQueries import setSqlQuery
+from dingDONG.conn.connPool      import CONN_POOL, getPoolKey
+from dingDONG.conn.connBatchSizer import batchSizer
+from dingDONG.conn.connReject     import rejectSink, bisectLoad, getMaxRejects
+from dingDONG.conn.connMetaCache import META_CACHE, metaProp
 from dingDONG.executers.executeSql import execQuery
 
 try:
@@ -41,11 +52,13 @@ except ImportError:
 DEFAULTS = {
             eConn.types.NONO: {   eConn.defaults.DEFAULT_TYPE:'varchar(100)',eConn.defaults.TABLE_SCHEMA:'dbo',
                                   eConn.defaults.COLUMNS_NULL:'Null', eConn.defaults.COLUMN_FRAME:("[","]"),
-                                  eConn.defaults.SP:{'match':None, 'replace':None}, eConn.defaults.UPDATABLE:False},
+                                  eConn.defaults.SP:{'match':None, 'replace':None}, eConn.defaults.UPDATABLE:False,
+                                  eConn.defaults.PARAM_STYLE:'?'},
 
             eConn.types.ORACLE: {eConn.defaults.DEFAULT_TYPE: 'varchar(100)', eConn.defaults.TABLE_SCHEMA: 'dbo',
                                  eConn.defaults.COLUMNS_NULL: 'Null', eConn.defaults.COLUMN_FRAME: ('"', '"'),
-                                 eConn.defaults.SP: {'match': r'([@].*[=])(.*?(;|$))', 'replace': r"[=;@\s']"}, eConn.defaults.UPDATABLE:True},
+                                 eConn.defaults.SP: {'match': r'([@].*[=])(.*?(;|$))', 'replace': r"[=;@\s']"}, eConn.defaults.UPDATABLE:True,
+                                 eConn.defaults.PARAM_STYLE:':n'},
 
             eConn.types.SQLSERVER: {eConn.defaults.DEFAULT_TYPE: 'varchar(100)', eConn.defaults.TABLE_SCHEMA: 'dbo',
                                     eConn.defaults.COLUMNS_NULL: 'Null', eConn.defaults.COLUMN_FRAME: ("[", "]"),
@@ -53,12 +66,91 @@ DEFAULTS = {
 
             eConn.types.POSTGESQL: {eConn.defaults.DEFAULT_TYPE: 'varchar(100)', eConn.defaults.TABLE_SCHEMA: 'public',
                                     eConn.defaults.COLUMNS_NULL: 'Null', eConn.defaults.COLUMN_FRAME: ('"', '"'),
-                                    eConn.defaults.SP: {'match': r'([@].*[=])(.*?(;|$))', 'replace': r"[=;@\s']"}, eConn.defaults.UPDATABLE:True  },
+                                    eConn.defaults.SP: {'match': r'([@].*[=])(.*?(;|$))', 'replace': r"[=;@\s']"}, eConn.defaults.UPDATABLE:True,
+                                    eConn.defaults.PARAM_STYLE:'%s'},
+
+            eConn.types.MYSQL: {eConn.defaults.COLUMN_FRAME: ('`', '`'), eConn.defaults.PARAM_STYLE:'%s'},
+
+            eConn.types.VERTICA: {eConn.defaults.COLUMN_FRAME: ('"', '"'), eConn.defaults.PARAM_STYLE:'%s'},
 
             eConn.types.LITE: {   eConn.defaults.DEFAULT_TYPE:'varchar(100)',eConn.defaults.TABLE_SCHEMA:None,
                                   eConn.defaults.COLUMNS_NULL:'Null', eConn.defaults.UPDATABLE:eConn.updateMethod.DROP}
            }
 
+""" INTERNAL USED: Value as SQL literal, used in partition and watermark filters """
+def _sqlValue (val):
+    if isinstance(val, datetime.datetime):
+        return "'%s'" % val.strftime('%Y-%m-%d %H:%M:%S')
+    elif isinstance(val, datetime.date):
+        return "'%s'" % val.strftime('%Y-%m-%d')
+    elif isinstance(val, six.integer_types + (float, decimal.Decimal)) and not isinstance(val, bool):
+        return str(val)
+    return "'%s'" % str(val).replace("'", "''")
+
+""" INTERNAL USED: Split columns ORDER BY at end of query (not in sub query, without LIMIT / OFFSET ..)
+    Return (query without ORDER BY, ORDER BY clause or None) """
+def _splitOrderBy (sql):
+    match = re.search(r'\sORDER\s+BY\s+([\w\s\.,\[\]"`]+?)\s*;?\s*$', sql, flags=re.IGNORECASE)
+    if not match or re.search(r'\b(LIMIT|OFFSET|FETCH|ROWS|FOR)\b', match.group(1), flags=re.IGNORECASE):
+        return sql, None
+    return sql[:match.start()], "ORDER BY %s" % match.group(1)
+
+""" INTERNAL USED: Aggregate query on source query rows: SELECT columns FROM (source query without ORDER BY) """
+def _aggregateSql (columns, sql):
+    return "SELECT %s FROM (%s) dd_a" % (columns, _splitOrderBy(sql)[0])
+
+""" INTERNAL USED: Date from date, datetime or string value (YYYY-MM-DD ...), None if value is not date """
+def _toDate (val):
+    if isinstance(val, datetime.datetime):
+        return val.date()
+    elif isinstance(val, datetime.date):
+        return val
+    elif isinstance(val, six.string_types):
+        try:
+            return datetime.datetime.strptime(val.strip()[:10], '%Y-%m-%d').date()
+        except ValueError:
+            return None
+    return None
+
+""" LOAD PLAN: Insert statement, columns projection and columns converters for one target table and columns list """
+class loadPlan (object):
+    def __init__ (self, execQuery, columns, projection=None, converters=None, copyQuery=None):
+        self.execQuery  = execQuery
+        self.copyQuery  = copyQuery
+        self.columns    = columns
+        self.projection = projection
+        self.converters = converters if converters else []
+
+    """ Return rows ready for executemany """
+    def prepare (self, rows):
+        if self.projection:
+            rows = [self.projection(r) for r in rows]
+
+        if len(self.converters) > 0:
+            newRows = []
+            for r in rows:
+                r = list(r)
+                for i, fnc in self.converters:
+                    r[i] = fnc(r[i])
+                newRows.append(r)
+            rows = newRows
+        return rows
+
+def _decimalToFloat (val):
+    return float(val) if isinstance(val, decimal.Decimal) else val
+
+COPY_ESCAPE = {ord(u'\\'): u'\\\\', ord(u'\t'): u'\\t', ord(u'\n'): u'\\n', ord(u'\r'): u'\\r'}
+
+""" PostgreSQL COPY text format value: Null is \\N, backslash and delimiters are escaped """
+def _copyValue (val):
+    if val is None:
+        return u'\\N'
+    if isinstance(val, (bytes, bytearray)) and not isinstance(val, six.string_types):
+        return u'\\\\x%s' % (bytes(val).hex() if six.PY3 else str(val).encode('hex'))
+    if not isinstance(val, six.text_type):
+        val = six.text_type(val) if six.PY3 or not isinstance(val, str) else val.decode('utf-8')
+    return val.translate(COPY_ESCAPE)
+
 DATA_TYPES = {
     eConn.dataTypes.B_STR: {
                             eConn.dataTypes.DB_VARCHAR:None,
@@ -132,6 +224,8 @@ class connDb (baseConnBatch):
         self.connDB         = None
         self.connSql        = None
         self.connOracleIsCBLOB = None
+        self.loadPlans      = {}
+        self.rejects        = rejectSink(name=self.connTbl)
 
 
         self.isExtractSqlIsOnlySTR  = False
@@ -166,65 +260,21 @@ class connDb (baseConnBatch):
         self.connect()
 
     def connect(self):
-        odbc = None
-
         try:
-            if eConn.types.MYSQL == self.connType:
-                import pymysql
-                self.connDB = pymysql.connect(self.connUrl[eConn.connString.URL_HOST], self.connUrl[eConn.connString.URL_USER],
-                                              self.connUrl[eConn.connString.URL_PASS], self.connUrl[eConn.connString.URL_DB])
-                self.cursor = self.connDB.cursor()
-
-            elif eConn.types.POSTGESQL == self.connType:
-                import psycopg2
-                self.connDB = psycopg2.connect(self.connUrl)
-                self.cursor = self.connDB.cursor()
+            if config.CONN_POOL:
+                self.connDB = CONN_POOL.get(key=getPoolKey(self.connType, self.connUrl), newConn=self.__newConnection, isAlive=self.__isAlive)
+            else:
+                self.connDB = self.__newConnection()
 
-            elif eConn.types.VERTICA == self.connType:
-                import vertica_python
-                self.connDB = vertica_python.connect(self.connUrl)
-                self.cursor = self.connDB.cursor()
+            self.cursor = self.connDB.cursor()
 
-            elif eConn.types.ORACLE == self.connType:
+            if eConn.types.ORACLE == self.connType:
                 self.isExtractSqlIsOnlySTR = True
-
-                self.connDB = cx_Oracle.connect(self.connUrl[eConn.connString.URL_USER], self.connUrl[eConn.connString.URL_PASS], self.connUrl[eConn.connString.URL_DSN])
                 self.connOracleIsCBLOB = cx_Oracle.CLOB
-                if 'nls' in self.connUrl:
-                    os.environ["NLS_LANG"] = self.connUrl[eConn.connString.URL_NLS]
-                self.cursor = self.connDB.cursor()
             elif eConn.types.ACCESS == self.connType:
-                import pyodbc as odbc
-                self.connDB = odbc.connect(self.connUrl)  # , ansi=True
-                self.cursor = self.connType.cursor()
                 self.cColoumnAs = False
-            elif eConn.types.LITE == self.connType:
-                import sqlite3 as sqlite
-                self.connDB = sqlite.connect(self.connUrl)  # , ansi=True
-                self.cursor = self.connDB.cursor()
-            elif eConn.types.SQLSERVER == self.connType:
-                try:
-                    if eConn.props.DB_PYODBC in self.propertyDict:
-                        import pyodbc as odbc
-                    else:
-                        import ceODBC as odbc
-                except ImportError:
-                    # p("ceODBC is not installed will try to load pyodbc", "ii")
-                    try:
-                        import pyodbc as odbc
-                    except ImportError:
-                        p("pyobbc is not installed", "ii")
-                if odbc:
-                    self.connDB = odbc.connect(self.connUrl)  # ansi=True
-                    self.cursor = self.connDB.cursor()
-            else:
-                import pyodbc as odbc
-                self.connDB = odbc.connect(self.connUrl)  # ansi=True
-                self.cursor = self.connDB.cursor()
-                p("CONN %s is not defined, using PYODBC connection " %self.connType, "w")
 
-            p("CONNECTED, DB TYPE: %s, URL: %s" % (self.connType, self.connUrl), "ii")
-            if not self.isSingleObject:
+            if not self.isSingleObject and len(self.objNames) == 0:
                 sql = setSqlQuery().getSql(conn=self.connType, sqlType=eSql.ALL_TABLES, filterTables=self.connFilter)
                 self.exeSQL(sql, commit=False)
                 rows = self.cursor.fetchall()
@@ -246,12 +296,85 @@ class connDb (baseConnBatch):
             #err+= traceback.format_exc()
             raise ValueError(err)
 
+    """ INTERNAL USED: Open new DB connection """
+    def __newConnection (self):
+        odbc    = None
+        connDB  = None
+
+        if eConn.types.MYSQL == self.connType:
+            import pymysql
+            connDB = pymysql.connect(self.connUrl[eConn.connString.URL_HOST], self.connUrl[eConn.connString.URL_USER],
+                                          self.connUrl[eConn.connString.URL_PASS], self.connUrl[eConn.connString.URL_DB])
+
+        elif eConn.types.POSTGESQL == self.connType:
+            import psycopg2
+            connDB = psycopg2.connect(self.connUrl)
+
+        elif eConn.types.VERTICA == self.connType:
+            import vertica_python
+            connDB = vertica_python.connect(self.connUrl)
+
+        elif eConn.types.ORACLE == self.connType:
+            connDB = cx_Oracle.connect(self.connUrl[eConn.connString.URL_USER], self.connUrl[eConn.connString.URL_PASS], self.connUrl[eConn.connString.URL_DSN])
+            if 'nls' in self.connUrl:
+                os.environ["NLS_LANG"] = self.connUrl[eConn.connString.URL_NLS]
+        elif eConn.types.ACCESS == self.connType:
+            import pyodbc as odbc
+            connDB = odbc.connect(self.connUrl)  # , ansi=True
+        elif eConn.types.LITE == self.connType:
+            import sqlite3 as sqlite
+            # Connection can be used by pipeline writer threads
+            connDB = sqlite.connect(self.connUrl, check_same_thread=False)  # , ansi=True
+        elif eConn.types.SQLSERVER == self.connType:
+            try:
+                if eConn.props.DB_PYODBC in self.propertyDict:
+                    import pyodbc as odbc
+                else:
+                    import ceODBC as odbc
+            except ImportError:
+                # p("ceODBC is not installed will try to load pyodbc", "ii")
+                try:
+                    import pyodbc as odbc
+                except ImportError:
+                    p("pyobbc is not installed", "ii")
+            if odbc:
+                connDB = odbc.connect(self.connUrl)  # ansi=True
+        else:
+            import pyodbc as odbc
+            connDB = odbc.connect(self.connUrl)  # ansi=True
+            p("CONN %s is not defined, using PYODBC connection " %self.connType, "w")
+
+        p("CONNECTED, DB TYPE: %s, URL: %s" % (self.connType, self.connUrl), "ii")
+        return connDB
+
+    """ INTERNAL USED: Connection pool health check """
+    def __isAlive (self, connDB):
+        try:
+            if eConn.types.MYSQL == self.connType:
+                connDB.ping(False)
+            elif eConn.types.ORACLE == self.connType:
+                connDB.ping()
+            elif eConn.types.POSTGESQL == self.connType and connDB.closed:
+                return False
+            else:
+                cursor = connDB.cursor()
+                cursor.execute("SELECT 1")
+                cursor.fetchall()
+                cursor.close()
+                connDB.rollback()
+            return True
+        except Exception:
+            return False
+
     def close(self):
         try:
             if self.cursor:
                 self.cursor.close()
             if self.connDB:
-                self.connDB.close()
+                if config.CONN_POOL:
+                    CONN_POOL.release(key=getPoolKey(self.connType, self.connUrl), connDB=self.connDB, reset=lambda connDB: connDB.rollback())
+                else:
+                    self.connDB.close()
             self.connDB   = None
             self.cursor = None
         except Exception as e:
@@ -264,10 +387,17 @@ class connDb (baseConnBatch):
 
     def isExists(self, tableName, tableSchema=None):
         tableSchema, tableName = self.setTableAndSchema(tableName=tableName, tableSchema=tableSchema, wrapTable=False)
-        sql = setSqlQuery().getSql(conn=self.connType, sqlType=eSql.ISEXISTS, tableName=tableName, tableSchema=tableSchema)
-        self.cursor.execute(sql)
-        row = self.cursor.fetchone()
-        if row and row[0]:
+        cacheKey = META_CACHE.getKey(self.connType, self.connUrl, tableName=tableName, tableSchema=tableSchema)
+        isExists = META_CACHE.get(cacheKey, metaProp.EXISTS)
+
+        if isExists is None:
+            sql = setSqlQuery().getSql(conn=self.connType, sqlType=eSql.ISEXISTS, tableName=tableName, tableSchema=tableSchema)
+            self.cursor.execute(sql)
+            row = self.cursor.fetchone()
+            isExists = True if row and row[0] else False
+            META_CACHE.set(cacheKey, metaProp.EXISTS, isExists)
+
+        if isExists:
             return True
         p("SCHEMA:%s, TABLE:%s NOT EXISTS" % (tableSchema, tableName), "ii")
         return False
@@ -290,6 +420,7 @@ class connDb (baseConnBatch):
             sql = sql[:-2] + ')'
             p("CREATE TABLE: \n" + sql)
             self.exeSQL(sql=sql, commit=True)
+            self.invalidateMeta(tableName=tableName, tableSchema=tableSchema)
             if self.versionManager: self.versionManager(sql)
 
         # Check for index
@@ -401,6 +532,11 @@ class connDb (baseConnBatch):
     """ INTERNAL USED: TABLE STRUCTURE : {ColumnName:{Type:ColumnType, ALIACE: ColumnName} .... } """
     def getDBStructure(self, tableName, tableSchema):
         tableSchema, tableName = self.setTableAndSchema(tableName=tableName, tableSchema=tableSchema, wrapTable=False)
+        cacheKey = META_CACHE.getKey(self.connType, self.connUrl, tableName=tableName, tableSchema=tableSchema)
+        ret = META_CACHE.get(cacheKey, metaProp.STRUCTURE)
+        if ret is not None:
+            return ret
+
         ret = OrderedDict()
 
         if not self.isExists(tableName=tableName, tableSchema=tableSchema):
@@ -420,6 +556,8 @@ class connDb (baseConnBatch):
             val = {eJson.stt.TYPE: colType, eJson.stt.ALIACE: None}
             ret[colName] = val
 
+        if len(ret) > 0:
+            META_CACHE.set(cacheKey, metaProp.STRUCTURE, ret)
         return ret
 
     """ INTERNAL USED: Complex or simple QUERY STRUCURE:  {ColumnName:{Type:ColumnType, ALIACE: ColumnName} .... } """
@@ -596,6 +734,9 @@ class connDb (baseConnBatch):
 
                 p("CONN:%s, TABLE: %s, ADD COLUMN: %s " % (self.connType, tableName, newStructureL[col][0]), "w")
 
+        if isChanged:
+            self.invalidateMeta(tableName=tableName, tableSchema=tableSchema)
+
         if not isChanged:
             p("TABLE %s DID NOT CHANGED  >>>>>" % (tableName), "ii")
             return isChanged, newHistoryTable
@@ -624,6 +765,8 @@ class connDb (baseConnBatch):
                         # sql = eval (self.objType+"_renameTable ("+self.objName+","+oldName+")")
                         p("RENAME TABLE SQL:%s" % (str(sql)), "w")
                         self.exeSQL(sql=sql, commit=True)
+                        self.invalidateMeta(tableName=tableName, tableSchema=tableSchema)
+                        self.invalidateMeta(tableName=newHistoryTable, tableSchema=tableSchema)
                 else:
                     if existStructure and len(existStructure) > 0:
                         p("TABLE HISTORY IS OFF AND TABLE EXISTS, DROP -> CREATE TABLE %s IN NEW STRUCTURE... " % (
@@ -631,6 +774,7 @@ class connDb (baseConnBatch):
                         sql = setSqlQuery().getSql(conn=self.connType, sqlType=eSql.DROP, tableName=tableName,
                                                    tableSchema=tableSchema)
                         self.exeSQL(sql=sql, commit=True)
+                        self.invalidateMeta(tableName=tableName, tableSchema=tableSchema)
         return isChanged, newHistoryTable
 
     """ INTERNAL USED: Add index """
@@ -743,10 +887,136 @@ class connDb (baseConnBatch):
         tableSchema, tableName = self.setTableAndSchema(tableName=tableName, tableSchema=tableSchema, wrapTable=True)
         sql = setSqlQuery().getSql(conn=self.connType, sqlType=eSql.DELETE, tableName=tableName, tableSchema=tableSchema, sqlFilter=sqlFilter)
         self.exeSQL(sql=self.setQueryWithParams(sql))
-        p("TYPE:%s, DELETE FROM TABLE:%s, WHERE:%s" % (self.connType, self.connTbl, self.connFilter), "ii")
+        p("TYPE:%s, DELETE FROM TABLE:%s, WHERE:%s" % (self.connType, tableName, sqlFilter), "ii")
+
+    """ Add filter to source SQL, used for partition extract. Source query is wrapped: SELECT * FROM (source) WHERE filter,
+        ORDER BY columns at end of source query are kept as the order of wrapped query """
+    def addFilter (self, sqlFilter):
+        sql, orderBy = _splitOrderBy(self.connSql)
+        orderBy = self.__setOrderByColumns(orderBy) if orderBy else None
+        if not orderBy:
+            sql = self.connSql
+
+        self.connSql = 'SELECT * FROM (%s) dd_f WHERE %s%s' % (sql, sqlFilter, " %s" % orderBy if orderBy else "")
+
+    """ INTERNAL USED: addFilter method - ORDER BY columns by wrapped query columns names (t.id -> id, query alias).
+        Return None if column is not selected by query, ORDER BY is kept in source query """
+    def __setOrderByColumns (self, orderBy):
+        queryColumns = {}
+        if self.connIsSql:
+            for col in qp.extract_tableAndColumns(sql=self.connTbl)[qp.QUERY_COLUMNS_KEY]:
+                queryColumns[".".join(col[0]).lower()] = col[1]
+                queryColumns[col[1].lower()] = col[1]
+
+        ret = []
+        for orderCol in orderBy[len("ORDER BY "):].split(","):
+            orderCol = orderCol.split()
+            colName  = orderCol[0]
+            if self.connIsSql:
+                if colName.lower() not in queryColumns:
+                    return None
+                colName = queryColumns[colName.lower()]
+            ret.append(" ".join([colName.split(".")[-1]] + orderCol[1:]))
+        return "ORDER BY %s" % ", ".join(ret)
+
+    """ INCREMENTAL: Return current maximum value of watermark column in source query """
+    def getWatermark (self, column):
+        if not self.connSql or self.connIsSql:
+            p("TYPE:%s, INCREMENTAL EXTRACT IS SUPPORTED FOR TABLE SOURCE ONLY, FULL LOAD" % (self.connType), "w")
+            return None
+
+        colName = self.wrapColName(col=column)
+        sql = _aggregateSql(columns='MAX(%s)' % (colName), sql=self.connSql)
+        if not self.exeSQL(sql=sql, commit=False):
+            raise ValueError("TYPE:%s, CANNOT FIND WATERMARK, COLUMN %s" % (self.connType, column))
+        return self.cursor.fetchone()[0]
+
+    """ INCREMENTAL: Extract rows above last watermark up to current watermark, rows added during extract are loaded by next run """
+    def addWatermarkFilter (self, column, fromVal=None, toVal=None):
+        colName = self.wrapColName(col=column)
+        sqlFilter = []
+        if fromVal is not None:
+            sqlFilter.append("%s > %s" % (colName, _sqlValue(fromVal)))
+        if toVal is not None:
+            sqlFilter.append("%s <= %s" % (colName, _sqlValue(toVal)))
+
+        if len(sqlFilter) > 0:
+            self.addFilter(sqlFilter=" AND ".join(sqlFilter))
+
+    """ PARTITION: Return list of SQL filters on column. Each filter is one range, ranges: [[from, to], ..] or
+        number of parts: split MIN - MAX column values (numeric or date) into equal ranges and add NULL range """
+    def getPartitionFilters (self, column, parts=None, ranges=None, sql=None):
+        colName = self.wrapColName(col=column)
+        setValue= _sqlValue
+        srcSql  = sql if sql else self.connSql
+
+        def setRange (fromVal, toVal, isLast=False):
+            ret = []
+            if fromVal is not None:
+                ret.append ("%s >= %s" % (colName, setValue(fromVal)))
+            if toVal is not None:
+                ret.append ("%s %s %s" % (colName, "<=" if isLast else "<", setValue(toVal)))
+            return " AND ".join(ret) if len(ret) > 0 else None
+
+        if ranges and len(ranges) > 0:
+            return [setRange(fromVal=r[0], toVal=r[1] if len(r) > 1 else None) for r in ranges]
+
+        if not sql and (not self.connSql or self.connIsSql):
+            p("TYPE:%s, PARTITION IS SUPPORTED FOR TABLE SOURCE ONLY, USING ONE PARTITION" % (self.connType), "w")
+            return [None]
+
+        sql = _aggregateSql(columns='MIN(%s), MAX(%s)' % (colName, colName), sql=srcSql)
+        if not self.exeSQL(sql=sql, commit=False):
+            raise ValueError("TYPE:%s, CANNOT FIND PARTITION RANGE, COLUMN %s" % (self.connType, column))
+
+        minVal, maxVal = self.cursor.fetchone()
+        if minVal is None:
+            return ["%s IS NULL" % (colName)]
+
+        dateFormat = None
+        if isinstance(minVal, six.string_types):
+            for dateFormat in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d'):
+                try:
+                    minVal = datetime.datetime.strptime(minVal, dateFormat)
+                    maxVal = datetime.datetime.strptime(maxVal, dateFormat)
+                    break
+                except ValueError:
+                    dateFormat = None
+            if not dateFormat:
+                p("TYPE:%s, PARTITION COLUMN %s IS NOT NUMERIC OR DATE, USING ONE PARTITION" % (self.connType, column), "w")
+                return [None]
+
+        if isinstance(minVal, decimal.Decimal):
+            isInt = minVal == minVal.to_integral_value() and maxVal == maxVal.to_integral_value()
+            minVal, maxVal = (int(minVal), int(maxVal)) if isInt else (float(minVal), float(maxVal))
+
+        parts = max(int(parts), 1) if parts else 1
+        if isinstance(minVal, (datetime.date, datetime.datetime)):
+            isDate = not isinstance(minVal, datetime.datetime)
+            totalSec = (maxVal - minVal).total_seconds()
+            bounds = [minVal + datetime.timedelta(seconds=int(totalSec * i / parts)) for i in range(parts)]
+            bounds = [b.date() if isDate and isinstance(b, datetime.datetime) else b for b in bounds]
+            if dateFormat:
+                bounds = [b.strftime(dateFormat) for b in bounds]
+                maxVal = maxVal.strftime(dateFormat)
+        elif isinstance(minVal, six.integer_types + (float,)):
+            step = (maxVal - minVal) / float(parts)
+            bounds = [minVal + step * i for i in range(parts)]
+            bounds = [int(b) for b in bounds] if isinstance(minVal, six.integer_types) and isinstance(maxVal, six.integer_types) else bounds
+        else:
+            p("TYPE:%s, PARTITION COLUMN %s IS NOT NUMERIC OR DATE, USING ONE PARTITION" % (self.connType, column), "w")
+            return [None]
+
+        bounds = sorted(set(bounds))
+        ret = []
+        for i, fromVal in enumerate(bounds):
+            isLast = i == len(bounds) - 1
+            ret.append (setRange(fromVal=fromVal, toVal=maxVal if isLast else bounds[i + 1], isLast=isLast))
+        ret.append ("%s IS NULL" % (colName))
+        return ret
 
-    def extract(self, tar, tarToSrcDict, batchRows=None):
-        batchRows = batchRows if batchRows else self.batchSize
+    """ INTERNAL USED: extract method - Return source query by target to source mapping, target columns and columns functions """
+    def getExtractSql (self, tarToSrcDict):
         fnOnRowsDic     = {}
         execOnRowsDic   = {}
         pre,pos         = self.columnFrame[0],self.columnFrame[1]
@@ -768,12 +1038,15 @@ class connDb (baseConnBatch):
             postsql = existingColumns[qp.QUERY_POST]
             pre, pos = self.columnFrame[0], self.columnFrame[1]
             if self.connIsSql:
-                allColumns  = existingColumns[qp.QUERY_COLUMNS_KEY]
+                # Filtered query (addFilter) is wrapped, columns are selected by query columns names
+                isWrapped   = sourceSql != self.connTbl
+                allColumns  = qp.extract_tableAndColumns(sql=self.connTbl)[qp.QUERY_COLUMNS_KEY] if isWrapped else existingColumns[qp.QUERY_COLUMNS_KEY]
 
                 for col in allColumns:
-                    existingColumnsL[col[0][-1].replace(pre,"").replace(pos,"").lower()] = ".".join(col[0])
-                    existingColumnsLFull[".".join(col[0]).replace(pre, "").replace(pos, "").lower()] = ".".join(col[0])
-                    existingColumnsByTargetL[ col[1].replace(pre,"").replace(pos,"").lower() ] = ".".join(col[0])
+                    colName = col[1] if isWrapped else ".".join(col[0])
+                    existingColumnsL[col[0][-1].replace(pre,"").replace(pos,"").lower()] = colName
+                    existingColumnsLFull[".".join(col[0]).replace(pre, "").replace(pos, "").lower()] = colName
+                    existingColumnsByTargetL[ col[1].replace(pre,"").replace(pos,"").lower() ] = colName
 
             else:
                 allColumns = self.getStructure()
@@ -826,31 +1099,164 @@ class connDb (baseConnBatch):
             columnStr = ",".join(sourceColumnStr)
             sourceSql = '%s %s %s' %(preSql,columnStr,postsql)
 
-        """ EXECUTING SOURCE QUERY """
         sourceSql = str(sourceSql) if self.isExtractSqlIsOnlySTR else sourceSql
+        return sourceSql, targetColumnStr, fnOnRowsDic, execOnRowsDic
+
+    """ Load target by one INSERT ... SELECT statement when source and target are the same database.
+        Return False if node must be loaded by extract (python functions, different connection or target columns) """
+    def pushDown (self, tar, tarToSrcDict):
+        if not config.DONG_PUSHDOWN or not isinstance(tar, connDb) or not self.isSingleObject or not tar.isSingleObject:
+            return False
+
+        if getPoolKey(self.connType, self.connUrl) != getPoolKey(tar.connType, tar.connUrl):
+            return False
+
+        sourceSql, targetColumnStr, fnOnRowsDic, execOnRowsDic = self.getExtractSql(tarToSrcDict=tarToSrcDict)
+        if len(fnOnRowsDic) > 0 or len(execOnRowsDic) > 0 or len(targetColumnStr) == 0:
+            p("TYPE:%s, OBJECT:%s PUSHDOWN NOT USED, COLUMNS FUNCTIONS OR NO COLUMNS MAPPING" % (self.connType, str(self.connTbl)), "ii")
+            return False
+
+        tblFullName = "%s.%s" % (tar.defaultSchema, tar.connTbl) if tar.defaultSchema else tar.connTbl
+        plan = tar.getLoadPlan(tableName=tar.connTbl, tblFullName=tblFullName, targetColumn=targetColumnStr)
+        if not plan or len(plan.columns) != len(targetColumnStr):
+            return False
+
+        pre, pos = tar.columnFrame[0], tar.columnFrame[1]
+        colList = ['%s%s%s' % (pre, col.replace(pre, "").replace(pos, ""), pos) for col in targetColumnStr]
+        sql = "INSERT INTO %s(%s) %s" % (tblFullName, ",".join(colList), sourceSql)
+
+        startTime = time.time()
+        if not tar.exeSQL(sql=sql, commit=True):
+            tar.connDB.rollback()
+            p("TYPE:%s, OBJECT:%s PUSHDOWN FAILED, LOADING BY EXTRACT" % (self.connType, str(self.connTbl)), "w")
+            return False
+
+        p("PUSHDOWN: LOAD %s ROWS INTO %s, EXEC TIME: %s SEC >>>>>> " % (str(tar.cursor.rowcount), tblFullName, str(round(time.time() - startTime, 2))), "i")
+        p("PUSHDOWN SQL:\n %s" % sql, "ii")
+        return True
+
+    """ RESUME: Source query rows are returned by the same order on each run (ORDER BY one column) """
+    def isOrderedExtract (self):
+        return isinstance(self.connSql, six.string_types) and self.getOrderKey() is not None
+
+    """ RESUME: Return ORDER BY column of source query (ascending unique key), None if query is not ordered by one column """
+    def getOrderKey (self):
+        orderBy = _splitOrderBy(self.connSql)[1]
+        orderBy = self.__setOrderByColumns(orderBy) if orderBy else None
+        match   = re.match(r'ORDER\s+BY\s+([^\s,]+)(\s+ASC)?$', orderBy, flags=re.IGNORECASE) if orderBy else None
+        return self.wrapColName(col=match.group(1), remove=True) if match else None
+
+    """ RESUME: Delete target rows above column value, rows loaded after last saved checkpoint are loaded again """
+    def deleteAbove (self, column, val):
+        sqlFilter = "%s > %s" % (self.wrapColName(col=column), _sqlValue(val))
+        if self.connFilter and len(self.connFilter) > 1:
+            sqlFilter = "(%s) AND %s" % (self.connFilter, sqlFilter)
+        self.delete(sqlFilter=sqlFilter, tableName=self.connTbl, tableSchema=self.defaultSchema)
+
+    """ INTERNAL USED: extract method - Return (index, target column) of source column in extracted rows """
+    def __getTargetColumn (self, column, targetColumnStr, tarToSrcDict):
+        pre, pos     = self.columnFrame[0], self.columnFrame[1]
+        tarToSrcDict = tarToSrcDict[''] if self.isSingleObject and tarToSrcDict and '' in tarToSrcDict else tarToSrcDict
+        for i, col in enumerate(targetColumnStr):
+            srcCol = tarToSrcDict[col].get(eJson.stt.SOURCE) if tarToSrcDict and col in tarToSrcDict else None
+            srcCol = srcCol if srcCol else col
+            if srcCol.replace(pre, "").replace(pos, "").lower() == column.lower():
+                return i, col.replace(pre, "").replace(pos, "")
+        return None, None
+
+    """ checkpoint: batch ordered extract, each loaded batch is committed into checkpoint by last row ORDER BY key.
+        Resumed checkpoint: target rows above checkpoint key are deleted, source rows above the key are extracted """
+    def extract(self, tar, tarToSrcDict, batchRows=None, checkpoint=None):
+        batchRows = batchRows if batchRows else self.batchSize
+        sourceSql, targetColumnStr, fnOnRowsDic, execOnRowsDic = self.getExtractSql(tarToSrcDict=tarToSrcDict)
+
+        keyInd = None
+        if checkpoint:
+            orderKey = self.getOrderKey()
+            keyInd, tarKey = self.__getTargetColumn(column=orderKey, targetColumnStr=targetColumnStr, tarToSrcDict=tarToSrcDict)
+            if keyInd is None:
+                p("TYPE:%s, OBJECT:%s ORDER BY %s IS NOT LOADED INTO TARGET, CHECKPOINT IS NOT USED" % (self.connType, str(self.connTbl), str(orderKey)), "w")
+                checkpoint = None
+            elif checkpoint.key is not None:
+                tar.deleteAbove(column=tarKey, val=checkpoint.key)
+                self.addFilter(sqlFilter="%s > %s" % (self.wrapColName(col=orderKey), _sqlValue(checkpoint.key)))
+                sourceSql, targetColumnStr, fnOnRowsDic, execOnRowsDic = self.getExtractSql(tarToSrcDict=tarToSrcDict)
+
+        """ EXECUTING SOURCE QUERY """
 
-        self.exeSQL(sql=sourceSql , commit=False)
-        p("EXTRACTING SQL:\n %s" %sourceSql,"ii")
+        sizer  = batchSizer(name=self.connTbl, maxRows=batchRows)
+        cursor = self.getExtractCursor(batchRows=sizer.getSize())
+        transform = self.getTransformPlan(functionDict=fnOnRowsDic, execDict=execOnRowsDic)
 
-        if len(targetColumnStr) == 0:
-            targetColumnStr = [col[0] for col in self.cursor.description]
+        def loadRows (rows):
+            lastKey = rows[-1][keyInd] if checkpoint and len(rows) > 0 else None
+            rows = transform.execute(rows)
+            tar.load (rows=rows, targetColumn = targetColumnStr)
+            if checkpoint:
+                checkpoint.commit(rows=len(rows), key=lastKey)
 
         rows = None
         try:
+            if not self.exeSQL(sql=sourceSql , commit=False, cursor=cursor):
+                raise ValueError("CANNOT EXECUTE SOURCE QUERY")
+            p("EXTRACTING SQL:\n %s" %sourceSql,"ii")
+
             if batchRows and batchRows>0:
-                while True:
-                    rows = self.cursor.fetchmany( batchRows )
-                    if not rows or len(rows) < 1:
-                        break
-                    rows = self.dataTransform(data=rows, functionDict=fnOnRowsDic, execDict=execOnRowsDic)
-                    tar.load (rows=rows, targetColumn = targetColumnStr)
+                rows = cursor.fetchmany( sizer.getSize() )
+                # Named cursor description exists only after first fetch
+                if len(targetColumnStr) == 0:
+                    targetColumnStr = [col[0] for col in cursor.description]
+
+                while rows and len(rows) > 0:
+                    sizer.execute(rows=rows, func=loadRows)
+                    rows = cursor.fetchmany( sizer.getSize() )
+                sizer.report()
+                transform.report()
             else:
-                rows = self.cursor.fetchall()
-                rows = self.dataTransform(data=rows, functionDict=fnOnRowsDic)
-                tar.load(rows, targetColumn = targetColumnStr)
+                rows = cursor.fetchall()
+                if len(targetColumnStr) == 0:
+                    targetColumnStr = [col[0] for col in cursor.description]
+                loadRows(rows)
         except Exception as e:
             p("TYPE:%s, OBJECT:%s ERROR FATCHING DATA" % (self.connType, str(self.connTbl)), "e")
             p(str(e), "e")
+            # Node failed: incremental watermark and run journal are not updated, last committed batch is saved as checkpoint
+            if checkpoint:
+                checkpoint.save()
+            raise
+        finally:
+            if cursor is not self.cursor:
+                try:
+                    cursor.close()
+                except Exception as e:
+                    p("TYPE:%s, OBJECT:%s CANNOT CLOSE EXTRACT CURSOR: %s" % (self.connType, str(self.connTbl), str(e)), "ii")
+
+    """ INTERNAL USED: extract method - Return cursor which do not hold all result set in memory
+        PostgreSQL: named (server side) cursor, MySql: SSCursor, other drivers: fetch array size by batch size """
+    def getExtractCursor (self, batchRows=None):
+        if not config.DONG_STREAM_EXTRACT:
+            return self.cursor
+
+        try:
+            if eConn.types.POSTGESQL == self.connType:
+                cursor = self.connDB.cursor(name="dd_%s" % uuid.uuid4().hex)
+                if batchRows and batchRows > 0:
+                    cursor.itersize = batchRows
+                return cursor
+
+            if eConn.types.MYSQL == self.connType:
+                import pymysql
+                return self.connDB.cursor(pymysql.cursors.SSCursor)
+        except Exception as e:
+            p("TYPE:%s, CANNOT CREATE STREAMING CURSOR, USING DEFAULT CURSOR: %s" % (self.connType, str(e)), "w")
+            return self.cursor
+
+        if batchRows and batchRows > 0:
+            try:
+                self.cursor.arraysize = batchRows
+            except Exception:
+                pass
+        return self.cursor
 
     def load(self, rows, targetColumn, objectName=None):
         totalRows = len(rows) if rows else 0
@@ -870,34 +1276,21 @@ class connDb (baseConnBatch):
             tableName = self.connTbl
             tblFullName = "%s.%s" %(self.defaultSchema, tableName) if self.defaultSchema else tableName
 
-        execQuery = "INSERT INTO %s" % (tblFullName)
-        pre, pos = self.columnFrame[0], self.columnFrame[1]
-        colList = []
-        colInsert = []
-        ## Compare existint target strucutre
+        plan = self.getLoadPlan(tableName=tableName, tblFullName=tblFullName, targetColumn=targetColumn)
+        if not plan:
+            return
 
-        tarStrucutre = self.getStructure(tableName=tableName, sqlQuery=None)
-        tarStrucutreL= {x.replace(pre, "").replace(pos, "").lower(): x for x in tarStrucutre}
+        execQuery   = plan.execQuery
+        rows        = plan.prepare(rows)
 
-        removeCol = {}
-        for i, col in enumerate (targetColumn):
-            if col.replace(pre, "").replace(pos, "").lower() not in tarStrucutreL:
-                removeCol[i] = col
-        if len (removeCol)>0:
-            for num in removeCol:
-                p("COLUMN NUMBER %s, NAME: %s NOT EXISTS IN TARGET TABLE, IGNORE COLUMN" %(num,removeCol[num]), "w")
-                targetColumn.remove(removeCol[num])
-
-                for i, r in enumerate (rows):
-                    rows[i] = list(r)
-                    del rows[i][num]
-
-        for col in targetColumn:
-            colName = '%s%s%s' % (pre, col, pos)
-            colList.append(colName)
-            colInsert.append('?')
-        execQuery += "(%s) " % (",".join(colList))
-        execQuery += "VALUES (%s)" % (",".join(colInsert))
+        if plan.copyQuery and config.DONG_PG_COPY:
+            try:
+                self.copyLoad(copyQuery=plan.copyQuery, rows=rows)
+                p('COPY %s into target: %s >>>>>> ' % (str(totalRows), tableName), "ii")
+                return
+            except Exception as e:
+                self.connDB.rollback()
+                p(u"TYPE:%s, OBJCT:%s COPY FAILED, LOADING BY EXECUTEMANY: %s" % (self.connType, tableName, str(e)), "w")
 
         try:
             self.cursor.executemany(execQuery, rows)
@@ -913,13 +1306,29 @@ class connDb (baseConnBatch):
             for col in rows[0]:
                 if not col:
                     sampleRes.append ('Null')
-                elif isinstance(col, basestring):
+                elif isinstance(col, six.string_types):
                     sampleRes.append(u"'%s'" %uniocdeStr(col, decode=True))
                 else:
                     sampleRes.append(str(col))
 
             p(u"SAMPLE:%s " % u", ".join(sampleRes), "e")
-            if config.DONG_LOOP_ON_FAILED_BATCH:
+            if config.DONG_LOOP_ON_FAILED_BATCH and config.DONG_REJECT_BISECT:
+                def loadRows (rowsPart):
+                    try:
+                        self.cursor.executemany(execQuery, rowsPart)
+                        self.connDB.commit()
+                    except Exception:
+                        self.connDB.rollback()
+                        raise
+
+                def onReject (row, err):
+                    self.rejects.add(objName=tableName, columns=plan.columns, row=row, error=err)
+
+                self.connDB.rollback()
+                rejectCnt = bisectLoad(rows=rows, loadRows=loadRows, onReject=onReject, maxRejects=getMaxRejects(len(rows)), batchError=e)
+                p("BISECT LOAD-> LOADED %s, REJECTED %s OUT OF %s ROWS" % (str(len(rows) - rejectCnt), str(rejectCnt), str(len(rows))), "e")
+
+            elif config.DONG_LOOP_ON_FAILED_BATCH:
                 iCnt = 0
                 tCnt = len(rows)
                 totalErrorToLooap = int(tCnt * 0.01)
@@ -937,7 +1346,7 @@ class connDb (baseConnBatch):
                         ret = []
                         for col in r:
                             if col is None: ret.append ('Null')
-                            elif isinstance(col, basestring):
+                            elif isinstance(col, six.string_types):
                                 ret.append(u"'%s'" % uniocdeStr(col, decode=True))
                             else:
                                 ret.append(str(col))
@@ -947,6 +1356,69 @@ class connDb (baseConnBatch):
                         p(str(e), "e")
                 p("ROW BY ROW ERROR-> LOADED %s OUT OF %s ROWS" % (str(totalErrorToLooap), str(tCnt)), "e")
 
+    """ INTERNAL USED: load method - PostgreSQL COPY FROM STDIN, rows are sent in text format from memory buffer """
+    def copyLoad (self, copyQuery, rows):
+        buf = io.StringIO()
+        for r in rows:
+            buf.write(u"\t".join([_copyValue(c) for c in r]))
+            buf.write(u"\n")
+
+        buf.seek(0)
+        if not six.PY3:
+            buf = io.BytesIO(buf.getvalue().encode(self.connDB.encoding if hasattr(self.connDB, 'encoding') else 'utf-8'))
+
+        self.cursor.copy_expert(copyQuery, buf)
+        self.connDB.commit()
+
+    """ INTERNAL USED: load method - Return load plan, created once for each target table and columns list
+        Source columns not exists in target are removed, insert statement is created by connection parameter style """
+    def getLoadPlan (self, tableName, tblFullName, targetColumn):
+        planKey = (tblFullName, tuple(targetColumn))
+        if planKey in self.loadPlans:
+            return self.loadPlans[planKey]
+
+        pre, pos = self.columnFrame[0], self.columnFrame[1]
+        paramStyle = self.defaults.get(eConn.defaults.PARAM_STYLE, '?')
+
+        ## Compare existint target strucutre
+        tarStrucutre = self.getStructure(tableName=tableName, sqlQuery=None)
+        tarStrucutreL= {x.replace(pre, "").replace(pos, "").lower(): x for x in tarStrucutre}
+
+        colIndex    = []
+        colList     = []
+        colInsert   = []
+        converters  = []
+        for i, col in enumerate (targetColumn):
+            colL = col.replace(pre, "").replace(pos, "").lower()
+            if colL not in tarStrucutreL:
+                p("COLUMN NUMBER %s, NAME: %s NOT EXISTS IN TARGET TABLE, IGNORE COLUMN" %(i, col), "w")
+                continue
+
+            colType = str(tarStrucutre[tarStrucutreL[colL]].get(eJson.stt.TYPE, '')).lower()
+            # sqlite driver do not bind decimal values
+            if eConn.types.LITE == self.connType and any(x in colType for x in ('dec', 'num', 'real', 'float', 'double', 'money')):
+                converters.append ((len(colIndex), _decimalToFloat))
+
+            colIndex.append (i)
+            colList.append ('%s%s%s' % (pre, col.replace(pre, "").replace(pos, ""), pos))
+            colInsert.append (':%s' % str(len(colInsert) + 1) if paramStyle == ':n' else paramStyle)
+
+        copyQuery = None
+        if eConn.types.POSTGESQL == self.connType:
+            copyQuery = "COPY %s(%s) FROM STDIN WITH (FORMAT text)" % (tblFullName, ",".join(colList))
+
+        if len(colList) == 0:
+            p("TYPE:%s, TABLE %s: THERE ARE NO COLUMNS TO LOAD" % (self.connType, tblFullName), "e")
+            return None
+
+        projection = None
+        if len(colIndex) < len(targetColumn):
+            projection = itemgetter(*colIndex) if len(colIndex) > 1 else lambda r, i=colIndex[0]: (r[i],)
+
+        execQuery = "INSERT INTO %s(%s) VALUES (%s)" % (tblFullName, ",".join(colList), ",".join(colInsert))
+        self.loadPlans[planKey] = loadPlan(execQuery=execQuery, columns=[targetColumn[i] for i in colIndex], projection=projection, converters=converters, copyQuery=copyQuery)
+        return self.loadPlans[planKey]
+
     def execMethod(self, method=None):
         method = method if method else self.connTbl
 
@@ -954,6 +1426,8 @@ class connDb (baseConnBatch):
             p("CONN:%s, EXEC METHOD:\n%s" %(self.connType, method), "i")
             methodTup = [(1,method,{})]
             execQuery(sqlWithParamList=method, connObj=self, sqlFolder=self.sqlFolder)
+            # Method can change any object
+            self.invalidateMeta()
 
     def merge (self, mergeTable, mergeKeys=None, sourceTable=None):
         srcSchema, srcName = self.setTableAndSchema(tableName=sourceTable, tableSchema=None, wrapTable=True)
@@ -964,6 +1438,7 @@ class connDb (baseConnBatch):
 
         mrgStructureL   = {x.lower():x for x in mrgStructure}
         srcStructureL   = {x.lower():x for x in srcStructure}
+        mergeKeys       = [mergeKeys] if isinstance(mergeKeys, six.string_types) else mergeKeys if mergeKeys else []
         mergeKeysL      = [self.wrapColName(col=x.lower(), remove=False) for x in mergeKeys]
 
         ### MERGE IDENTICAL COLUMN ONLY
@@ -998,14 +1473,64 @@ class connDb (baseConnBatch):
             keyColumns = updateColumns
 
         dstTable = '%s.%s' %(mrgSchema,mrgName) if mrgSchema else mrgName
-        srcTable = '%s.%s' %(srcSchema,srcName)
+        srcTable = '%s.%s' %(srcSchema,srcName) if srcSchema else srcName
+
+        # Upsert (INSERT .. ON CONFLICT / ON DUPLICATE KEY) update rows by unique index on merge keys
+        if self.connType in (eConn.types.LITE, eConn.types.POSTGESQL, eConn.types.MYSQL):
+            if not self.setMergeIndex(tableName=mrgName, tableSchema=mrgSchema, mergeKeys=keyColumns):
+                raise ValueError("TYPE:%s, MERGE %s WITH %s: CANNOT CREATE UNIQUE INDEX ON MERGE KEYS %s (DUPLICATE KEYS ?)" % (self.connType, srcTable, dstTable, str(keyColumns)))
+
+        # Each key range is merged and committed by one statement
+        startTime   = time.time()
+        chunks      = self.getMergeChunks(srcTable=srcTable, keyColumn=keyColumns[0])
+        for sqlFilter in chunks:
+            sql = setSqlQuery().getSql(conn=self.connType, sqlType=eSql.MERGE, dstTable=dstTable, srcTable=srcTable, mergeKeys=keyColumns, colList=updateColumns, colFullList=allColumns, sqlFilter=sqlFilter)
+            if not self.exeSQL(sql=sql):
+                raise ValueError("TYPE:%s, MERGE %s WITH %s FAILED, FILTER: %s" % (self.connType, srcTable, dstTable, str(sqlFilter)))
+        p("TYPE:%s, MERGE %s WITH %s, %s CHUNKS, EXEC TIME: %s SEC, \n\t\tMERGE KEYS:%s" %(self.connType, srcTable, dstTable, str(len(chunks)), str(round(time.time() - startTime, 2)), str(keyColumns)), "ii")
+
+    """ INTERNAL USED: merge method - Create unique index on merge keys if not exists, Return False if index cannot be created """
+    def setMergeIndex (self, tableName, mergeKeys, tableSchema=None):
+        pre, pos    = self.columnFrame[0], self.columnFrame[1]
+        tableName   = tableName.replace(pre, "").replace(pos, "")
+        tableName   = '%s.%s' % (tableSchema, tableName) if tableSchema else tableName
+        mergeKeys   = [col.replace(pre, "").replace(pos, "") for col in mergeKeys]
+
+        sql = setSqlQuery().getSql(conn=self.connType, sqlType=eSql.INDEX_EXISTS, tableName=tableName)
+        if not self.exeSQL(sql=sql, commit=False):
+            return False
 
-        sql = setSqlQuery().getSql(conn=self.connType, sqlType=eSql.MERGE, dstTable=dstTable, srcTable=srcTable, mergeKeys=keyColumns, colList=updateColumns, colFullList=allColumns)
-        self.exeSQL(sql=sql)
-        p("TYPE:%s, MERGE %s WITH %s, \n\t\tMERGE KEYS:%s" %(self.connType, srcTable, dstTable, str(keyColumns)), "ii")
+        existIndexDict = {}
+        for row in self.cursor.fetchall():
+            if row[3] or str(row[3]) == '1':
+                existIndexDict.setdefault(row[0], set()).add(str(row[1]).lower())
+
+        if set([col.lower() for col in mergeKeys]) in existIndexDict.values():
+            return True
+
+        sql = setSqlQuery().getSql(conn=self.connType, sqlType=eSql.INDEX, tableName=tableName, columns=mergeKeys, isCluster=False, isUnique=True)
+        p("TYPE:%s, ADD UNIQUE INDEX ON MERGE KEYS: %s\n SQL: %s" % (self.connType, str(mergeKeys), str(sql)), "ii")
+        return self.exeSQL(sql=sql)
+
+    """ INTERNAL USED: merge method - Source filters by ranges of first merge key, each range is up to config.DONG_MERGE_CHUNK_ROWS.
+        Key which is not numeric or date is merged by one statement: [None] """
+    def getMergeChunks (self, srcTable, keyColumn):
+        if not config.DONG_MERGE_CHUNK_ROWS:
+            return [None]
+
+        totalRows = self.cntRows(objName=srcTable)
+        if not totalRows or totalRows <= config.DONG_MERGE_CHUNK_ROWS:
+            return [None]
+
+        pre, pos = self.columnFrame[0], self.columnFrame[1]
+        parts = int(math.ceil(totalRows / float(config.DONG_MERGE_CHUNK_ROWS)))
+        return self.getPartitionFilters(column=keyColumn.replace(pre, "").replace(pos, ""), parts=parts, sql="SELECT * FROM %s" % (srcTable))
 
     def cntRows (self, objName=None):
-        raise NotImplementedError("count rows need to be implemented")
+        objName = objName if objName else self.connTbl
+        if not self.exeSQL(sql="SELECT COUNT(*) FROM %s" % (objName), commit=False):
+            return None
+        return self.cursor.fetchone()[0]
 
     def createFromDbStrucure (self, stt=None, objName=None, addIndex=None):
         if not self.creeateFromObjName:
@@ -1070,13 +1595,14 @@ class connDb (baseConnBatch):
     ########################################################################################################
 
     """ INTERNAL USED  """
-    def exeSQL(self, sql, commit=True):
+    def exeSQL(self, sql, commit=True, cursor=None):
         s = ''
+        cursor = cursor if cursor else self.cursor
         if not (isinstance(sql, (list, tuple))):
             sql = [sql]
         try:
             for s in sql:
-                self.cursor.execute(s)  # if 'ceodbc' in odbc.__name__.lower() else self.connType.execute(s)
+                cursor.execute(s)  # if 'ceodbc' in odbc.__name__.lower() else self.connType.execute(s)
             if commit:
                 self.connDB.commit()  # if 'ceodbc' in odbc.__name__.lower() else self.cursor.commit()
             return True
@@ -1085,6 +1611,15 @@ class connDb (baseConnBatch):
             p(u"ERROR SQL:\n%s " % (uniocdeStr(s)), "e")
             return False
 
+    """ INTERNAL USED: Remove table from metadata cache after DDL, without table remove all connection tables """
+    def invalidateMeta (self, tableName=None, tableSchema=None):
+        self.loadPlans = {}
+        if tableName:
+            tableSchema, tableName = self.setTableAndSchema(tableName=tableName, tableSchema=tableSchema, wrapTable=False)
+            META_CACHE.invalidate(META_CACHE.getKey(self.connType, self.connUrl, tableName=tableName, tableSchema=tableSchema))
+        else:
+            META_CACHE.invalidateConn(self.connType, self.connUrl)
+
     """ INTERNAL USED:
         Return tableSchema, tableName From table name and schema 
         WrapTable=True will return with DB wrapping for example Sql server colum yoyo will be [yoyo] """
@@ -1199,6 +1734,48 @@ class connDb (baseConnBatch):
                     else:
                         p("USING %s DIRECTLY, NOT FOUND IN %s" %(self.connTbl,fullFilePath), "ii")
 
-    """ INTERNAL USED """
+    """ BACKFILL: Return time windows [[from, to], ..] on date column by resolution (day / week / month), to is not included.
+        Windows start at startDate (default minimum column value) and end after periods windows or at maximum column value.
+        Return None if source is not table """
     def minValues (self, colToFilter=None, resolution=None, periods=None, startDate=None):
-        raise NotImplementedError("minValues need to be implemented")
\ No newline at end of file
+        resolution = resolution if resolution else eResolution.DAY
+        if not self.connSql or self.connIsSql:
+            p("TYPE:%s, BACKFILL IS SUPPORTED FOR TABLE SOURCE ONLY" % (self.connType), "w")
+            return None
+
+        colName = self.wrapColName(col=colToFilter)
+        sql = _aggregateSql(columns='MIN(%s), MAX(%s)' % (colName, colName), sql=self.connSql)
+        if not self.exeSQL(sql=sql, commit=False):
+            raise ValueError("TYPE:%s, CANNOT FIND BACKFILL RANGE, COLUMN %s" % (self.connType, colToFilter))
+
+        minVal, maxVal = self.cursor.fetchone()
+        fromVal = _toDate(startDate) if startDate else _toDate(minVal)
+        maxVal  = _toDate(maxVal)
+        if fromVal is None or (not periods and maxVal is None):
+            p("TYPE:%s, BACKFILL COLUMN %s HAS NO DATE VALUES" % (self.connType, colToFilter), "w")
+            return []
+
+        if eResolution.WEEK == resolution:
+            fromVal = fromVal - datetime.timedelta(days=fromVal.weekday())
+        elif eResolution.MONTH == resolution:
+            fromVal = fromVal.replace(day=1)
+
+        ret = []
+        while (periods and len(ret) < int(periods)) or (not periods and fromVal <= maxVal):
+            if eResolution.MONTH == resolution:
+                toVal = datetime.date(fromVal.year + fromVal.month // 12, fromVal.month % 12 + 1, 1)
+            else:
+                toVal = fromVal + datetime.timedelta(days=7 if eResolution.WEEK == resolution else 1)
+            ret.append ([fromVal.strftime('%Y-%m-%d'), toVal.strftime('%Y-%m-%d')])
+            fromVal = toVal
+        return ret
+
+    """ Return SQL filter of column range, from included, to not included """
+    def getRangeFilter (self, column, fromVal=None, toVal=None):
+        colName = self.wrapColName(col=column)
+        ret = []
+        if fromVal is not None:
+            ret.append ("%s >= %s" % (colName, _sqlValue(fromVal)))
+        if toVal is not None:
+            ret.append ("%s < %s" % (colName, _sqlValue(toVal)))
+        return " AND ".join(ret) if len(ret) > 0 else None
\ No newline at end of file
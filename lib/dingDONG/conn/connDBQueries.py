@@ -83,7 +83,7 @@ class baseSqlQuery (object):
     def setSqlTableStructure(self, tableName, tableSchema):
         pass
 
-    def setSqlMerge (self, dstTable, srcTable, mergeKeys, colList , colFullList):
+    def setSqlMerge (self, dstTable, srcTable, mergeKeys, colList , colFullList, sqlFilter=None):
         pass
 
     def setSqlIsExists(self, tableName, tableSchema):
@@ -216,12 +216,15 @@ class setSqlQuery (baseSqlQuery):
                     WHERE a.attnum > 0 AND NOT a.attisdropped
                     AND a.attrelid = 
 	                    (SELECT c.oid FROM pg_catalog.pg_class c LEFT JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
-                        WHERE c.relname ~ '^(hello world)$' AND pg_catalog.pg_table_is_visible(c.oid));"""
+                        WHERE c.relname = '%s' AND %s) ORDER BY a.attnum;""" % (tableName, "n.nspname = '%s'" % tableSchema if tableSchema else "pg_catalog.pg_table_is_visible(c.oid)")
         self.connQuery[eConn.types.POSTGESQL] = str(sql)
 
-    def setSqlMerge (self, dstTable, srcTable, mergeKeys, colList , colFullList):
+    """ MERGE source into destination by merge keys, update only not null source values.
+        sqlFilter: merge source rows of one keys range. SQLite / PostgreSQL / MySql: upsert, unique index on merge keys is required """
+    def setSqlMerge (self, dstTable, srcTable, mergeKeys, colList , colFullList, sqlFilter=None):
         ### SQL AND DEFAULT
-        sql = "MERGE INTO " + dstTable + " as t USING " + srcTable + " as s ON ("
+        srcQuery = "(SELECT * FROM %s WHERE %s)" % (srcTable, sqlFilter) if sqlFilter else srcTable
+        sql = "MERGE INTO " + dstTable + " as t USING " + srcQuery + " as s ON ("
         colOnMerge = " AND ".join(["t." + c + " = s." + c  for c in mergeKeys])
         if colList and len(colList)>0:
             sql += colOnMerge + ") \n WHEN MATCHED %s UPDATE SET \n"
@@ -238,13 +241,29 @@ class setSqlQuery (baseSqlQuery):
 
         if colList and len(colList) > 0:
             self.default = sql %("THEN","THEN")
-            self.connQuery[eConn.types.POSTGESQL] = sql %("","")
         else:
             self.default = sql % ("THEN")
-            self.connQuery[eConn.types.POSTGESQL] = sql % ("")
 
         self.connQuery[eConn.types.SQLSERVER] = self.default
 
+        ### UPSERT: INSERT ... SELECT, existing keys are updated
+        colUpdate   = [c for c in colList if c not in mergeKeys] if colList else []
+        sqlInsert   = "INSERT INTO %s %%s(%s) \n SELECT %s FROM %s \n WHERE %s \n" % (dstTable, ",".join(colFullList), ",".join(colFullList), srcTable, sqlFilter if sqlFilter else "1=1")
+
+        # SQLITE: WHERE is required before ON CONFLICT (parser ambiguity), POSTGRESQL
+        sql = sqlInsert % ("AS t ") + " ON CONFLICT (%s) " % (",".join(mergeKeys))
+        if len(colUpdate) > 0:
+            sql += "DO UPDATE SET \n" + ",\n".join(["%s = COALESCE(excluded.%s, t.%s)" % (c, c, c) for c in colUpdate])
+        else:
+            sql += "DO NOTHING"
+        self.connQuery[eConn.types.LITE]        = sql
+        self.connQuery[eConn.types.POSTGESQL]   = sql
+
+        # MYSQL
+        colUpdate = colUpdate if len(colUpdate) > 0 else mergeKeys[:1]
+        sql = sqlInsert % ("") + " ON DUPLICATE KEY UPDATE \n" + ",\n".join(["%s = COALESCE(VALUES(%s), %s)" % (c, c, c) for c in colUpdate])
+        self.connQuery[eConn.types.MYSQL]       = sql
+
     def setSqlIsExists(self, tableName, tableSchema):
         fullTableName = '%s.%s' %(tableSchema, tableName) if tableSchema else tableName
         sql = "Select OBJECT_ID('%s')" %(fullTableName)
@@ -263,6 +282,11 @@ class setSqlQuery (baseSqlQuery):
         sql ="Delete From %s where %s " %(fullTableName, sqlFilter)
         self.default = sql
         self.connQuery[eConn.types.SQLSERVER] = sql
+        self.connQuery[eConn.types.LITE] = sql
+        self.connQuery[eConn.types.MYSQL] = sql
+        self.connQuery[eConn.types.POSTGESQL] = sql
+        self.connQuery[eConn.types.ORACLE] = sql
+        self.connQuery[eConn.types.VERTICA] = sql
 
     def tblCopyByColumn(self, tableName, tableSchema, srcTableName, columns):
         sourceTableName = '%s.%s' % (tableSchema, tableName) if tableSchema else srcTableName
@@ -283,6 +307,22 @@ class setSqlQuery (baseSqlQuery):
         self.default = sql
         self.connQuery[eConn.types.SQLSERVER] = sql
 
+        tableNames  = tableName.split(".")
+        self.connQuery[eConn.types.LITE] = """
+        SELECT il.name AS indexName, ii.name AS columnName, 0 AS isClustered, il.[unique] AS isUnique
+        FROM pragma_index_list('%s') AS il, pragma_index_info(il.name) AS ii; """ % (tableNames[-1])
+
+        self.connQuery[eConn.types.POSTGESQL] = """
+        SELECT i.relname AS indexName, a.attname AS columnName, ix.indisclustered AS isClustered, ix.indisunique AS isUnique
+        FROM pg_index AS ix INNER JOIN pg_class AS i ON i.oid = ix.indexrelid
+        INNER JOIN pg_attribute AS a ON a.attrelid = ix.indrelid AND a.attnum = ANY(ix.indkey)
+        WHERE ix.indrelid = '%s'::regclass; """ % (tableName)
+
+        self.connQuery[eConn.types.MYSQL] = """
+        SELECT INDEX_NAME AS indexName, COLUMN_NAME AS columnName, 0 AS isClustered, CASE WHEN NON_UNIQUE = 0 THEN 1 ELSE 0 END AS isUnique
+        FROM INFORMATION_SCHEMA.STATISTICS
+        WHERE TABLE_SCHEMA = %s AND TABLE_NAME = '%s'; """ % ("'%s'" % tableNames[0] if len(tableNames) > 1 else "DATABASE()", tableNames[-1])
+
     def setSqlIndex(self,  tableName, columns, isCluster, isUnique):
         tableIndexName = tableName.split(".")
         tableIndexName = tableIndexName[1] if len(tableIndexName)>1 else tableIndexName[0]
@@ -295,6 +335,12 @@ class setSqlQuery (baseSqlQuery):
         self.default = sql
         self.connQuery[eConn.types.SQLSERVER] = sql
 
+        # CLUSTERED INDEX: SQL SERVER ONLY
+        sql = """CREATE %s INDEX %s ON %s (%s)""" %(isUniqueStr, indexName, tableName, ",".join(columns) )
+        self.connQuery[eConn.types.LITE] = sql
+        self.connQuery[eConn.types.POSTGESQL] = sql
+        self.connQuery[eConn.types.MYSQL] = sql
+
     def setSqlColumnUpdate(self, tableName, columnName, columnType, tableSchema=None ):
         fullTableName = '%s.%s' % (tableSchema, tableName) if tableSchema else tableName
         sql = """ALTER TABLE %s ALTER COLUMN %s %s""" %(fullTableName, columnName, columnType)
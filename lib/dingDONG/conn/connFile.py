@@ -20,7 +20,15 @@ import shutil
 import os
 import io
 import time
+import copy
 import codecs
+import datetime
+import threading
+import locale
+import multiprocessing
+import six
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
 from collections import OrderedDict
 if sys.version_info[0] == 2:
     import csv23 as csv
@@ -28,6 +36,7 @@ else:
     import csv as csv
 
 from dingDONG.conn.baseConnBatch import baseConnBatch
+from dingDONG.conn.connBatchSizer import batchSizer
 from dingDONG.conn.transformMethods import  *
 from dingDONG.misc.enums  import eConn, eJson, eObj
 from dingDONG.misc.globalMethods import uniocdeStr, setProperty
@@ -50,7 +59,52 @@ DEFAULTS = {
 
     }
 
-DATA_TYPES = {  }
+DATA_TYPES = {
+    eConn.dataTypes.B_STR: {eConn.dataTypes.DB_VARCHAR:None,
+                            eConn.dataTypes.DB_CLOB:None},
+    eConn.dataTypes.B_INT: {eConn.dataTypes.DB_INT:None,
+                            eConn.dataTypes.DB_BIGINT:None},
+    eConn.dataTypes.B_FLOAT:{eConn.dataTypes.DB_FLOAT:None,
+                            eConn.dataTypes.DB_DECIMAL:None},
+    eConn.dataTypes.DB_DATE:{eConn.dataTypes.DB_DATE:None}
+}
+
+""" Type inference: ISO date formats only, other formats are loaded as string """
+INFER_DATE_FORMATS  = ['%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M:%S.%f', '%Y-%m-%dT%H:%M:%S.%f']
+INFER_INT           = re.compile(r'^[+-]?(0|[1-9]\d*)$')
+INFER_DECIMAL       = re.compile(r'^[+-]?(\d*)\.(\d+)$')
+INFER_FLOAT         = re.compile(r'^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$')
+INFER_LEADING_ZERO  = re.compile(r'^[+-]?0\d')
+INFER_STR_LENGTH    = [10, 20, 50, 100, 255, 500, 1000, 2000, 4000]
+
+FILE_WRITE_BUFFER = 1024 * 1024
+FILE_READ_BLOCK   = 1024 * 1024
+
+""" PARALLEL FILE READ: Worker parse file bytes range into rows and transform them (used by process pool) """
+def _readFileChunk (fileFullPath, start, end, readProp, listOfColumnsL, transform):
+    with io.open(fileFullPath, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+
+    text    = data.decode(readProp['encode'], readProp['errors'])
+    rows    = []
+    replaceToNone = re.compile(readProp['replaceToNone'], re.IGNORECASE|re.MULTILINE|re.UNICODE) if readProp['replaceToNone'] else None
+
+    if readProp['isCsv']:
+        for split_line in csv.reader(io.StringIO(text, newline=None), delimiter=readProp['delimiter']):
+            if len(split_line) == 0:
+                continue
+            if replaceToNone:
+                rows.append([replaceToNone.sub("", split_line[x]) if x > -1 and len(split_line[x]) > 0 else None for x in listOfColumnsL])
+            else:
+                rows.append([split_line[x] if x > -1 and len(split_line[x]) > 0 else None for x in listOfColumnsL])
+    else:
+        for line in io.StringIO(text, newline=None):
+            line = replaceToNone.sub("", line) if replaceToNone else line
+            split_line = line.strip(readProp['endOfLine']).split(readProp['delimiter'])
+            rows.append([split_line[x] if x > -1 and len(split_line[x]) > 0 else None for x in listOfColumnsL])
+
+    return transform.execute(rows)
 
 class connFile (baseConnBatch):
     def __init__ (self, folder=None,fileName=None,
@@ -77,6 +131,10 @@ class connFile (baseConnBatch):
         self.isCsv      = setProperty(k=eConn.defaults.FILE_CSV, o=self.propertyDict, defVal=DEFAULTS[eConn.defaults.FILE_CSV], setVal=isCsv)
         self.defDataType= setProperty(k=eConn.defaults.DEFAULT_TYPE, o=self.propertyDict, defVal=DEFAULTS[eConn.defaults.DEFAULT_TYPE], setVal=isCsv)
         self.columnFrame= ('','')
+        self.dataTypes  = copy.deepcopy(DATA_TYPES)
+        self.sttCache   = {}
+        self.writers    = {}
+        self.writeLock  = threading.Lock()
 
         """ FILE PROPERTIES """
         self.fileFullName = None
@@ -152,7 +210,22 @@ class connFile (baseConnBatch):
 
 
     def close(self):
-        pass
+        with self.writeLock:
+            for fileName in self.writers:
+                self.writers[fileName]['file'].close()
+                p('CLOSE FILE %s, TOTAL LOADED ROWS: %s >>>>>> ' % (fileName, str(self.writers[fileName]['rows'])), "ii")
+            self.writers = {}
+
+    """ INTERNAL USED: open target file once for all loaded batches, append to existing file if self.append """
+    def __getWriter (self, fileName):
+        if fileName not in self.writers:
+            isAppend = self.append and os.path.isfile(fileName) and os.stat(fileName).st_size > 0
+            f = io.open(fileName, 'a' if isAppend else 'w', encoding=self.encode, errors=self.withCharErr, newline='', buffering=FILE_WRITE_BUFFER)
+
+            writer = csv.writer(f, delimiter=self.delimiter, lineterminator=self.endOfLine) if self.isCsv else None
+            self.writers[fileName] = {'file':f, 'writer':writer, 'header':not isAppend, 'rows':0}
+            p("OPEN FILE %s FOR %s >>>>>> " % (fileName, 'APPEND' if isAppend else 'WRITE'), "ii")
+        return self.writers[fileName]
 
     def test(self):
         baseConnBatch.test(self)
@@ -226,6 +299,10 @@ class connFile (baseConnBatch):
         if not os.path.isfile( fullPath ):
             return None
 
+        sttKey = (fullPath, os.path.getmtime(fullPath), os.path.getsize(fullPath))
+        if sttKey in self.sttCache:
+            return copy.deepcopy(self.sttCache[sttKey])
+
         ret = OrderedDict()
         with io.open(fullPath, 'r', encoding=self.encode) as f:
             if not self.header:
@@ -242,8 +319,104 @@ class connFile (baseConnBatch):
                             for i, col in enumerate(headers):
                                 ret[col] = {eJson.stt.TYPE: self.defDataType, eJson.stt.SOURCE: col}
                         break
+
+        if config.DING_FILE_INFER_TYPES and len(ret) > 0:
+            colTypes = self.__inferTypes(fullPath=fullPath, cntColumns=len(ret))
+            for i, col in enumerate(ret):
+                if colTypes[i]:
+                    ret[col][eJson.stt.TYPE] = colTypes[i]
+
+        self.sttCache[sttKey] = copy.deepcopy(ret)
         return ret
 
+    """ INTERNAL USED: Return column types by sample of file rows (FILE_MAX_LINES_PARSE).
+        int / bigint, decimal(p,s), float, datetime (ISO formats) and varchar by maximum length, None: no values found """
+    def __inferTypes (self, fullPath, cntColumns):
+        startFromRow= self.header if self.header else 0
+        maxRows     = self.maxLinesParse if self.maxLinesParse else 50000
+        # Candidate types for each column: int -> decimal -> float -> str, date -> str
+        colProp     = [{'int':True, 'bigint':False, 'decimal':True, 'float':True, 'date':True, 'pre':0, 'scale':0, 'len':0, 'cnt':0} for i in range(cntColumns)]
+
+        with io.open(fullPath, 'r', encoding=self.encode, errors='replace') as f:
+            fFile = csv.reader(f, delimiter=self.delimiter) if self.isCsv else (line.strip(self.endOfLine).split(self.delimiter) for line in f)
+            for i, splitLine in enumerate(fFile):
+                if i < startFromRow:
+                    continue
+                if i >= startFromRow + maxRows:
+                    break
+
+                for c, val in enumerate(splitLine[:cntColumns]):
+                    val = val.strip()
+                    if len(val) == 0:
+                        continue
+                    prop = colProp[c]
+                    prop['cnt'] += 1
+                    prop['len'] = max(prop['len'], len(val))
+
+                    # Codes with leading zeros are kept as string
+                    if INFER_LEADING_ZERO.match(val):
+                        prop['int'], prop['decimal'], prop['float'] = False, False, False
+
+                    if prop['int']:
+                        if INFER_INT.match(val):
+                            if abs(int(val)) > 2147483647:
+                                prop['bigint'] = True
+                                if abs(int(val)) > 9223372036854775807:
+                                    prop['int'] = False
+                            prop['pre']     = max(prop['pre'], len(val.lstrip('+-')))
+                            prop['date']    = False
+                            continue
+                        prop['int'] = False
+
+                    if prop['decimal']:
+                        # Integer value in decimal column: precision is updated, scale is kept
+                        if INFER_INT.match(val):
+                            prop['pre']     = max(prop['pre'], len(val.lstrip('+-')))
+                            prop['date']    = False
+                            continue
+                        match = INFER_DECIMAL.match(val)
+                        if match:
+                            prop['pre']     = max(prop['pre'], len(match.group(1)))
+                            prop['scale']   = max(prop['scale'], len(match.group(2)))
+                            prop['date']    = False
+                            continue
+                        prop['decimal'] = False
+
+                    if prop['float'] and INFER_FLOAT.match(val):
+                        prop['date'] = False
+                        continue
+                    prop['float'] = False
+
+                    if prop['date']:
+                        prop['date'] = self.__isDate(val)
+
+        ret = []
+        for prop in colProp:
+            if prop['cnt'] == 0:
+                ret.append(None)
+            elif prop['int']:
+                ret.append(eConn.dataTypes.DB_BIGINT if prop['bigint'] else eConn.dataTypes.DB_INT)
+            elif prop['decimal'] and prop['pre'] + prop['scale'] <= 38:
+                ret.append('%s(%s,%s)' % (eConn.dataTypes.DB_DECIMAL, str(max(prop['pre'] + prop['scale'], 1)), str(prop['scale'])))
+            elif prop['float'] or prop['decimal']:
+                ret.append(eConn.dataTypes.DB_FLOAT)
+            elif prop['date']:
+                ret.append(eConn.dataTypes.DB_DATE)
+            else:
+                strLen = [x for x in INFER_STR_LENGTH if x >= prop['len']]
+                ret.append('%s(%s)' % (eConn.dataTypes.DB_VARCHAR, str(strLen[0])) if len(strLen) > 0 else eConn.dataTypes.DB_CLOB)
+        p("FILE %s, INFER COLUMNS TYPES FROM %s ROWS: %s" % (fullPath, str(maxRows), str(ret)), "ii")
+        return ret
+
+    def __isDate (self, val):
+        for dateFormat in INFER_DATE_FORMATS:
+            try:
+                datetime.datetime.strptime(val, dateFormat)
+                return True
+            except ValueError:
+                pass
+        return False
+
     """ Strucutre Dictinary for file: {Column Name: {ColumnType:XXXXX} .... }
         Types : STR , FLOAD , INT, DATETIME (only if defined)  """
 
@@ -269,7 +442,12 @@ class connFile (baseConnBatch):
         if self.isExists() and self.append:
             p("FILE/S EXISTS WILL APPEND DATA " )
 
-    def extract(self, tar, tarToSrcDict, batchRows=None):
+        self.close()
+        if self.isSingleObject and self.fileFullName:
+            with self.writeLock:
+                self.__getWriter(fileName=self.fileFullName)
+
+    def extract(self, tar, tarToSrcDict, batchRows=None, parallel=None):
         batchRows           = batchRows if batchRows else self.batchSize
         startFromRow        = 0 if not self.header else self.header
         fileStructureDict   = self.getStructure()
@@ -349,6 +527,23 @@ class connFile (baseConnBatch):
 
             """ EXECUTING LOADING SOURCE FILE DATA """
             rows = []
+            sizer = batchSizer(name=fileName, maxRows=self.maxLinesParse)
+            transform = self.getTransformPlan(functionDict=fnOnRowsDic, execDict=execOnRowsDic)
+
+            if parallel and parallel > 1 and os.path.getsize(fileFullPath) >= config.DONG_FILE_PARALLEL_MIN_MB * 1024 * 1024:
+                try:
+                    self.__extractParallel(tar=tar, fileName=fileName, fileFullPath=fileFullPath, startFromRow=startFromRow, parallel=parallel,
+                                           listOfColumnsL=listOfColumnsL, targetColumnList=targetColumnList, transform=transform)
+                except Exception as e:
+                    p("ERROR LOADING FILE %s  >>>>>>" % (fileFullPath), "e")
+                    p(str(e), "e")
+                    raise
+                continue
+
+            def loadRows (rows):
+                rows = transform.execute(rows)
+                tar.load(rows=rows, targetColumn=targetColumnList, objectName=fileName)
+
             try:
                 with io.open( fileFullPath, 'r', encoding=self.encode, errors=self.withCharErr) as textFile:
                     if self.isCsv:
@@ -360,9 +555,8 @@ class connFile (baseConnBatch):
                                 else:
                                     rows.append([split_line[x] if x > -1 and len(split_line[x]) > 0 else None for x in listOfColumnsL])
 
-                            if self.maxLinesParse and i>startFromRow and i%self.maxLinesParse == 0:
-                                rows = self.dataTransform(data=rows, functionDict=fnOnRowsDic, execDict=execOnRowsDic)
-                                tar.load(rows=rows, targetColumn=targetColumnList, objectName=fileName)
+                            if self.maxLinesParse and len(rows) >= sizer.getSize():
+                                sizer.execute(rows=rows, func=loadRows)
                                 rows = list ([])
                     else:
                         for i, line in enumerate(textFile):
@@ -373,20 +567,116 @@ class connFile (baseConnBatch):
                             if i >= startFromRow:
                                 rows.append([split_line[x] if x > -1 and len(split_line[x]) > 0 else None for x in listOfColumnsL])
 
-                            if self.maxLinesParse and i > startFromRow and i % self.maxLinesParse == 0:
-                                rows = self.dataTransform(data=rows, functionDict=fnOnRowsDic, execDict=execOnRowsDic)
-                                tar.load(rows=rows, targetColumn=targetColumnList, objectName=fileName)
+                            if self.maxLinesParse and len(rows) >= sizer.getSize():
+                                sizer.execute(rows=rows, func=loadRows)
                                 rows = list([])
 
                     if len(rows)>0 : #and split_line:
-                        rows = self.dataTransform(data=rows, functionDict=fnOnRowsDic, execDict=execOnRowsDic)
-
-                        tar.load(rows=rows, targetColumn=targetColumnList, objectName=fileName)
+                        sizer.execute(rows=rows, func=loadRows)
                         rows = list ([])
+                    sizer.report()
+                    transform.report()
 
             except Exception as e:
                 p("ERROR LOADING FILE %s  >>>>>>" % (fileFullPath) , "e")
                 p(str(e), "e")
+                raise
+
+    """ INTERNAL USED: extract method - file is split into line aligned chunks parsed by worker processes.
+        Chunks rows are loaded by order of the file (config.DONG_FILE_ORDERED) or as soon as parsed """
+    def __extractParallel (self, tar, fileName, fileFullPath, startFromRow, parallel, listOfColumnsL, targetColumnList, transform):
+        startTime   = time.time()
+        chunks      = self.__getFileChunks(fileFullPath=fileFullPath, startFromRow=startFromRow, parallel=parallel)
+        readProp    = {'encode':self.encode if self.encode else locale.getpreferredencoding(False), 'errors':self.withCharErr,
+                       'isCsv':self.isCsv, 'delimiter':self.delimiter, 'endOfLine':self.endOfLine, 'replaceToNone':self.replaceToNone}
+
+        # Daemon process (dong in process mode) cannot start child processes
+        isProcess   = not multiprocessing.current_process().daemon
+        executorCls = ProcessPoolExecutor if isProcess else ThreadPoolExecutor
+        p("PARALLEL FILE READ: %s, %s CHUNKS, %s %s >>>>" % (fileFullPath, str(len(chunks)), str(parallel), 'PROCESSES' if isProcess else 'THREADS'), "i")
+
+        totalRows   = 0
+        with executorCls(max_workers=parallel) as executor:
+            pending = deque()
+            for start, end in chunks:
+                pending.append(executor.submit(_readFileChunk, fileFullPath, start, end, readProp, listOfColumnsL, transform))
+
+                # Bounded number of parsed chunks in memory
+                while len(pending) >= parallel * 2:
+                    totalRows += self.__loadChunk(tar=tar, pending=pending, fileName=fileName, targetColumnList=targetColumnList)
+
+            while len(pending) > 0:
+                totalRows += self.__loadChunk(tar=tar, pending=pending, fileName=fileName, targetColumnList=targetColumnList)
+
+        p("PARALLEL FILE READ: %s, LOADED %s ROWS, EXEC TIME: %s SEC" % (fileFullPath, str(totalRows), str(round(time.time() - startTime, 2))), "i")
+
+    def __loadChunk (self, tar, pending, fileName, targetColumnList):
+        if config.DONG_FILE_ORDERED:
+            future = pending.popleft()
+        else:
+            done, notDone = wait(pending, return_when=FIRST_COMPLETED)
+            future = done.pop()
+            pending.remove(future)
+
+        rows  = future.result()
+        batch = self.maxLinesParse if self.maxLinesParse else max(1, len(rows))
+        for i in range(0, len(rows), batch):
+            tar.load(rows=rows[i:i + batch], targetColumn=targetColumnList, objectName=fileName)
+        return len(rows)
+
+    """ INTERNAL USED: Return file bytes ranges (start, end) after header rows, ranges end on new line.
+        For csv files new line inside quoted value is ignored (quote parity) """
+    def __getFileChunks (self, fileFullPath, startFromRow, parallel):
+        fileSize = os.path.getsize(fileFullPath)
+        chunks   = []
+        with io.open(fileFullPath, 'rb') as f:
+            for i in range(startFromRow):
+                f.readline()
+            start     = f.tell()
+            chunkSize = max(1, min(int((fileSize - start) / parallel) + 1, config.DONG_FILE_CHUNK_MB * 1024 * 1024))
+            inQuote   = False
+
+            while start < fileSize:
+                end = start + chunkSize
+                if end >= fileSize:
+                    chunks.append((start, fileSize))
+                    break
+
+                if self.isCsv:
+                    pos = start
+                    f.seek(start)
+                    while pos < end:
+                        block = f.read(min(FILE_READ_BLOCK, end - pos))
+                        if not block:
+                            break
+                        inQuote ^= block.count(b'"') % 2 == 1
+                        pos += len(block)
+
+                end = self.__getLineEnd(f=f, pos=end, inQuote=inQuote)
+                if self.isCsv:
+                    inQuote = False
+                chunks.append((start, end))
+                start = end
+        return chunks
+
+    """ Return position after first new line from pos, new line inside quotes is ignored """
+    def __getLineEnd (self, f, pos, inQuote=False):
+        f.seek(pos)
+        while True:
+            block = f.read(FILE_READ_BLOCK)
+            if not block:
+                return pos
+            if not self.isCsv:
+                ind = block.find(b'\n')
+                if ind > -1:
+                    return pos + ind + 1
+            else:
+                for match in re.finditer(b'["\n]', block):
+                    if match.group(0) == b'"':
+                        inQuote = not inQuote
+                    elif not inQuote:
+                        return pos + match.start() + 1
+            pos += len(block)
 
     def load(self, rows, targetColumn, objectName=None):
         totalRows = len(rows) if rows else 0
@@ -394,10 +684,6 @@ class connFile (baseConnBatch):
             p("THERE ARE NO ROWS","w")
             return
 
-        if self.append:
-            pass
-
-
         fileName = self.fileFullName
         if objectName and len(objectName)>0:
             if objectName in self.objNames:
@@ -406,19 +692,28 @@ class connFile (baseConnBatch):
                 p("FILE %s IS NOT EXISTS !!" %(str(objectName)) ,  "e")
                 return
 
+        if self.isCsv:
+            rows = [['' if c is None else c for c in row] for row in rows]
+        else:
+            rows = [self.delimiter.join(['' if c is None else uniocdeStr(c) if isinstance(c, six.string_types) else six.text_type(c) for c in row]) for row in rows]
 
-        with codecs.open(filename=fileName, mode='wb', encoding=self.encode) as f:
-
-            if targetColumn and len(targetColumn) > 0:
-                f.write(self.delimiter.join(targetColumn))
-                f.write(self.endOfLine)
+        with self.writeLock:
+            fWriter = self.__getWriter(fileName=fileName)
+            header  = targetColumn if fWriter['header'] and targetColumn and len(targetColumn) > 0 else None
+            fWriter['header'] = False
 
-            for row in rows:
-                row = [str(s) for s in row]
-                f.write(self.delimiter.join(row))
-                f.write(self.endOfLine)
+            if fWriter['writer']:
+                if header:
+                    fWriter['writer'].writerow(header)
+                fWriter['writer'].writerows(rows)
+            else:
+                if header:
+                    rows.insert(0, self.delimiter.join(header))
+                rows.append(u'')
+                fWriter['file'].write(uniocdeStr(self.endOfLine.join(rows)))
+            fWriter['rows'] += totalRows
 
-        p('LOAD %s ROWS INTO FILE %s >>>>>> ' % (str(totalRows), self.fileFullName), "ii")
+        p('LOAD %s ROWS INTO FILE %s >>>>>> ' % (str(totalRows), fileName), "ii")
         return
 
     def execMethod(self, method=None):
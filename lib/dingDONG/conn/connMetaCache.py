@@ -0,0 +1,125 @@
+# Copyright (c) 2017-2021, BPMK LTD (BiSkilled) Tal Shany <tal@biSkilled.com>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+#
+# This file is part of dingDONG
+#
+# dingDong is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# dingDong is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with dingDong.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import io
+import copy
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+from dingDONG.conn.connPool import getPoolKey
+from dingDONG.misc.logger   import p
+from dingDONG.config        import config
+
+class metaProp (object):
+    EXISTS      = 'exists'
+    STRUCTURE   = 'structure'
+
+""" METADATA CACHE: Table existence and structure by connection url, schema and table.
+    Connector remove table from cache after DDL on the table. Cache is reset on each ding / dong run
+    and can be saved into snapshot file (config.META_CACHE_FILE) used by next runs for META_CACHE_TTL seconds """
+class metaCache (object):
+    def __init__ (self):
+        self.lock   = threading.Lock()
+        self.cache  = {}
+        self.cntHit = 0
+        self.cntMiss= 0
+
+    """ Connection url is saved as hash, url can have user and password """
+    def getConnKey (self, connType, connUrl):
+        return hashlib.md5(str(getPoolKey(connType, connUrl)).encode('utf-8')).hexdigest()
+
+    def getKey (self, connType, connUrl, tableName, tableSchema=None):
+        return "%s|%s|%s" % (self.getConnKey(connType, connUrl), str(tableSchema).lower() if tableSchema else '', str(tableName).lower())
+
+    def get (self, key, prop):
+        if not config.META_CACHE:
+            return None
+
+        with self.lock:
+            if key in self.cache and prop in self.cache[key]:
+                self.cntHit += 1
+                return copy.deepcopy(self.cache[key][prop])
+            self.cntMiss += 1
+        return None
+
+    def set (self, key, prop, val):
+        if not config.META_CACHE:
+            return
+
+        with self.lock:
+            self.cache.setdefault(key, {})[prop] = copy.deepcopy(val)
+
+    def invalidate (self, key):
+        with self.lock:
+            self.cache.pop(key, None)
+
+    """ Remove all tables of connection, used after executing scripts """
+    def invalidateConn (self, connType, connUrl):
+        connKey = "%s|" % self.getConnKey(connType, connUrl)
+        with self.lock:
+            for key in [x for x in self.cache if x.startswith(connKey)]:
+                del self.cache[key]
+
+    def clear (self):
+        with self.lock:
+            self.cache = {}
+
+    """ Start new run: clear cache and load snapshot file if exists and not expired """
+    def reset (self):
+        self.clear()
+        self.cntHit, self.cntMiss = 0, 0
+        snapshotFile = config.META_CACHE_FILE
+
+        if not config.META_CACHE or not snapshotFile or not os.path.isfile(snapshotFile):
+            return
+
+        if config.META_CACHE_TTL and time.time() - os.path.getmtime(snapshotFile) > config.META_CACHE_TTL:
+            p("METADATA CACHE: SNAPSHOT %s EXPIRED, IGNORE" % (snapshotFile), "ii")
+            return
+
+        try:
+            with io.open(snapshotFile, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f, object_pairs_hook=OrderedDict)
+            with self.lock:
+                self.cache.update(snapshot)
+            p("METADATA CACHE: LOADED %s TABLES FROM %s" % (str(len(snapshot)), snapshotFile), "ii")
+        except Exception as e:
+            p("METADATA CACHE: CANNOT LOAD SNAPSHOT %s, IGNORE: %s" % (snapshotFile, str(e)), "w")
+
+    """ Save snapshot file, done at the end of ding / dong run """
+    def save (self):
+        if self.cntHit + self.cntMiss > 0:
+            p("METADATA CACHE: HITS %s, MISSES %s" % (str(self.cntHit), str(self.cntMiss)), "ii")
+
+        snapshotFile = config.META_CACHE_FILE
+        if not config.META_CACHE or not snapshotFile:
+            return
+
+        try:
+            with self.lock:
+                snapshot = json.dumps(self.cache)
+            with io.open(snapshotFile, 'w', encoding='utf-8') as f:
+                f.write(u"%s" % snapshot)
+        except Exception as e:
+            p("METADATA CACHE: CANNOT SAVE SNAPSHOT %s: %s" % (snapshotFile, str(e)), "w")
+
+META_CACHE = metaCache()
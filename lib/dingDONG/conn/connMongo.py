@@ -19,12 +19,19 @@
 import os
 import sys
 import re
-import pymongo
+import json
 import time
+import datetime
+import six
+import bson
+import pymongo
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from bson import ObjectId
 from collections import OrderedDict
-import pandas as pd
 
 from dingDONG.conn.connDB       import connDb
+from dingDONG.conn.connBatchSizer import batchSizer
 from dingDONG.misc.enums        import eConn, eJson
 from dingDONG.misc.logger       import p
 from dingDONG.misc.globalMethods import uniocdeStr,setProperty
@@ -33,12 +40,34 @@ from dingDONG.config            import config
 DEFAULTS    = { eConn.defaults.DEFAULT_TYPE: 'string', eConn.defaults.TABLE_SCHEMA: None,
                 eConn.defaults.COLUMNS_NULL: 'null', eConn.defaults.COLUMN_FRAME: ("", ""), eConn.defaults.SP: {}}
 
-DATA_TYPES  = { eConn.dataTypes.DB_VARCHAR:['string', 'regex', 'array', 'ntext'],
-                    eConn.dataTypes.DB_INT:['int', 'long'],
+DATA_TYPES  = { eConn.dataTypes.DB_VARCHAR:['string', 'regex', 'array', 'ntext', 'objectId'],
+                    eConn.dataTypes.DB_INT:['int', 'long', 'bool'],
                     eConn.dataTypes.DB_FLOAT:['double'],
                     eConn.dataTypes.DB_DATE:['date','timestamp']
                     }
 
+""" Python value type -> mongo bson type name, used for collection structure from sample documents """
+BSON_TYPES  = {str: 'string', bool: 'bool', float: 'double', ObjectId: 'objectId', list: 'array'}
+
+""" Flatten nested document into dotted path fields: {a:{b:1}} --> {'a.b':1} """
+def flattenDoc (doc, prefix="", ret=None):
+    ret = ret if ret is not None else OrderedDict()
+    for k in doc:
+        if isinstance(doc[k], dict) and len(doc[k]) > 0:
+            flattenDoc(doc[k], prefix="%s%s." % (prefix, k), ret=ret)
+        else:
+            ret["%s%s" % (prefix, k)] = doc[k]
+    return ret
+
+""" Return document value by list of path keys, not scalar values (ObjectId, list, sub document) are loaded as string """
+def getDocValue (doc, keys, toStr=True):
+    for k in keys:
+        if not isinstance(doc, dict):
+            return None
+        doc = doc.get(k)
+    if toStr and doc is not None and isinstance(doc, (ObjectId, list, dict)):
+        return str(doc)
+    return doc
 
 class connMongo (connDb):
     def __init__ (self, propertyDict=None, connType=None, connName=None,
@@ -49,62 +78,52 @@ class connMongo (connDb):
         self.dbName = setProperty( k=eConn.props.DB_NAME, o=propertyDict, setVal=dbName)
         self.isStrict = isStrict
         self.removeId = False
+        self.docBytes = None
 
-        connDb.__init__(self, propertyDict=propertyDict, connType=connType, connName=connName,connUrl=connUrl,
-                        connIsTar=connIsTar, connIsSrc=connIsSrc, connIsSql=connIsSql,
-                        connTbl=connTbl, connFilter=connFilter,
-                        defaults=DEFAULTS, dataTypes=DATA_TYPES)
-
-        ## MongoDb -> {filter}, {projection}
-        self.connSql = None
+        ## MongoDb query -> [collection, <?filter>, <?projection>], filter: dictionary or json string
+        propertyDict    = dict(propertyDict) if propertyDict else {}
+        mongoTbl        = setProperty(k=eConn.props.TBL, o=propertyDict, setVal=connTbl)
+        mongoFilter     = setProperty(k=eConn.props.FILTER, o=propertyDict, setVal=connFilter)
+        self.projection = None
 
-        def __updateFilter (connO):
-            errMsg = "MONGO DB QUERY MUST BE STR(COLLECTION NAME) OR LIST [COLLECTION NAME, <?FILTER>, <?PROJECTION>), NOT VALID VALUE: %s " % (connO)
-            if isinstance(connO, (list, tuple)):
-                if len(connO) == 0 and isinstance(connO[0], str):
-                    if not self.connSql:
-                        self.connSql = list(connO)
-                        self.connSql.append({})
-                    else:
-                        self.connSql[0] = connO[0]
-                elif len(connO) == 2 and isinstance(connO[0], str) and isinstance(connO[1], dict):
-                    if not self.connSql:
-                        self.connSql = list(connO)
-                    else:
-                        self.connSql[0] = connO[0]
-                        self.connSql[1] = connO[1]
-                elif len(connO) == 3 and isinstance(connO[0], str) and isinstance(connO[1], dict) and isinstance(connO[2], dict):
-                        self.connSql = connO
-                else:
-                    p(errMsg, "e")
-            elif isinstance(connO, str):
-                if not self.connSql:
-                    self.connSql = [connO, {}]
-                else:
-                    self.connSql[0] = connO
-            else:
+        if isinstance(mongoTbl, (list, tuple)):
+            errMsg = "MONGO DB QUERY MUST BE STR(COLLECTION NAME) OR LIST [COLLECTION NAME, <?FILTER>, <?PROJECTION>), NOT VALID VALUE: %s " % (str(mongoTbl))
+            if len(mongoTbl) not in (1, 2, 3) or not isinstance(mongoTbl[0], str):
                 p(errMsg, "e")
+            mongoFilter     = mongoTbl[1] if len(mongoTbl) > 1 else mongoFilter
+            self.projection = mongoTbl[2] if len(mongoTbl) > 2 else None
+            mongoTbl        = mongoTbl[0]
 
-        if self.connIsSql:
-            __updateFilter(self.connObj)
-            self.connObj    = self.connSql
+        propertyDict[eConn.props.TBL]   = mongoTbl
+        propertyDict[eConn.props.FILTER]= None
+        propertyDict[eConn.props.IS_SQL]= False
 
-        elif self.connObj and len(self.connObj)>0 \
-                and ('.sql' not in self.connObj and (not self.sqlFullFile or (self.sqlFullFile and self.sqlFullFile not in self.connObj))):
-            self.connSql = [{}]
-            self.defaultSchema  = None
+        connDb.__init__(self, propertyDict=propertyDict, connType=connType, connName=connName,connUrl=connUrl,
+                        connIsTar=connIsTar, connIsSrc=connIsSrc, connIsSql=False,
+                        connTbl=mongoTbl, connFilter=None,
+                        defaults=DEFAULTS, dataTypes=DATA_TYPES)
+
+        self.connFilter = self.__setFilter(mongoFilter)
+        self.connSql    = [self.connFilter, self.projection]
 
-            if self.connFilter and len (self.connFilter)>0:
-                __updateFilter(self.connFilter)
-                self.connObj = self.connSql
+    """ INTERNAL USED: Mongo filter from dictionary or json string """
+    def __setFilter (self, mongoFilter):
+        if not mongoFilter:
+            return {}
+        if isinstance(mongoFilter, dict):
+            return mongoFilter
+        try:
+            return json.loads(mongoFilter)
+        except Exception as e:
+            p("MONGODB: FILTER MUST BE DICTIONARY OR JSON STRING, IGNORE FILTER %s: %s" % (str(mongoFilter), str(e)), "e")
+            return {}
 
     def connect(self):
-        connDbName = self.setProperties(propKey=eConn.props.DB_NAME, propVal=self.dbName)
         self.connDB = pymongo.MongoClient(self.connUrl)
-        if connDbName:
-            self.cursor = self.connDB[connDbName]
+        self.cursor = self.connDB[self.dbName] if self.dbName else self.connDB.get_default_database()
 
-        p("CONNECTED, MONGODB DB:%s, URL:%s" % (connDbName, self.connUrl), "ii")
+        p("CONNECTED, MONGODB DB:%s, URL:%s" % (self.dbName, self.connUrl), "ii")
+        return True
 
     def close(self):
         try:
@@ -131,7 +150,7 @@ class connMongo (connDb):
     def isExists(self, tableName, tableSchema=None):
         tableName = self.setTable(tableName=tableName)
 
-        allCollections = self.cursor.collection_names()
+        allCollections = self.cursor.list_collection_names()
 
         if allCollections and len(allCollections)>0:
             for coll in allCollections:
@@ -145,7 +164,7 @@ class connMongo (connDb):
         tableName = self.setTable(tableName=objName)
 
         if not stt or len(stt) == 0:
-            p("TABLE %s NOT MAPPED CORRECLTY " % (self.connObj), "e")
+            p("TABLE %s NOT MAPPED CORRECLTY " % (self.connTbl), "e")
             return
 
         isNew, isChanged, newHistoryTable = self.cloneObject(newStructure=stt, tableName=tableName)
@@ -196,13 +215,13 @@ class connMongo (connDb):
                     isChanged = True
                     existStructure[existStructureL[col]][eJson.stt.TYPE] = newStructureL[col][1]
 
-                    p("%s: CONN:%s, TABLE: %s, COLUMN %s, TYPE CHANGED, OLD: %s, NEW: %s" % (updateDesc, self.conn, tableName, col, existStructure[existStructureL[col]][eJson.stt.TYPE],newStructureL[col][1]), "w")
+                    p("%s: CONN:%s, TABLE: %s, COLUMN %s, TYPE CHANGED, OLD: %s, NEW: %s" % (updateDesc, self.connType, tableName, col, existStructure[existStructureL[col]][eJson.stt.TYPE],newStructureL[col][1]), "w")
 
             ## REMOVE COLUMN
             else:
                 isChanged = True
                 removeColumns.append (existStructureL[col])
-                p("CONN:%s, TABLE: %s, REMOVING COLUMN: %s " % (self.conn, tableName, col), "w")
+                p("CONN:%s, TABLE: %s, REMOVING COLUMN: %s " % (self.connType, tableName, col), "w")
 
         for col in newStructureL:
             # ADD COLUMN
@@ -210,7 +229,7 @@ class connMongo (connDb):
                 isChanged = True
                 existStructure[newStructureL[col][0]] =  newStructureL[col][1]
 
-                p("CONN:%s, TABLE: %s, ADD COLUMN: %s " % (self.conn, tableName, newStructureL[col][0]), "w")
+                p("CONN:%s, TABLE: %s, ADD COLUMN: %s " % (self.connType, tableName, newStructureL[col][0]), "w")
 
         if not isChanged:
             p("TABLE %s DID NOT CHANGED  >>>>>" % (tableName), "ii")
@@ -248,30 +267,31 @@ class connMongo (connDb):
                         self.cursor[tableName].drop()
         return isChanged, newHistoryTable
 
-    def getStructure(self, tableName=None, tableSchema=None, sqlQuery=None):
-        return connDb.getStructure(self, tableName=tableName, tableSchema=tableSchema, sqlQuery=sqlQuery)
+    def getStructure(self, objects=None, tableName=None, sqlQuery=None):
+        return connDb.getStructure(self, objects=objects, tableName=tableName, sqlQuery=sqlQuery)
 
-    """ INTERNAL USED: TABLE STRUCTURE : {ColumnName:{Type:ColumnType, ALIACE: ColumnName} .... } """
-    def getDBStructure(self, tableName, tableSchema):
+    """ INTERNAL USED: COLLECTION STRUCTURE : {ColumnName:{Type:ColumnType, ALIACE: ColumnName} .... }
+        Fields of sample documents (config.DING_MONGO_SAMPLE_DOCS), nested fields by dotted path. Empty strict collection: validator properties """
+    def getDBStructure(self, tableName, tableSchema=None):
         tableName = self.setTable(tableName=tableName)
 
         ret = OrderedDict()
         try:
             collection = self.isExists(tableName=tableName, tableSchema=tableSchema)
             if collection:
-
-                cntRows = self.cntRows()
-                ## there are rows - will use current strucutre
-                if cntRows>0:
-                    schemaObj = self.cursor[tableName].find_one()
-                    if schemaObj and len(schemaObj) > 0:
-                        for col in schemaObj:
-                            colName = uniocdeStr(col)
-                            colType = type(col)
-                            ret[colName] = {eJson.jSttValues.TYPE: colType, eJson.jSttValues.ALIACE: None}
-                else:
+                for doc in self.cursor[collection].find(self.connFilter).limit(config.DING_MONGO_SAMPLE_DOCS):
+                    doc = flattenDoc(doc)
+                    for col in doc:
+                        colName = uniocdeStr(col)
+                        if colName in ret and doc[col] is None:
+                            continue
+                        colType = doc[col].__class__
+                        colType = BSON_TYPES[colType] if colType in BSON_TYPES else 'date' if hasattr(doc[col], 'isoformat') else \
+                                  ('int' if abs(doc[col]) < 2**31 else 'long') if isinstance(doc[col], int) else self.defDataType
+                        ret[colName] = {eJson.stt.TYPE: colType, eJson.stt.ALIACE: None}
+
+                if len(ret) == 0:
                     collectionInfo = self.cursor.command({'listCollections': 1, 'filter': {'name': collection}})
-                    #collectionInfo = self.cursor.get_collection_infos( filter=[collectionsL[tableName.lower()]] )
 
                     if 'cursor' in collectionInfo:
                         cursorObj = collectionInfo['cursor']
@@ -279,208 +299,340 @@ class connMongo (connDb):
                         if 'firstBatch' in cursorObj:
                             firstBatch = cursorObj['firstBatch']
                             for batch in firstBatch:
-                                if 'options' in batch:
+                                if 'options' in batch and 'validator' in batch['options']:
                                     validator = batch['options']['validator']
                                     collectionProperties = validator['$jsonSchema']['properties']
 
                                     for col in collectionProperties:
                                         colType = collectionProperties[col]['bsonType']
-                                        ret[uniocdeStr(col)] = {eJson.jSttValues.TYPE: colType, eJson.jSttValues.ALIACE: None}
+                                        ret[uniocdeStr(col)] = {eJson.stt.TYPE: colType, eJson.stt.ALIACE: None}
 
         except Exception as e:
             p("MONGODB-> %s ERROR:\n %s " %(tableName, str(e)), "e")
 
         return ret
 
-    """ INTERNAL USED: Complex or simple QUERY STRUCURE:  {ColumnName:{Type:ColumnType, ALIACE: ColumnName} .... } """
-    def getQueryStructure(self, sqlQuery=None):
-        return baseGlobalDb.getQueryStructure(self, sqlQuery=sqlQuery)
-
     """ INTERNAL USED: Add index """
     def addIndexToTable(self, tableName, addIndex, tableSchema=None):
         p("MONGODB ---> NOT IMPLEMENTED !!!!")
 
-    def preLoading(self, tableName=None, tableSchema=None, sqlFilter=None):
-        return connDb.preLoading(self, tableName=tableName, tableSchema=tableSchema, sqlFilter=sqlFilter)
-
     """ INTERNAL USED: preLoading method """
     def truncate(self, tableName=None, tableSchema=None):
         tableName = self.setTable(tableName=tableName)
-        #self.cursor[tableName].drop()
-        self.cursor[tableName].remove({})
-        p("TYPE:%s, TRUNCATE TABLE:%s" % (self.conn, self.connObj), "ii")
+        self.cursor[tableName].delete_many({})
+        p("TYPE:%s, TRUNCATE TABLE:%s" % (self.connType, tableName), "ii")
 
     """ INTERNAL USED: preLoading method """
     def delete(self, sqlFilter, tableName=None, tableSchema=None):
         tableName = self.setTable(tableName=tableName)
-        sqlFilter   = sqlFilter if sqlFilter else self.connFilter
-        self.cursor[tableName].remove(sqlFilter)
-        p("TYPE:%s, DELETE FROM TABLE:%s, WHERE:%s" % (self.conn, self.connObj, sqlFilter), "ii")
+        sqlFilter = self.__setFilter(sqlFilter) if sqlFilter else self.connFilter
+        self.cursor[tableName].delete_many(sqlFilter)
+        p("TYPE:%s, DELETE FROM TABLE:%s, WHERE:%s" % (self.connType, tableName, sqlFilter), "ii")
+
+    """ Mongo source is not loaded by INSERT ... SELECT """
+    def pushDown (self, tar, tarToSrcDict):
+        return False
+
+    """ Mongo source is not split into backfill windows """
+    def minValues (self, colToFilter=None, resolution=None, periods=None, startDate=None):
+        p("TYPE:%s, BACKFILL IS SUPPORTED FOR DB TABLE SOURCE ONLY" % (self.connType), "w")
+        return None
+
+    """ Return mongo filter of date field range, from included, to not included """
+    def getRangeFilter (self, column, fromVal=None, toVal=None):
+        ret = {}
+        if fromVal is not None:
+            ret['$gte'] = datetime.datetime.strptime(str(fromVal)[:10], '%Y-%m-%d')
+        if toVal is not None:
+            ret['$lt'] = datetime.datetime.strptime(str(toVal)[:10], '%Y-%m-%d')
+        return {column: ret} if len(ret) > 0 else None
+
+    """ Add mongo filter to source filter (partition, backfill window, incremental watermark) """
+    def addFilter (self, sqlFilter):
+        sqlFilter = self.__setFilter(sqlFilter)
+        if sqlFilter:
+            self.connFilter = {'$and': [self.connFilter, sqlFilter]} if self.connFilter else sqlFilter
+            self.connSql    = [self.connFilter, self.projection]
+
+    """ INCREMENTAL: Return current maximum value of watermark field (indexed field: sort descending, first document).
+        Dates are returned as string with milliseconds, mongo dates precision """
+    def getWatermark (self, column):
+        mongoFilter = {'$and': [self.connFilter, {column: {'$ne': None}}]} if self.connFilter else {column: {'$ne': None}}
+        for doc in self.cursor[self.connTbl].find(mongoFilter, {column: 1}).sort(column, pymongo.DESCENDING).limit(1):
+            val = getDocValue(doc, column.split("."), toStr=False)
+            return val.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3] if isinstance(val, datetime.datetime) else val
+        return None
 
-    def extract(self, tar, tarToSrc, batchRows=None, addAsTaret=True):
-        batchRows       = batchRows if batchRows else self.batchSize
-        srcColumns      = None
+    """ INCREMENTAL: Extract documents above last watermark up to current watermark """
+    def addWatermarkFilter (self, column, fromVal=None, toVal=None):
+        mongoFilter = {}
+        if fromVal is not None:
+            mongoFilter['$gt'] = self.__setWatermarkValue(fromVal)
+        if toVal is not None:
+            mongoFilter['$lte'] = self.__setWatermarkValue(toVal)
+
+        if len(mongoFilter) > 0:
+            self.addFilter({column: mongoFilter})
+
+    """ INTERNAL USED: Watermark saved in state file as string: ObjectId and date values are converted back """
+    def __setWatermarkValue (self, val):
+        if not isinstance(val, six.string_types):
+            return val
+        if len(val) == 24 and ObjectId.is_valid(val):
+            return ObjectId(val)
+        for dateFormat in ('%Y-%m-%d %H:%M:%S.%f', '%Y-%m-%d %H:%M:%S', '%Y-%m-%d'):
+            try:
+                return datetime.datetime.strptime(val, dateFormat)
+            except ValueError:
+                pass
+        return val
+
+    """ Mongo source is not split into partitions, extracted by one cursor """
+    def getPartitionFilters (self, column, parts=None, ranges=None, sql=None):
+        return []
+
+    """ INTERNAL USED: extract method - Return mongo filter and projection, documents path for each target column, target columns and columns functions
+        Projection include only mapped source fields, nested fields are mapped by dotted path (address.city) """
+    def getExtractQuery (self, tarToSrcDict):
         fnOnRowsDic     = {}
         execOnRowsDic   = {}
-        tarColumns      = []
-        sourceSql       = self.connSql
+        targetColumnStr = []
+        sourcePath      = []
+        projection      = self.projection
 
-        dfAllRows = pd.DataFrame(list( self.cursor[self.connObj].find(*sourceSql) ))
+        if self.isSingleObject and tarToSrcDict and '' in tarToSrcDict:
+            tarToSrcDict = tarToSrcDict['']
 
-        if self.removeId and '_id' in dfAllRows:
-            del dfAllRows['_id']
+        existingColumnsL = {col.lower(): col for col in self.getStructure()}
 
         ## There is Source And Target column mapping
-        if tarToSrc and len(tarToSrc) > 0:
-            mongoColumns = dfAllRows.columns
-            mongoColumnsL = [x.lower() for x in mongoColumns]
-
-            for i, col in enumerate(tarToSrc):
-                if eJson.stt.SOURCE in tarToSrc[col] and tarToSrc[col][eJson.stt.SOURCE]:
-                    srcColumnName = tarToSrc[col][eJson.stt.SOURCE].lower()
-                    if srcColumnName in mongoColumnsL:
-                        srcColumns.append(mongoColumnsL[srcColumnName])
-                        tarColumns.append(col)
-                    else:
-                        p("%s: %s, SOURCE COLUMN LISTED IN STT NOT EXISTS IN SOURCE TABLE, IGNORE COLUMN !!!!, OBJECT:\n%s" % (self.conn, tarToSrc[col][eJson.jSttValues.SOURCE], self.connObj), "e")
+        if tarToSrcDict and len(tarToSrcDict) > 0:
+            for i, col in enumerate(tarToSrcDict):
+                if eJson.stt.SOURCE in tarToSrcDict[col] and tarToSrcDict[col][eJson.stt.SOURCE]:
+                    srcColumnName = tarToSrcDict[col][eJson.stt.SOURCE]
+                    if srcColumnName.lower() in existingColumnsL:
+                        srcColumnName = existingColumnsL[srcColumnName.lower()]
+                    elif len(existingColumnsL) > 0:
+                        p("%s: %s, SOURCE COLUMN LISTED IN STT NOT EXISTS IN SOURCE TABLE, IGNORE COLUMN !!!!, OBJECT:\n%s" % (self.connType, srcColumnName, self.connTbl), "e")
                         continue
-
-                elif col.lower() in mongoColumnsL:
-                    srcColumns.append (mongoColumnsL[col.lower()])
-                    tarColumns.append(col)
+                elif col.lower() in existingColumnsL:
+                    srcColumnName = existingColumnsL[col.lower()]
                 else:
-                    srcColumns.append(mongoColumnsL[col.lower()])
-                    dfAllRows[ mongoColumnsL[col.lower()] ] = ""
-                    tarColumns.append(col)
+                    srcColumnName = None
+
+                sourcePath.append(srcColumnName)
+                targetColumnStr.append(col)
 
                 ### ADD FUNCTION
-                if eJson.stt.FUNCTION in tarToSrc[col] and tarToSrc[col][eJson.stt.FUNCTION]:
-                    fnc = eval(tarToSrc[col][eJson.stt.FUNCTION])
-                    fnOnRowsDic[i] = fnc if isinstance(fnc, (list, tuple)) else [fnc]
+                if eJson.stt.FUNCTION in tarToSrcDict[col] and tarToSrcDict[col][eJson.stt.FUNCTION]:
+                    fnc = eval(tarToSrcDict[col][eJson.stt.FUNCTION])
+                    fnOnRowsDic[len(targetColumnStr)-1] = fnc if isinstance(fnc, (list, tuple)) else [fnc]
 
                 ### ADD EXECUTION FUNCTIONS
-                elif eJson.stt.EXECFUNC in tarToSrc[col] and len(
-                        tarToSrc[col][eJson.stt.EXECFUNC]) > 0:
-                    newExcecFunction = tarToSrc[col][eJson.stt.EXECFUNC]
-                    regex = r"(\{.*?\})"
-                    matches = re.finditer(regex, tarToSrc[col][eJson.stt.EXECFUNC], re.MULTILINE | re.DOTALL)
-                    for matchNum, match in enumerate(matches):
-                        for groupNum in range(0, len(match.groups())):
-                            colName = match.group(1)
-                            if colName and len(colName) > 0:
-                                colToReplace = match.group(1).replace("{", "").replace("}", "")
-                                colToReplace = self.__isColumnExists(colName=colToReplace, tarToSrc=tarToSrc)
-                                if colToReplace:
-                                    newExcecFunction = newExcecFunction.replace(colName,"{" + str(colToReplace) + "}")
-                    execOnRowsDic[i] = newExcecFunction
-
-        if srcColumns and len(srcColumns)>0:
-            dfAllRows = dfAllRows[ srcColumns ].values.tolist()
+                elif eJson.stt.EXECFUNC in tarToSrcDict[col] and len(tarToSrcDict[col][eJson.stt.EXECFUNC]) > 0:
+                    newExcecFunction = tarToSrcDict[col][eJson.stt.EXECFUNC]
+                    for match in re.finditer(r"(\{.*?\})", tarToSrcDict[col][eJson.stt.EXECFUNC], re.MULTILINE | re.DOTALL):
+                        colName = match.group(1)
+                        colToReplace = self.__isColumnExists(colName=colName.replace("{", "").replace("}", ""), tarToSrc=tarToSrcDict)
+                        if colToReplace is not None:
+                            newExcecFunction = newExcecFunction.replace(colName, "{" + str(colToReplace) + "}")
+                    execOnRowsDic[len(targetColumnStr)-1] = newExcecFunction
         else:
-            dfAllRows = dfAllRows.values.tolist()
-
+            sourcePath      = list(existingColumnsL.values())
+            targetColumnStr = list(sourcePath)
+
+        ## Projection: mapped fields only, field is not added if its parent document is projected
+        if not projection and len(sourcePath) > 0:
+            projection  = {'_id': 0}
+            allPath     = [path for path in sourcePath if path]
+            for path in allPath:
+                if not any(path.startswith("%s." % parent) for parent in allPath if parent != path):
+                    projection[path] = 1
+
+        sourcePath = [path.split(".") if path else [] for path in sourcePath]
+        return self.connFilter, projection, sourcePath, targetColumnStr, fnOnRowsDic, execOnRowsDic
+
+    """ Stream collection documents by cursor batches, only batch rows are kept in memory """
+    def extract(self, tar, tarToSrcDict, batchRows=None):
+        batchRows = batchRows if batchRows else self.batchSize
+        mongoFilter, projection, sourcePath, targetColumnStr, fnOnRowsDic, execOnRowsDic = self.getExtractQuery(tarToSrcDict=tarToSrcDict)
+
+        sizer       = batchSizer(name=self.connTbl, maxRows=batchRows)
+        transform   = self.getTransformPlan(functionDict=fnOnRowsDic, execDict=execOnRowsDic)
+        cursor      = self.cursor[self.connTbl].find(mongoFilter, projection)
+        if batchRows and batchRows > 0:
+            cursor = cursor.batch_size(sizer.getSize())
+        p("EXTRACTING MONGODB COLLECTION %s, FILTER: %s, PROJECTION: %s" % (self.connTbl, str(mongoFilter), str(projection)), "ii")
+
+        def loadRows (rows):
+            rows = transform.execute(rows)
+            tar.load(rows=rows, targetColumn=targetColumnStr)
+
+        rows = []
         try:
-            totalRows = len(dfAllRows)
-            while totalRows>0:
-                if batchRows and batchRows>0 and batchRows<totalRows:
-                    loadRows = dfAllRows[:batchRows]
-                    dfAllRows = dfAllRows[batchRows:]
-                    rows = self.dataTransform(data=loadRows, functionDict=fnOnRowsDic, execDict=execOnRowsDic)
-                    tar.load(rows=rows, targetColumn=tarColumns)
-                    totalRows = len(dfAllRows)
-                else:
-                    rows = self.dataTransform(data=dfAllRows, functionDict=fnOnRowsDic, execDict=execOnRowsDic)
-                    tar.load(rows=rows, targetColumn=tarColumns)
-                    totalRows = 0
+            for doc in cursor:
+                rows.append([getDocValue(doc, keys) if keys else None for keys in sourcePath])
+                if batchRows and batchRows > 0 and len(rows) >= sizer.getSize():
+                    sizer.execute(rows=rows, func=loadRows)
+                    rows = []
+
+            if len(rows) > 0:
+                sizer.execute(rows=rows, func=loadRows)
+            sizer.report()
+            transform.report()
         except Exception as e:
-            p("TYPE:%s, OBJECT:%s ERROR FATCHING DATA" % (self.conn, str(self.connObj)), "e")
+            p("TYPE:%s, OBJECT:%s ERROR FATCHING DATA" % (self.connType, str(self.connTbl)), "e")
             p(str(e), "e")
+            raise
+        finally:
+            cursor.close()
 
-    def load(self, rows, targetColumn):
+    """ Load rows by insert_many (unordered) in sub batches up to config.DONG_MONGO_BATCH_MB.
+        Documents failed by BulkWriteError are rejected, any other error is raised (node failed) """
+    def load(self, rows, targetColumn, objectName=None):
         totalRows = len(rows) if rows else 0
         if totalRows == 0:
             p("THERE ARE NO ROWS")
             return
-        tableName   = self.connObj
-        pre, pos    = self.columnFrame[0], self.columnFrame[1]
-        ## Compare existint target strucutre
-        tarStrucutre = self.getStructure(tableName=self.connObj, tableSchema=self.defaultSchema, sqlQuery=None)
-        tarStrucutreL= {x.replace(pre, "").replace(pos, "").lower(): x for x in tarStrucutre}
 
-        removeCol = {}
-        for i, col in enumerate (targetColumn):
-            if col.replace(pre, "").replace(pos, "").lower() not in tarStrucutreL:
-                removeCol[i] = col
-
-        if len (removeCol)>0:
-            for num in removeCol:
-                p("COLUMN NUMBER %s, NAME: %s NOT EXISTS IN TARGET TABLE, IGNORE COLUMN" %(num,removeCol[num]), "w")
-                targetColumn.remove(removeCol[num])
-
-                for i, r in enumerate (rows):
-                    rows[i] = list(r)
-                    del rows[i][num]
-
-        for i, row in enumerate (rows):
-            rows[i] = dict(zip(targetColumn, row))
+        tableName   = self.setTable(tableName=objectName if objectName and not self.isSingleObject else None)
+        plan        = self.getLoadPlan(tableName=tableName, targetColumn=targetColumn)
+        if not plan:
+            return
 
+        columnsInd, columns = plan
+        rows = [[r[i] for i in columnsInd] for r in rows] if len(columnsInd) < len(targetColumn) else rows
         try:
-            self.cursor[tableName].insert (rows)
-            p('MONGODB LOAD COLLECTON %s, TOTAL ROWS: %s >>>>>> ' % (tableName, str(totalRows)), "ii")
-
+            cntLoad = self.bulkWrite(tableName=tableName, docs=[self.__toDoc(columns, r) for r in rows], rows=rows, columns=columns)
+            p('MONGODB LOAD COLLECTON %s, TOTAL ROWS: %s >>>>>> ' % (tableName, str(cntLoad)), "ii")
         except Exception as e:
-            p(u"TYPE:%s, OBJCT:%s ERROR in cursor.executemany !!!!" % (self.conn, self.connObj), "e")
-            sampleRes = ['Null' if not r else "'%s'" % r for r in rows[0]]
-            p(u"SAMPLE:%s " % u", ".join(sampleRes), "e")
-            p(e, "e")
-            if config.DONG_LOOP_ON_FAILED_BATCH:
-                iCnt = 0
-                tCnt = len(rows)
-                errDict = {}
-                totalErrorToLooap = int(tCnt * 0.1)
-                totalErrorsFound = 0
-                p("ROW BY ROW ERROR-> LOADING %s OUT OF %s ROWS " % (str(totalErrorToLooap), str(tCnt)),"e")
-                for r in rows:
-                    try:
-                        iCnt += 1
-                        self.cursor[tableName].insert(r)
-                    except Exception as e:
-                        totalErrorsFound += 1
-                        if totalErrorsFound > totalErrorToLooap:
-                            break
-                        errMsg = str(e).lower()
-
-                        if errMsg not in errDict:
-                            errDict[errMsg] = 0
-                            ret = ""
-                            for col in r[0]:
-                                if col is None:
-                                    ret += "Null, "
-                                else:
-                                    ret += "'%s'," % (col)
-                            p("ROW BY ROW ERROR->" , "e")
-                            p(ret, "e")
-                            p(e, "e")
-                        else:
-                            errDict[errMsg] += 1
-                p("ROW BY ROW ERROR-> LOADED %s OUT OF %s ROWS" % (str(totalErrorToLooap), str(tCnt)), "e")
-                for err in errDict:
-                    p("TOTAL ERRORS: %s, MSG: %s: " % (str(err), str(errDict[err])), "e")
+            p(u"TYPE:%s, OBJCT:%s ERROR LOADING ROWS !!!!" % (self.connType, tableName), "e")
+            p(str(e), "e")
+            raise
+
+    """ INTERNAL USED: load method - Return (columns index, columns path) of target columns exists in collection.
+        Schemaless collection without documents load all columns. Plan is kept by collection and target columns """
+    def getLoadPlan (self, tableName, targetColumn, tblFullName=None):
+        planKey = (tableName, tuple(targetColumn))
+        if planKey in self.loadPlans:
+            return self.loadPlans[planKey]
+
+        tarStrucutre    = self.getStructure(tableName=tableName)
+        tarStrucutreL   = {x.lower(): x for x in tarStrucutre}
+        columnsInd      = []
+        columns         = []
+        for i, col in enumerate (targetColumn):
+            if len(tarStrucutreL) > 0 and col.lower() not in tarStrucutreL:
+                p("COLUMN NUMBER %s, NAME: %s NOT EXISTS IN TARGET TABLE, IGNORE COLUMN" % (i, col), "w")
+                continue
+            columnsInd.append(i)
+            columns.append(tarStrucutreL[col.lower()] if col.lower() in tarStrucutreL else col)
+
+        if len(columns) == 0:
+            p("TYPE:%s, COLLECTION %s: THERE ARE NO COLUMNS TO LOAD " % (self.connType, tableName), "e")
+            self.loadPlans[planKey] = None
+        else:
+            self.loadPlans[planKey] = (columnsInd, [col.split(".") for col in columns])
+        return self.loadPlans[planKey]
+
+    """ Write documents in sub batches: insert_many or bulk_write UpdateOne(upsert=True) by keys.
+        Documents failed by BulkWriteError are sent to rejects, Return number of loaded documents """
+    def bulkWrite (self, tableName, docs, rows=None, columns=None, keys=None):
+        collection  = self.cursor[tableName]
+        cntLoad     = 0
+        start       = 0
+        batchDocs   = self.__getBatchDocs(docs)
+
+        while start < len(docs):
+            batch = docs[start:start + batchDocs]
+            try:
+                if keys:
+                    collection.bulk_write([UpdateOne({k: getDocValue(d, k.split("."), toStr=False) for k in keys}, {'$set': d}, upsert=True) for d in batch], ordered=False)
+                else:
+                    collection.insert_many(batch, ordered=False)
+                cntLoad += len(batch)
+            except BulkWriteError as e:
+                writeErrors = e.details.get('writeErrors', [])
+                cntLoad    += len(batch) - len(writeErrors)
+                p("TYPE:%s, OBJCT:%s, %s OUT OF %s DOCUMENTS FAILED" % (self.connType, tableName, str(len(writeErrors)), str(len(batch))), "e")
+                for err in writeErrors:
+                    ind = start + err['index']
+                    if rows and columns:
+                        self.rejects.add(objName=tableName, columns=[".".join(c) for c in columns], row=rows[ind], error=err.get('errmsg'))
+                    else:
+                        doc = flattenDoc(docs[ind])
+                        self.rejects.add(objName=tableName, columns=list(doc.keys()), row=list(doc.values()), error=err.get('errmsg'))
+            start += batchDocs
+        return cntLoad
+
+    """ INTERNAL USED: Documents in one write batch by largest sample document size, maximum 100000 (mongo write batch) """
+    def __getBatchDocs (self, docs):
+        if self.docBytes is None:
+            self.docBytes = max([len(bson.encode(d)) for d in docs[:100]])
+        return max(1, min(100000, int(config.DONG_MONGO_BATCH_MB * 1024 * 1024 / self.docBytes)))
+
+    """ INTERNAL USED: Row into document, dotted columns are loaded as nested document """
+    def __toDoc (self, columns, row):
+        doc = {}
+        for keys, val in zip(columns, row):
+            d = doc
+            for k in keys[:-1]:
+                d = d.setdefault(k, {})
+            d[keys[-1]] = val
+        return doc
 
     def execMethod(self, method=None):
         raise NotImplementedError("execMethod need to be implemented")
 
+    """ Merge source collection into merge collection by merge keys: bulk_write UpdateOne(upsert=True), merge keys are indexed """
     def merge(self, mergeTable, mergeKeys=None, sourceTable=None):
-        raise NotImplementedError("merge need to be implemented")
+        srcName = self.setTable(tableName=sourceTable)
+        mrgName = self.setTable(tableName=mergeTable)
+        mergeKeys = [mergeKeys] if isinstance(mergeKeys, six.string_types) else mergeKeys
+
+        if not mergeKeys or len(mergeKeys) == 0:
+            p("TYPE:%s, MERGE %s WITH %s: MERGE KEYS NOT DEFINED, IGNORE" % (self.connType, srcName, mrgName), "e")
+            return
+
+        self.cursor[mrgName].create_index([(k, pymongo.ASCENDING) for k in mergeKeys])
+        self.docBytes = None
+
+        startTime   = time.time()
+        cntLoad     = 0
+        docs        = []
+        cursor      = self.cursor[srcName].find({}, {'_id': 0}).batch_size(self.batchSize)
+        try:
+            for doc in cursor:
+                docs.append(doc)
+                if len(docs) >= self.batchSize:
+                    cntLoad += self.bulkWrite(tableName=mrgName, docs=docs, keys=mergeKeys)
+                    docs = []
+            if len(docs) > 0:
+                cntLoad += self.bulkWrite(tableName=mrgName, docs=docs, keys=mergeKeys)
+        finally:
+            cursor.close()
+
+        p("TYPE:%s, MERGE %s WITH %s, %s DOCUMENTS, EXEC TIME: %s SEC, \n\t\tMERGE KEYS:%s" % (self.connType, srcName, mrgName, str(cntLoad), str(round(time.time() - startTime, 2)), str(mergeKeys)), "ii")
 
     def cntRows(self, objName=None):
         tableName =  self.setTable (tableName=objName)
-        return self.cursor[tableName].count()
+        return self.cursor[tableName].count_documents({})
 
     ########################################################################################################
 
     """ INTERNAL USED  """
     def setTable (self, tableName, wrapTable=False):
-        tableName   = tableName if tableName else self.connObj
+        tableName   = tableName if tableName else self.connTbl
         tableName   = self.wrapColName (tableName, remove=not wrapTable)
-        return tableName
\ No newline at end of file
+        return tableName
+
+    """ INTERNAL USED """
+    def __isColumnExists (self, colName, tarToSrc):
+        for ind, col in enumerate (tarToSrc):
+            if col.lower() == colName.lower():
+                return ind
+            elif eJson.stt.SOURCE in tarToSrc[col] and tarToSrc[col][eJson.stt.SOURCE] and tarToSrc[col][eJson.stt.SOURCE].lower() == colName.lower():
+                return ind
+
+        p("COLUMN %s NOT FOUND IN MAPPING" %(colName))
+        return None
@@ -0,0 +1,136 @@
+# Copyright (c) 2017-2021, BPMK LTD (BiSkilled) Tal Shany <tal@biSkilled.com>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+#
+# This file is part of dingDONG
+#
+# dingDong is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# dingDong is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with dingDong.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import time
+import atexit
+import threading
+
+from dingDONG.misc.logger   import p
+from dingDONG.config        import config
+
+""" Return pool key from connection type and url (url can be dictionary, for example MySql) """
+def getPoolKey (connType, connUrl):
+    if isinstance(connUrl, dict):
+        connUrl = sorted([(str(k), str(connUrl[k])) for k in connUrl])
+    return (str(connType), str(connUrl))
+
+""" PROCESS CONNECTION POOL: Keep idle DB connections by connection type and url.
+    Connector borrow connection on connect and return it on close. Connection is not shared while borrowed.
+    maxSize: maximum idle connections kept for each key, idleTimeout: seconds idle connection is kept """
+class connPool (object):
+    def __init__ (self, maxSize=None, idleTimeout=None):
+        self.maxSize    = maxSize
+        self.idleTimeout= idleTimeout
+        self.lock       = threading.Lock()
+        self.idle       = {}
+        self.pid        = os.getpid()
+        self.cntNew     = 0
+        self.cntReuse   = 0
+
+    """ Return connection from pool or new connection. isAlive(connDB) used as health check """
+    def get (self, key, newConn, isAlive=None):
+        while True:
+            connDB = self.__getIdle(key=key)
+            if connDB is None:
+                break
+
+            if not isAlive or not config.CONN_POOL_HEALTH_CHECK or isAlive(connDB):
+                with self.lock:
+                    self.cntReuse += 1
+                return connDB
+
+            p("CONN POOL: %s CONNECTION IS NOT VALID, REMOVE FROM POOL" % (str(key[0])), "ii")
+            self.__close(connDB)
+
+        connDB = newConn()
+        with self.lock:
+            self.cntNew += 1
+        return connDB
+
+    """ Return connection into pool, reset(connDB) rollback open transaction """
+    def release (self, key, connDB, reset=None):
+        if connDB is None:
+            return
+
+        if reset and config.CONN_POOL_ROLLBACK_ON_RELEASE:
+            try:
+                reset(connDB)
+            except Exception as e:
+                p("CONN POOL: %s CANNOT RESET CONNECTION, CLOSING IT: %s" % (str(key[0]), str(e)), "ii")
+                self.__close(connDB)
+                return
+
+        maxSize = self.maxSize if self.maxSize is not None else config.CONN_POOL_MAX_SIZE
+        with self.lock:
+            self.__checkPid()
+            idleList = self.idle.setdefault(key, [])
+            if len(idleList) < maxSize:
+                idleList.append((connDB, time.time()))
+                return
+
+        self.__close(connDB)
+
+    def closeAll (self):
+        with self.lock:
+            self.__checkPid()
+            idle = self.idle
+            self.idle = {}
+
+        cntIdle = 0
+        for key in idle:
+            for connDB, lastUsed in idle[key]:
+                self.__close(connDB)
+                cntIdle += 1
+
+        if self.cntNew > 0:
+            p("CONN POOL: NEW CONNECTIONS: %s, REUSED: %s, CLOSED IDLE: %s" % (str(self.cntNew), str(self.cntReuse), str(cntIdle)), "ii")
+
+    def __getIdle (self, key):
+        idleTimeout = self.idleTimeout if self.idleTimeout is not None else config.CONN_POOL_IDLE_TIMEOUT
+        expired = []
+        connDB  = None
+        with self.lock:
+            self.__checkPid()
+            idleList = self.idle.get(key, [])
+            while len(idleList) > 0:
+                conn, lastUsed = idleList.pop()
+                if idleTimeout and time.time() - lastUsed > idleTimeout:
+                    expired.append(conn)
+                else:
+                    connDB = conn
+                    break
+
+        for conn in expired:
+            self.__close(conn)
+        return connDB
+
+    """ Connections are not shared with child process """
+    def __checkPid (self):
+        if self.pid != os.getpid():
+            self.idle   = {}
+            self.pid    = os.getpid()
+
+    def __close (self, connDB):
+        try:
+            connDB.close()
+        except Exception:
+            pass
+
+CONN_POOL = connPool()
+atexit.register(CONN_POOL.closeAll)
@@ -0,0 +1,138 @@
+# Copyright (c) 2017-2021, BPMK LTD (BiSkilled) Tal Shany <tal@biSkilled.com>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+#
+# This file is part of dingDONG
+#
+# dingDong is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# dingDong is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with dingDong.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import io
+import re
+import csv
+import math
+import time
+import six
+import threading
+
+from dingDONG.misc.logger   import p
+from dingDONG.config        import config
+
+# DB API errors of row values, other errors (connection, permission, SQL) fail all rows of the batch
+ROW_ERRORS = ('DataError', 'IntegrityError')
+
+""" INTERNAL USED: Error is caused by row values (DB API DataError, IntegrityError) """
+def _isRowError (error):
+    return any(c.__name__ in ROW_ERRORS for c in type(error).__mro__)
+
+""" Load rows by loadRows(rows), on error rows are split into halves until failed rows are found.
+    Good halves are loaded by bulk load, failed rows are sent to onReject(row, error). Return number of rejected rows.
+    batchError: error of rows load, rows are split without loading all rows again.
+    Load is aborted and error is raised if rejected rows are more than maxRejects or if one row fails by the batch error
+    which is not row values error (lost connection, permission ...) """
+def bisectLoad (rows, loadRows, onReject, maxRejects=None, batchError=None):
+    rejected = [0]
+
+    def load (rowsPart, isLoaded=False):
+        if not isLoaded:
+            try:
+                loadRows(rowsPart)
+                return
+            except Exception as e:
+                if len(rowsPart) == 1:
+                    if batchError is not None and not _isRowError(e) and type(e) is type(batchError) and str(e) == str(batchError):
+                        p("BISECT LOAD-> ROW FAILED BY BATCH ERROR, LOAD IS ABORTED", "e")
+                        raise
+                    rejected[0] += 1
+                    if maxRejects is not None and rejected[0] > maxRejects:
+                        p("BISECT LOAD-> REJECTED ROWS ARE MORE THAN %s, LOAD IS ABORTED" % (str(maxRejects)), "e")
+                        raise
+                    onReject(rowsPart[0], e)
+                    return
+
+        mid = len(rowsPart) // 2
+        load(rowsPart[:mid])
+        load(rowsPart[mid:])
+
+    if len(rows) > 0:
+        load(rows, isLoaded=batchError is not None and len(rows) > 1)
+    return rejected[0]
+
+""" Maximum rejected rows of batch by config.DONG_REJECT_MAX_PCT, None: no limit """
+def getMaxRejects (totalRows):
+    if config.DONG_REJECT_MAX_PCT is None:
+        return None
+    return int(math.ceil(totalRows * config.DONG_REJECT_MAX_PCT / 100.0))
+
+""" REJECT ROWS: Rows failed to load are saved into csv file for each target object (config.DONG_REJECT_DIR or LOGS_DIR)
+    with the error message as last column. Without directory rejected rows are only counted and logged.
+    Files are kept open by object until report / close """
+class rejectSink (object):
+    def __init__ (self, name):
+        self.name   = name
+        self.lock   = threading.Lock()
+        self.files  = {}            # object name: (file name, file, csv writer)
+        self.cnt    = 0
+
+    def add (self, objName, columns, row, error):
+        objName = objName if objName else self.name
+        errMsg  = str(error).replace("\n", " ")
+
+        with self.lock:
+            self.cnt += 1
+            writer = self.__getFile(objName, columns)
+            if not writer:
+                p("REJECTED ROW %s: %s, ERROR: %s" % (str(objName), str(row), errMsg), "e")
+                return
+            writer.writerow(self.__toStr(list(row) + [errMsg]))
+
+    def report (self):
+        self.close()
+        if self.cnt > 0:
+            fileNames = [f[0] for f in self.files.values() if f]
+            p("REJECTED %s ROWS, FILES: %s" % (str(self.cnt), ", ".join(fileNames) if len(fileNames) > 0 else 'NONE'), "w")
+
+    def close (self):
+        with self.lock:
+            for objName in self.files:
+                if self.files[objName] and self.files[objName][1]:
+                    self.files[objName][1].close()
+                    self.files[objName] = (self.files[objName][0], None, None)
+
+    """ INTERNAL USED: Return csv writer of object reject file, file is opened once (append) and header added to new file """
+    def __getFile (self, objName, columns):
+        if objName not in self.files:
+            rejectDir = config.DONG_REJECT_DIR if config.DONG_REJECT_DIR else config.LOGS_DIR
+            if not rejectDir or not os.path.isdir(rejectDir):
+                self.files[objName] = None
+                return None
+            fileName = "%s_%s.reject.csv" % (re.sub(r"[^\w\-.]", "_", str(objName)), time.strftime('%Y%m%d%H%M%S'))
+            self.files[objName] = (os.path.join(rejectDir, fileName), None, None)
+
+        if not self.files[objName]:
+            return None
+
+        fileName, f, writer = self.files[objName]
+        if not f:
+            isNew = not os.path.isfile(fileName)
+            f = io.open(fileName, 'a', encoding='utf-8', newline='') if six.PY3 else open(fileName, 'ab')
+            writer = csv.writer(f)
+            if isNew:
+                writer.writerow(self.__toStr(list(columns) + ['error']))
+            self.files[objName] = (fileName, f, writer)
+        return writer
+
+    def __toStr (self, row):
+        if six.PY3:
+            return ['' if c is None else c for c in row]
+        return ['' if c is None else (c.encode('utf-8') if isinstance(c, six.text_type) else c) for c in row]
@@ -23,11 +23,19 @@ import traceback
 import datetime
 
 from dingDONG.misc.logger import p
+from dingDONG.config import config
 
 class fncBase ():
+    # Pure functions: result depend only on column value, results can be cached
+    isPure = False
+
     def __init__(self,*args, **kargs):
         self.cDate = datetime.datetime.today().strftime('%m/%d/%y %H:%M:%S')
         self.errMsg = None
+        self.isCache    = kargs.get('cache', config.DONG_TRANSFORM_CACHE) and self.isPure
+        self.cache      = {}
+        self.cacheHits  = 0
+        self.cacheMiss  = 0
 
     def handler(self, col, colNum=''):
         try:
@@ -38,10 +46,53 @@ class fncBase ():
             p(err, "e")
             p(traceback.format_exc(),"e")
 
+    """ Run function on all column values, on error values are handled one by one """
+    def columnHandler(self, values, colNum=''):
+        subHandler = self.subHandler
+        try:
+            if self.isCache:
+                return self.__cacheHandler(values)
+            return [subHandler(v) for v in values]
+        except Exception:
+            pass
+        return [self.handler(v, colNum) for v in values]
+
+    """ Results cached by value type and value, cache is bounded by DONG_TRANSFORM_CACHE_SIZE.
+        Cache is disabled if hit rate is lower than DONG_TRANSFORM_CACHE_MIN_HIT after DONG_TRANSFORM_CACHE_SAMPLE values """
+    def __cacheHandler (self, values):
+        subHandler, cache, maxSize = self.subHandler, self.cache, config.DONG_TRANSFORM_CACHE_SIZE
+        ret     = []
+        hits    = 0
+        for v in values:
+            k = (v.__class__, v)
+            if k in cache:
+                ret.append(cache[k])
+                hits += 1
+            else:
+                val = subHandler(v)
+                if len(cache) < maxSize:
+                    cache[k] = val
+                ret.append(val)
+
+        self.cacheHits += hits
+        self.cacheMiss += len(values) - hits
+        cntTotal = self.cacheHits + self.cacheMiss
+        if cntTotal >= config.DONG_TRANSFORM_CACHE_SAMPLE and float(self.cacheHits) / cntTotal < config.DONG_TRANSFORM_CACHE_MIN_HIT:
+            self.isCache    = False
+            self.cache      = {}
+        return ret
+
+    def cacheReport (self, colNum=''):
+        cntTotal = self.cacheHits + self.cacheMiss
+        if cntTotal > 0:
+            p("TRANSFORM CACHE %s, COLUMN %s: HITS %s, MISSES %s, HIT RATE %s%%%s" % (self.__class__.__name__, str(colNum), str(self.cacheHits), str(self.cacheMiss), str(round(100.0 * self.cacheHits / cntTotal, 1)), '' if self.isCache else ', DISABLED'), "i")
+
     def subHandler (self,col):
         pass
 
 class fDCast(fncBase):
+    isPure = True
+
     def __init__(self, *args, **kargs):
         fncBase.__init__(self, *args, **kargs)
         self.errMsg = "fDCast fn error"
@@ -67,6 +118,8 @@ class fDCast(fncBase):
         return None if yy == "9999" else u"%s/%s/%s" % (mm, dd, yy)
 
 class fDTCast(fncBase):
+    isPure = True
+
     def __init__(self, *args, **kargs):
         fncBase.__init__(self, *args, **kargs)
         self.errMsg = "fDTCast fn error"
@@ -107,6 +160,8 @@ class fDTCast(fncBase):
         return None if yy == "0000" or yy=="9999" else "%s/%s/%s %s:%s:%s" % (mm, dd, yy, hh,min,ss)
 
 class fDFile(fncBase):
+    isPure = True
+
     def __init__(self, *args, **kargs):
         fncBase.__init__(self, *args, **kargs)
         self.errMsg = "fDFile fn error"
@@ -142,6 +197,8 @@ class fDCurr(fncBase):
          return self.cDate
 
 class fTCast(fncBase):
+    isPure = True
+
     def __init__(self, *args, **kargs):
         fncBase.__init__(self, *args, **kargs)
         self.errMsg = "fTCast fn error"
@@ -155,6 +212,8 @@ class fTCast(fncBase):
         return  "23:59:29" if "24" in hh else "%s:%s:%s" % (hh, mm, ss)
 
 class fR(fncBase):
+    isPure = True
+
     def __init__(self, *args, **kargs):
         fncBase.__init__(self, *args, **kargs)
         self.errMsg = "fR fn error"
@@ -167,6 +226,8 @@ class fR(fncBase):
         return col
 
 class fNull(fncBase):
+    isPure = True
+
     def __init__(self, *args, **kargs):
         fncBase.__init__(self, *args, **kargs)
         self.errMsg = "fNull fn error"
@@ -178,6 +239,8 @@ class fNull(fncBase):
         return col
 
 class fClob(fncBase):
+    isPure = True
+
     def __init__(self, *args, **kargs):
         fncBase.__init__(self, *args, **kargs)
         self.errMsg = "fClob fn error"
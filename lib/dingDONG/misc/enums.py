@@ -57,6 +57,7 @@ class eConn (object):
         COLUMN_FRAME = 'cf'
         SP = 'sp'
         UPDATABLE = 'up'
+        PARAM_STYLE = 'ps'
 
         FILE_MIN_SIZE = 'min'
         FILE_DEF_COLUMN_PREF = 'defCol'
@@ -134,10 +135,12 @@ class eJson (object):
     MAP         = 'map'
     COLUMNS     = 'col'
     INDEX       = 'index'
-    PARTITION   = 'par'           # not inplemented
-    INC         = 'inc'           # not implemented
+    PARTITION   = 'par'
+    INC         = 'inc'
+    BACKFILL    = 'backfill'
     NONO        = 'internal',
     CREATE      = 'create'
+    DEPENDS     = 'depends'
 
     eDict = {
         TARGET: [TARGET, 'target'],  # Target
@@ -152,7 +155,9 @@ class eJson (object):
         INDEX: [INDEX, 'i'],
         PARTITION: [PARTITION, 'partition'],
         INC: [INC, 'incremental'],
-        CREATE:[CREATE,'c']
+        BACKFILL: [BACKFILL, 'bf'],
+        CREATE:[CREATE,'c'],
+        DEPENDS:[DEPENDS, 'dependson', 'depend']
     }
 
     class stt(object):
@@ -171,6 +176,41 @@ class eJson (object):
         MERGE   = 'merge_keys'
         DIC     = {SOURCE:None, TARGET:None, MERGE:None}
 
+    class partition(object):
+        COLUMN  = 'column'
+        PARTS   = 'parts'
+        RANGES  = 'ranges'
+
+        eDict = {
+            COLUMN: [COLUMN, 'col', 'c'],
+            PARTS:  [PARTS, 'p', 'num'],
+            RANGES: [RANGES, 'r', 'range']
+        }
+
+    class inc(object):
+        COLUMN  = 'column'
+
+        eDict = {
+            COLUMN: [COLUMN, 'col', 'c']
+        }
+
+    class backfill(object):
+        COLUMN      = 'column'
+        RESOLUTION  = 'resolution'
+        START       = 'start'
+        PERIODS     = 'periods'
+        RERUN       = 'rerun'
+        WINDOW      = 'window'      # internal: [from, to] window of backfill node
+        NODE        = 'node'        # internal: backfill node key
+
+        eDict = {
+            COLUMN:     [COLUMN, 'col', 'c'],
+            RESOLUTION: [RESOLUTION, 'res', 'r'],
+            START:      [START, 'startdate', 's'],
+            PERIODS:    [PERIODS, 'p', 'num'],
+            RERUN:      [RERUN, 'force']
+        }
+
     class index(object):
         COLUMNS = 'c'
         CLUSTER = 'ic'
@@ -187,4 +227,27 @@ class eObj (object):
     DB_QUERY        = 'query'
 
     FILE_FOLDER     = 'folder'
-    FILE_FULL_PATH  = 'fullFileName'
\ No newline at end of file
+    FILE_FULL_PATH  = 'fullFileName'
+
+class eState (object):
+    WATERMARK   = 'watermark'
+    WINDOW      = 'window'
+
+    WINDOW_RUNNING  = 'RUNNING'
+    WINDOW_OK       = 'OK'
+
+    NODE        = 'node'
+    CHECKPOINT  = 'checkpoint'
+
+    NODE_RUNNING    = 'RUNNING'
+    NODE_OK         = 'OK'
+    NODE_FAILED     = 'FAILED'
+
+class eResolution (object):
+    DAY     = 'day'
+    WEEK    = 'week'
+    MONTH   = 'month'
+
+class eParallel (object):
+    THREAD  = 'thread'
+    PROCESS = 'process'
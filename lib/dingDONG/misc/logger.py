@@ -19,6 +19,7 @@ import time
 import logging
 import inspect
 import os
+import threading
 
 from dingDONG.config import config
 
@@ -34,6 +35,22 @@ class __myLogger (object):
         def filter(self, logRecord):
             return logRecord.levelno <= self.__level
 
+    ## Hold records of buffered threads instead of sending them to handlers
+    class __bufferFilter(object):
+        def __init__(self):
+            self.buffers = {}
+
+        def filter(self, logRecord):
+            if not getattr(logRecord, 'isBuffered', False) and logRecord.thread in self.buffers:
+                # Make record picklable, can be sent back from worker process
+                logRecord.msg   = logRecord.getMessage()
+                logRecord.args  = None
+                logRecord.exc_info = None
+                logRecord.isBuffered = True
+                self.buffers[logRecord.thread].append (logRecord)
+                return False
+            return True
+
     def __init__ (self, loggLevel=logging.DEBUG, logFormat='%(asctime)s %(levelname)s %(message)s' ):
         dateFormat          = '%Y-%m-%d %H:%M:%S'
         self.logFormatter   = logging.Formatter(logFormat, dateFormat)
@@ -45,6 +62,8 @@ class __myLogger (object):
         self.logTmpFileWar  = None
         self.logDir         = config.LOGS_DIR
         self.logg =  logging.getLogger(__name__)
+        self.bufferFilter   = self.__bufferFilter()
+        self.logg.addFilter(self.bufferFilter)
 
         if config.LOGS_DIR and os.path.isdir(config.LOGS_DIR):
             self.setLogsFiles(logDir=config.LOGS_DIR)
@@ -129,6 +148,20 @@ class __myLogger (object):
         ## Delete OLD log file
         self.deleteLogFiles()
 
+    """ Start buffering all log records of current thread (used by parallel workers) """
+    def startBuffer (self):
+        self.bufferFilter.buffers[threading.current_thread().ident] = []
+
+    """ Stop buffering current thread and return all buffered log records """
+    def stopBuffer (self):
+        return self.bufferFilter.buffers.pop(threading.current_thread().ident, [])
+
+    """ Send buffered log records to all handlers """
+    def flushRecords (self, records):
+        if records:
+            for record in records:
+                self.logg.handle(record)
+
     def getLogg (self):
         return self.logg
 
@@ -0,0 +1,101 @@
+# Copyright (c) 2017-2021, BPMK LTD (BiSkilled) Tal Shany <tal@biSkilled.com>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+#
+# This file is part of dingDONG
+#
+# dingDong is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# dingDong is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with dingDong.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from dingDONG.conn.connDB import connDb, _splitOrderBy
+
+class testConnDbFilter (unittest.TestCase):
+    def setUp (self):
+        self.folder = tempfile.mkdtemp()
+        self.dbFile = os.path.join(self.folder, 'src.db')
+        conn = sqlite3.connect(self.dbFile)
+        conn.execute('CREATE TABLE a (id int, grp varchar(5))')
+        conn.executemany('INSERT INTO a VALUES (?,?)', [(i, 'g%s' % (i % 3)) for i in range(10)])
+        conn.commit()
+        conn.close()
+        self.conns = []
+
+    def tearDown (self):
+        for conn in self.conns:
+            conn.close()
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def getSource (self, connTbl, connIsSql=None, connFilter=None):
+        conn = connDb(connType='sqlite', connUrl=self.dbFile, connTbl=connTbl, connIsSrc=True, connIsSql=connIsSql, connFilter=connFilter)
+        self.conns.append(conn)
+        return conn
+
+    def fetch (self, conn, sql=None):
+        self.assertTrue(conn.exeSQL(sql=sql if sql else conn.connSql, commit=False))
+        return conn.cursor.fetchall()
+
+    def test_split_order_by (self):
+        self.assertEqual(_splitOrderBy('SELECT * FROM a ORDER BY t.id DESC, grp'), ('SELECT * FROM a', 'ORDER BY t.id DESC, grp'))
+        self.assertEqual(_splitOrderBy('SELECT * FROM a'), ('SELECT * FROM a', None))
+        self.assertEqual(_splitOrderBy('SELECT * FROM a ORDER BY id LIMIT 5'), ('SELECT * FROM a ORDER BY id LIMIT 5', None))
+        self.assertEqual(_splitOrderBy('SELECT * FROM (SELECT * FROM a ORDER BY id) x WHERE id > 1')[1], None)
+
+    def test_table_with_filter (self):
+        src = self.getSource(connTbl='a', connFilter='id < 8')
+        src.addFilter(sqlFilter='id >= 2')
+        self.assertEqual([r[0] for r in self.fetch(src)], list(range(2, 8)))
+
+    def test_query_with_where_and_order_by (self):
+        src = self.getSource(connTbl='SELECT t.id AS idx, t.grp FROM a t WHERE t.id > 3 ORDER BY t.id DESC', connIsSql=True)
+        src.addFilter(sqlFilter='idx < 7')
+        self.assertTrue(src.connSql.endswith('ORDER BY idx DESC'))
+        self.assertEqual([r[0] for r in self.fetch(src)], [6, 5, 4])
+
+    def test_query_with_group_by (self):
+        src = self.getSource(connTbl='SELECT grp, COUNT(*) AS cnt FROM a GROUP BY grp ORDER BY grp', connIsSql=True)
+        src.addFilter(sqlFilter='cnt > 3')
+        self.assertEqual(self.fetch(src), [('g0', 4)])
+
+    def test_query_with_sub_query_where (self):
+        src = self.getSource(connTbl="SELECT id FROM a WHERE id IN (SELECT id FROM a WHERE grp = 'g1')", connIsSql=True)
+        src.addFilter(sqlFilter='id > 1')
+        self.assertEqual([r[0] for r in self.fetch(src)], [4, 7])
+
+    def test_order_by_column_not_selected (self):
+        src = self.getSource(connTbl='SELECT grp FROM a WHERE id < 6 ORDER BY id DESC', connIsSql=True)
+        src.addFilter(sqlFilter="grp <> 'g0'")
+        self.assertEqual([r[0] for r in self.fetch(src)], ['g2', 'g1', 'g2', 'g1'])
+
+    def test_partition_ranges (self):
+        src = self.getSource(connTbl='a')
+        filters = src.getPartitionFilters(column='id', ranges=[[0, 5], [5, None]])
+        self.assertEqual(len(filters), 2)
+        self.assertEqual(sum(len(self.fetch(src, 'SELECT * FROM a WHERE %s' % f)) for f in filters), 10)
+
+    def test_partition_parts_cover_all_rows (self):
+        src = self.getSource(connTbl='a')
+        filters = src.getPartitionFilters(column='id', parts=3)
+        self.assertTrue(filters[-1].endswith('IS NULL'))
+        rows = []
+        for f in filters:
+            rows += [r[0] for r in self.fetch(src, 'SELECT * FROM a WHERE %s' % f)]
+        self.assertEqual(sorted(rows), list(range(10)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+# Copyright (c) 2017-2021, BPMK LTD (BiSkilled) Tal Shany <tal@biSkilled.com>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+#
+# This file is part of dingDONG
+#
+# dingDong is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# dingDong is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with dingDong.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import os
+import sqlite3
+import unittest
+
+from dingDONG.conn.connDBQueries    import setSqlQuery
+from dingDONG.misc.enums            import eConn, eSql
+
+try:
+    import psycopg2
+except ImportError:
+    psycopg2 = None
+
+# PostgreSQL connection string used to execute PostgreSQL merge, test is skipped without it
+PG_URL = os.environ.get('DINGDONG_TEST_PG_URL')
+
+def _getMerge (connType, mergeKeys=('id',), colList=('id', 'name', 'amt'), sqlFilter=None):
+    return setSqlQuery().getSql(conn=connType, sqlType=eSql.MERGE, dstTable='dst', srcTable='src', mergeKeys=list(mergeKeys),
+                                colList=list(colList), colFullList=['id', 'name', 'amt'], sqlFilter=sqlFilter)
+
+class testSqlMerge (unittest.TestCase):
+    def test_sqlite_postgresql_upsert (self):
+        sql = _getMerge(eConn.types.LITE)
+        self.assertEqual(sql, _getMerge(eConn.types.POSTGESQL))
+        self.assertIn("INSERT INTO dst AS t (id,name,amt)", sql)
+        self.assertIn("SELECT id,name,amt FROM src", sql)
+        self.assertIn("WHERE 1=1", sql)
+        self.assertIn("ON CONFLICT (id) DO UPDATE SET", sql)
+        self.assertIn("name = COALESCE(excluded.name, t.name)", sql)
+        self.assertNotIn("id = COALESCE", sql)
+
+    def test_insert_only_upsert (self):
+        self.assertTrue(_getMerge(eConn.types.LITE, colList=()).endswith("ON CONFLICT (id) DO NOTHING"))
+        self.assertIn("ON DUPLICATE KEY UPDATE \nid = COALESCE(VALUES(id), id)", _getMerge(eConn.types.MYSQL, colList=()))
+
+    def test_mysql_upsert (self):
+        sql = _getMerge(eConn.types.MYSQL, sqlFilter="amt > 0")
+        self.assertIn("INSERT INTO dst (id,name,amt)", sql)
+        self.assertIn("WHERE amt > 0", sql)
+        self.assertIn("ON DUPLICATE KEY UPDATE", sql)
+        self.assertIn("amt = COALESCE(VALUES(amt), amt)", sql)
+        self.assertNotIn("ON CONFLICT", sql)
+
+    def test_sql_server_merge (self):
+        sql = _getMerge(eConn.types.SQLSERVER, mergeKeys=('id', 'name'))
+        self.assertTrue(sql.startswith("MERGE INTO dst as t USING src as s ON (t.id = s.id AND t.name = s.name)"))
+
+    def test_sqlite_upsert_execute (self):
+        conn = sqlite3.connect(':memory:')
+        try:
+            conn.execute("CREATE TABLE dst (id int PRIMARY KEY, name varchar(10), amt int)")
+            conn.execute("CREATE TABLE src (id int, name varchar(10), amt int)")
+            conn.executemany("INSERT INTO dst VALUES (?,?,?)", [(1, 'a', 1), (2, 'b', 2)])
+            conn.executemany("INSERT INTO src VALUES (?,?,?)", [(2, None, 20), (3, 'c', 30), (4, 'd', -1)])
+            conn.execute(_getMerge(eConn.types.LITE, sqlFilter="amt > 0"))
+            self.assertEqual(conn.execute("SELECT * FROM dst ORDER BY id").fetchall(), [(1, 'a', 1), (2, 'b', 20), (3, 'c', 30)])
+        finally:
+            conn.close()
+
+    @unittest.skipUnless(psycopg2 and PG_URL, "DINGDONG_TEST_PG_URL is not set")
+    def test_postgresql_upsert_execute (self):
+        conn = psycopg2.connect(PG_URL)
+        try:
+            cursor = conn.cursor()
+            cursor.execute("CREATE TEMP TABLE dst (id int PRIMARY KEY, name varchar(10), amt int)")
+            cursor.execute("CREATE TEMP TABLE src (id int, name varchar(10), amt int)")
+            cursor.execute("INSERT INTO dst VALUES (1, 'a', 1), (2, 'b', 2)")
+            cursor.execute("INSERT INTO src VALUES (2, NULL, 20), (3, 'c', 30), (4, 'd', -1)")
+            cursor.execute(_getMerge(eConn.types.POSTGESQL, sqlFilter="amt > 0"))
+            cursor.execute("SELECT * FROM dst ORDER BY id")
+            self.assertEqual(cursor.fetchall(), [(1, 'a', 1), (2, 'b', 20), (3, 'c', 30)])
+        finally:
+            conn.rollback()
+            conn.close()
+
+if __name__ == '__main__':
+    unittest.main()
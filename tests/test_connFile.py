@@ -0,0 +1,60 @@
+# Copyright (c) 2017-2021, BPMK LTD (BiSkilled) Tal Shany <tal@biSkilled.com>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+#
+# This file is part of dingDONG
+#
+# dingDong is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# dingDong is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with dingDong.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from dingDONG.conn.connFile import connFile
+from dingDONG.misc.enums    import eJson
+
+class testConnFileInferTypes (unittest.TestCase):
+    def setUp (self):
+        self.folder = tempfile.mkdtemp()
+        self.cntFiles = 0
+
+    def tearDown (self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def getTypes (self, lines):
+        self.cntFiles += 1
+        fileName = 'src%s.csv' % self.cntFiles
+        with io.open(os.path.join(self.folder, fileName), 'w', encoding='utf-8') as f:
+            f.write(u"\n".join(lines) + u"\n")
+        src = connFile(folder=self.folder, fileName=fileName, isSrc=True, delimiter=',', header=1, isCsv=True)
+        return [prop[eJson.stt.TYPE] for prop in src.getStructure().values()]
+
+    def test_column_types (self):
+        types = self.getTypes(['id,big,amt,code,dt,name',
+                               '1,1,1.5,007,2020-01-01,ab',
+                               '2,3000000000,-12.25,010,2020-01-02 10:00:00,abcdefghijklm',
+                               '3,4,2.5,011,,x'])
+        self.assertEqual(types, ['int', 'bigint', 'decimal(4,2)', 'varchar(10)', 'datetime', 'varchar(20)'])
+
+    def test_decimal_type_not_depend_on_values_order (self):
+        self.assertEqual(self.getTypes(['amt', '1.5', '2']), self.getTypes(['amt', '2', '1.5']))
+        self.assertEqual(self.getTypes(['amt', '123', '1.5']), ['decimal(4,1)'])
+
+    def test_float_column (self):
+        self.assertEqual(self.getTypes(['f', '1e5', '2.5']), ['float'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+# Copyright (c) 2017-2021, BPMK LTD (BiSkilled) Tal Shany <tal@biSkilled.com>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+#
+# This file is part of dingDONG
+#
+# dingDong is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# dingDong is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with dingDong.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import time
+import unittest
+
+from dingDONG.conn.connPool import connPool, getPoolKey
+
+class stubConnection (object):
+    def __init__ (self, num, failReset=False):
+        self.num        = num
+        self.failReset  = failReset
+        self.isClosed   = False
+        self.cntReset   = 0
+
+    def rollback (self):
+        if self.failReset:
+            raise ValueError("RESET FAILED")
+        self.cntReset += 1
+
+    def close (self):
+        self.isClosed = True
+
+class testConnPool (unittest.TestCase):
+    def setUp (self):
+        self.created = []
+        self.key     = getPoolKey('sqlite', 'db.sqlite')
+
+    def newConn (self, failReset=False):
+        conn = stubConnection(num=len(self.created), failReset=failReset)
+        self.created.append(conn)
+        return conn
+
+    def test_released_connection_is_reused (self):
+        pool = connPool(maxSize=2, idleTimeout=60)
+        conn = pool.get(key=self.key, newConn=self.newConn)
+        pool.release(key=self.key, connDB=conn, reset=lambda c: c.rollback())
+
+        self.assertIs(pool.get(key=self.key, newConn=self.newConn), conn)
+        self.assertEqual(conn.cntReset, 1)
+        self.assertEqual((pool.cntNew, pool.cntReuse), (1, 1))
+
+    def test_borrowed_connection_is_not_shared (self):
+        pool = connPool(maxSize=2, idleTimeout=60)
+        conn1 = pool.get(key=self.key, newConn=self.newConn)
+        conn2 = pool.get(key=self.key, newConn=self.newConn)
+        self.assertIsNot(conn1, conn2)
+
+    def test_pool_key_separate_connections (self):
+        pool = connPool(maxSize=2, idleTimeout=60)
+        pool.release(key=self.key, connDB=self.newConn())
+        conn = pool.get(key=getPoolKey('sqlite', 'other.sqlite'), newConn=self.newConn)
+        self.assertEqual(conn.num, 1)
+
+    def test_pool_key_of_dictionary_url (self):
+        self.assertEqual(getPoolKey('mysql', {'host': 'h', 'user': 'u'}), getPoolKey('mysql', {'user': 'u', 'host': 'h'}))
+        self.assertNotEqual(getPoolKey('mysql', {'host': 'h'}), getPoolKey('mysql', {'host': 'h2'}))
+
+    def test_connection_above_max_size_is_closed (self):
+        pool = connPool(maxSize=1, idleTimeout=60)
+        conn1, conn2 = self.newConn(), self.newConn()
+        pool.release(key=self.key, connDB=conn1)
+        pool.release(key=self.key, connDB=conn2)
+        self.assertFalse(conn1.isClosed)
+        self.assertTrue(conn2.isClosed)
+
+    def test_not_alive_connection_is_replaced (self):
+        pool = connPool(maxSize=2, idleTimeout=60)
+        conn = self.newConn()
+        pool.release(key=self.key, connDB=conn)
+        newConn = pool.get(key=self.key, newConn=self.newConn, isAlive=lambda c: False)
+        self.assertIsNot(newConn, conn)
+        self.assertTrue(conn.isClosed)
+
+    def test_failed_reset_closes_connection (self):
+        pool = connPool(maxSize=2, idleTimeout=60)
+        conn = self.newConn(failReset=True)
+        pool.release(key=self.key, connDB=conn, reset=lambda c: c.rollback())
+        self.assertTrue(conn.isClosed)
+        self.assertIsNot(pool.get(key=self.key, newConn=self.newConn), conn)
+
+    def test_idle_timeout (self):
+        pool = connPool(maxSize=2, idleTimeout=0.1)
+        conn = self.newConn()
+        pool.release(key=self.key, connDB=conn)
+        time.sleep(0.2)
+        self.assertIsNot(pool.get(key=self.key, newConn=self.newConn), conn)
+        self.assertTrue(conn.isClosed)
+
+    def test_close_all (self):
+        pool = connPool(maxSize=2, idleTimeout=60)
+        conns = [self.newConn(), self.newConn()]
+        for conn in conns:
+            pool.release(key=self.key, connDB=conn)
+        pool.closeAll()
+        self.assertTrue(all(c.isClosed for c in conns))
+        self.assertEqual(pool.idle, {})
+
+    def test_child_process_does_not_reuse_parent_connections (self):
+        pool = connPool(maxSize=2, idleTimeout=60)
+        pool.release(key=self.key, connDB=self.newConn())
+        pool.pid = -1
+        self.assertEqual(pool.get(key=self.key, newConn=self.newConn).num, 1)
+
+if __name__ == '__main__':
+    unittest.main()
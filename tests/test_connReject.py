@@ -0,0 +1,149 @@
+# Copyright (c) 2017-2021, BPMK LTD (BiSkilled) Tal Shany <tal@biSkilled.com>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+#
+# This file is part of dingDONG
+#
+# dingDong is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# dingDong is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with dingDong.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import io
+import os
+import csv
+import shutil
+import tempfile
+import unittest
+
+from dingDONG.conn.connReject   import bisectLoad, getMaxRejects, rejectSink
+from dingDONG.config            import config
+
+class DataError (Exception):
+    pass
+
+class OperationalError (Exception):
+    pass
+
+""" loadRows stub: batch with bad row fails, good batches are kept """
+class stubLoader (object):
+    def __init__ (self, badRows=(), error=DataError):
+        self.badRows    = set(badRows)
+        self.error      = error
+        self.loaded     = []
+        self.sizes      = []
+        self.cntCalls   = 0
+
+    def __call__ (self, rows):
+        self.cntCalls += 1
+        self.sizes.append(len(rows))
+        bad = [r[0] for r in rows if r[0] in self.badRows]
+        if len(bad) > 0:
+            raise self.error("BAD VALUE %s" % bad[0])
+        self.loaded += [r[0] for r in rows]
+
+class testBisectLoad (unittest.TestCase):
+    def setUp (self):
+        self.rows   = [[i, 'v%s' % i] for i in range(100)]
+        self.rejects= []
+
+    def onReject (self, row, error):
+        self.rejects.append((row[0], str(error)))
+
+    def test_good_rows_loaded_once (self):
+        loader = stubLoader()
+        self.assertEqual(bisectLoad(rows=self.rows, loadRows=loader, onReject=self.onReject), 0)
+        self.assertEqual(loader.loaded, list(range(100)))
+        self.assertEqual(loader.cntCalls, 1)
+
+    def test_failed_rows_rejected (self):
+        loader = stubLoader(badRows=(7, 61))
+        self.assertEqual(bisectLoad(rows=self.rows, loadRows=loader, onReject=self.onReject), 2)
+        self.assertEqual(sorted(loader.loaded), [i for i in range(100) if i not in (7, 61)])
+        self.assertEqual(self.rejects, [(7, 'BAD VALUE 7'), (61, 'BAD VALUE 61')])
+        self.assertLess(loader.cntCalls, 30)
+
+    def test_batch_error_is_not_loaded_again (self):
+        loader = stubLoader(badRows=(7,))
+        bisectLoad(rows=self.rows, loadRows=loader, onReject=self.onReject, batchError=DataError("BAD VALUE 7"))
+        self.assertEqual(len(loader.loaded), 99)
+        self.assertNotIn(100, loader.sizes)
+
+    def test_abort_above_max_rejects (self):
+        loader = stubLoader(badRows=range(0, 100, 10))
+        with self.assertRaises(DataError):
+            bisectLoad(rows=self.rows, loadRows=loader, onReject=self.onReject, maxRejects=3)
+        self.assertEqual(len(self.rejects), 3)
+
+    def test_abort_when_row_fails_by_batch_error (self):
+        loader = stubLoader(badRows=range(100), error=lambda msg: OperationalError("CONNECTION LOST"))
+        with self.assertRaises(OperationalError):
+            bisectLoad(rows=self.rows, loadRows=loader, onReject=self.onReject, batchError=OperationalError("CONNECTION LOST"))
+        self.assertEqual(self.rejects, [])
+
+    def test_row_error_same_as_batch_error_is_rejected (self):
+        loader = stubLoader(badRows=(5,), error=lambda msg: DataError("BAD VALUE"))
+        bisectLoad(rows=self.rows[:10], loadRows=loader, onReject=self.onReject, batchError=DataError("BAD VALUE"))
+        self.assertEqual(self.rejects, [(5, 'BAD VALUE')])
+
+    def test_max_rejects_by_batch_size (self):
+        maxPct = config.DONG_REJECT_MAX_PCT
+        try:
+            config.DONG_REJECT_MAX_PCT = 1
+            self.assertEqual(getMaxRejects(1000), 10)
+            self.assertEqual(getMaxRejects(10), 1)
+            config.DONG_REJECT_MAX_PCT = None
+            self.assertIsNone(getMaxRejects(1000))
+        finally:
+            config.DONG_REJECT_MAX_PCT = maxPct
+
+class testRejectSink (unittest.TestCase):
+    def setUp (self):
+        self.folder     = tempfile.mkdtemp()
+        self.rejectDir  = config.DONG_REJECT_DIR
+        config.DONG_REJECT_DIR = self.folder
+
+    def tearDown (self):
+        config.DONG_REJECT_DIR = self.rejectDir
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def test_rows_written_to_one_file_by_object (self):
+        sink = rejectSink(name='tbl')
+        sink.add(objName=None, columns=['id', 'name'], row=[1, None], error=DataError("BAD\nVALUE"))
+        sink.add(objName=None, columns=['id', 'name'], row=[2, 'b'], error=DataError("BAD"))
+        sink.add(objName='other', columns=['id'], row=[3], error=DataError("BAD"))
+        fileName = sink.files['tbl'][0]
+        sink.report()
+
+        self.assertEqual(sink.cnt, 3)
+        self.assertEqual(len(os.listdir(self.folder)), 2)
+        with io.open(fileName, 'r', encoding='utf-8', newline='') as f:
+            self.assertEqual(list(csv.reader(f)), [['id', 'name', 'error'], ['1', '', 'BAD VALUE'], ['2', 'b', 'BAD']])
+
+    def test_file_kept_open_until_close (self):
+        sink = rejectSink(name='tbl')
+        sink.add(objName=None, columns=['id'], row=[1], error=DataError("BAD"))
+        f = sink.files['tbl'][1]
+        sink.add(objName=None, columns=['id'], row=[2], error=DataError("BAD"))
+        self.assertIs(sink.files['tbl'][1], f)
+        sink.close()
+        self.assertTrue(f.closed)
+
+    def test_without_directory_rows_are_counted (self):
+        config.DONG_REJECT_DIR = os.path.join(self.folder, 'missing')
+        sink = rejectSink(name='tbl')
+        sink.add(objName=None, columns=['id'], row=[1], error=DataError("BAD"))
+        sink.report()
+        self.assertEqual(sink.cnt, 1)
+        self.assertIsNone(sink.files['tbl'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+# Copyright (c) 2017-2021, BPMK LTD (BiSkilled) Tal Shany <tal@biSkilled.com>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+#
+# This file is part of dingDONG
+#
+# dingDong is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# dingDong is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with dingDong.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from dingDONG                   import dingDONG, Config
+from dingDONG.conn.connDB       import connDb
+from dingDONG.conn.connPool     import CONN_POOL
+
+CONFIG_PROPS = ('CONNECTIONS', 'DONG_STATE_FILE', 'DONG_JOURNAL_FILE', 'DONG_ADAPTIVE_BATCH', 'DONG_BATCH_START_ROWS',
+                'DONG_BATCH_MIN_ROWS', 'DONG_BATCH_TARGET_SEC', 'DONG_PUSHDOWN')
+
+""" End to end dong between two SQLite databases, state and journal files are in temporary folder """
+class testDongSqlite (unittest.TestCase):
+    def setUp (self):
+        self.config = {k: getattr(Config, k) for k in CONFIG_PROPS}
+        self.folder = tempfile.mkdtemp()
+        self.srcFile= os.path.join(self.folder, 'src.db')
+        self.tarFile= os.path.join(self.folder, 'tar.db')
+
+        Config.CONNECTIONS      = {'src': {'type': 'sqlite', 'url': self.srcFile}, 'tar': {'type': 'sqlite', 'url': self.tarFile}}
+        Config.DONG_STATE_FILE  = os.path.join(self.folder, 'state.json')
+        Config.DONG_JOURNAL_FILE= os.path.join(self.folder, 'journal.json')
+
+        self.src = sqlite3.connect(self.srcFile)
+        self.src.execute('CREATE TABLE a (id int, name varchar(20), val int)')
+        self.addRows(0, 100)
+        self.tar = sqlite3.connect(self.tarFile)
+
+    def tearDown (self):
+        self.src.close()
+        self.tar.close()
+        CONN_POOL.closeAll()
+        for k in self.config:
+            setattr(Config, k, self.config[k])
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def addRows (self, fromId, toId):
+        self.src.executemany('INSERT INTO a VALUES (?,?,?)', [(i, 'n%s' % i if i % 10 else None, i) for i in range(fromId, toId)])
+        self.src.commit()
+
+    def fetch (self, sql):
+        return self.tar.execute(sql).fetchall()
+
+    def test_merge (self):
+        self.tar.execute('CREATE TABLE m (id int, name varchar(20), val int)')
+        self.tar.executemany('INSERT INTO m VALUES (?,?,?)', [(i, 'old%s' % i, -1) for i in range(0, 150, 2)])
+        self.tar.commit()
+
+        dd = dingDONG(dicObj=[{'source': ['src', 'a'], 'target': ['tar', 'b'], 'merge': ['m', 'id']}], processes=1)
+        dd.ding()
+        dd.dong()
+        self.assertEqual(self.fetch('SELECT COUNT(*), COUNT(DISTINCT id), SUM(val=-1), SUM(name LIKE "old%") FROM m'), [(125, 125, 25, 35)])
+        self.assertEqual(self.fetch('SELECT * FROM m WHERE id IN (10, 11, 148) ORDER BY id'), [(10, 'old10', 10), (11, 'n11', 11), (148, 'old148', -1)])
+
+        dd.dong()
+        self.assertEqual(self.fetch('SELECT COUNT(*), COUNT(DISTINCT id) FROM m'), [(125, 125)])
+
+    def test_incremental (self):
+        dd = dingDONG(dicObj=[{'source': ['src', 'a'], 'target': ['tar', 'b'], 'inc': 'id'}], processes=1)
+        dd.ding()
+        dd.dong()
+        self.assertEqual(self.fetch('SELECT COUNT(*), MAX(id) FROM b'), [(100, 99)])
+
+        self.addRows(100, 150)
+        dd.dong()
+        self.assertEqual(self.fetch('SELECT COUNT(*), COUNT(DISTINCT id), MAX(id) FROM b'), [(150, 150, 149)])
+
+        dd.dong()
+        self.assertEqual(self.fetch('SELECT COUNT(*) FROM b'), [(150,)])
+
+    def test_resume (self):
+        self.addRows(100, 1000)
+        self.tar.execute('CREATE TABLE b (id int, name varchar(20))')
+        self.tar.execute('CREATE TABLE c (id int, name varchar(20))')
+        self.tar.commit()
+
+        Config.DONG_ADAPTIVE_BATCH  = True
+        Config.DONG_BATCH_START_ROWS= 100
+        Config.DONG_BATCH_MIN_ROWS  = 100
+        Config.DONG_BATCH_TARGET_SEC= 0.000001
+        Config.DONG_PUSHDOWN        = False
+
+        nodes = [{'query': ['src', 'SELECT id, name FROM a ORDER BY id'], 'target': ['tar', 'b']},
+                 {'source': ['src', 'a'], 'target': ['tar', 'c']}]
+        dd = dingDONG(dicObj=nodes, processes=1)
+
+        # Fourth batch of ordered query fails, first three batches are committed
+        load, calls = connDb.load, [0]
+        def failLoad (conn, rows, targetColumn, objectName=None):
+            if conn.connTbl == 'b':
+                calls[0] += 1
+                if calls[0] == 4:
+                    raise RuntimeError("LOAD FAILED")
+            return load(conn, rows, targetColumn, objectName)
+
+        connDb.load = failLoad
+        try:
+            dd.dong()
+        finally:
+            connDb.load = load
+        self.assertEqual(self.fetch('SELECT COUNT(*) FROM b'), [(300,)])
+        self.assertEqual(self.fetch('SELECT COUNT(*) FROM c'), [(1000,)])
+
+        # Resume load rows after last committed key, done node is not loaded again
+        self.tar.execute('INSERT INTO c VALUES (-1, "x")')
+        self.tar.commit()
+        dd.dong(resume=True)
+        self.assertEqual(self.fetch('SELECT COUNT(*), COUNT(DISTINCT id) FROM b'), [(1000, 1000)])
+        self.assertEqual(self.fetch('SELECT COUNT(*) FROM c'), [(1001,)])
+
+        dd.dong()
+        self.assertEqual(self.fetch('SELECT COUNT(*) FROM c'), [(1000,)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+# Copyright (c) 2017-2021, BPMK LTD (BiSkilled) Tal Shany <tal@biSkilled.com>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+#
+# This file is part of dingDONG
+#
+# dingDong is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# dingDong is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with dingDong.  If not, see <http://www.gnu.org/licenses/>.
+
+import threading
+import unittest
+
+from dingDONG.bl.ddPipeline import pipelineLoader
+from dingDONG.misc.enums    import eConn
+
+""" Target connector stub: keep loaded batches, fail batch which first value is failOn """
+class stubTarget (object):
+    def __init__ (self, connType='stub', failOn=None, wait=None):
+        self.connType   = connType
+        self.failOn     = failOn
+        self.wait       = wait
+        self.batches    = []
+        self.threads    = set([])
+        self.lock       = threading.Lock()
+
+    def load (self, rows, targetColumn, objectName=None):
+        if self.wait:
+            self.wait.wait(5)
+        if self.failOn is not None and rows[0][0] == self.failOn:
+            raise ValueError("LOAD FAILED")
+        with self.lock:
+            self.batches.append((list(rows), list(targetColumn), objectName))
+            self.threads.add(threading.current_thread().name)
+
+    def connect (self):
+        pass
+
+    def close (self):
+        pass
+
+class testPipelineLoader (unittest.TestCase):
+    def test_batches_loaded_in_order_by_writer_thread (self):
+        tar = stubTarget()
+        loader = pipelineLoader(tar=tar, queueSize=2, writers=1)
+        for i in range(10):
+            loader.load(rows=[[i, 'v%s' % i]], targetColumn=['id', 'name'])
+        loader.close()
+
+        self.assertEqual([b[0][0][0] for b in tar.batches], list(range(10)))
+        self.assertEqual(tar.batches[0][1], ['id', 'name'])
+        self.assertNotIn(threading.current_thread().name, tar.threads)
+
+    def test_object_name_passed_to_target (self):
+        tar = stubTarget()
+        loader = pipelineLoader(tar=tar, writers=1)
+        loader.load(rows=[[1]], targetColumn=['id'], objectName='tbl')
+        loader.close()
+        self.assertEqual(tar.batches[0][2], 'tbl')
+
+    def test_writers_load_all_batches (self):
+        tar = stubTarget()
+        loader = pipelineLoader(tar=tar, queueSize=4, writers=3)
+        for i in range(30):
+            loader.load(rows=[[i]], targetColumn=['id'])
+        loader.close()
+        self.assertEqual(sorted(b[0][0][0] for b in tar.batches), list(range(30)))
+
+    def test_one_writer_for_sqlite_target (self):
+        loader = pipelineLoader(tar=stubTarget(connType=eConn.types.LITE), writers=3)
+        loader.close()
+        self.assertEqual(loader.writers, 1)
+
+    def test_writer_error_raised_on_close (self):
+        tar = stubTarget(failOn=3)
+        loader = pipelineLoader(tar=tar, writers=1)
+        for i in range(5):
+            loader.load(rows=[[i]], targetColumn=['id'])
+        with self.assertRaises(ValueError):
+            loader.close()
+        self.assertNotIn(4, [b[0][0][0] for b in tar.batches])
+
+    def test_load_blocks_when_queue_is_full (self):
+        wait = threading.Event()
+        loader = pipelineLoader(tar=stubTarget(wait=wait), queueSize=1, writers=1)
+
+        def reader ():
+            for i in range(5):
+                loader.load(rows=[[i]], targetColumn=['id'])
+
+        thread = threading.Thread(target=reader)
+        thread.start()
+        thread.join(0.3)
+        self.assertTrue(thread.is_alive())
+
+        wait.set()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        loader.close()
+
+if __name__ == '__main__':
+    unittest.main()
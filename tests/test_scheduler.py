@@ -0,0 +1,152 @@
+# Copyright (c) 2017-2021, BPMK LTD (BiSkilled) Tal Shany <tal@biSkilled.com>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+#
+# This file is part of dingDONG
+#
+# dingDong is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# dingDong is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with dingDong.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import threading
+import time
+import unittest
+
+from dingDONG.bl.ddScheduler import dongScheduler, nodeProp, getNodesDependencies, _isSameBackfill
+from dingDONG.misc.enums      import eJson, eConn
+
+def _node (src, tar, connType='db', depends=None):
+    jMap = {eJson.SOURCE: {eConn.props.TYPE: connType, eConn.props.TBL: src},
+            eJson.TARGET: {eConn.props.TYPE: connType, eConn.props.TBL: tar}}
+    if depends:
+        jMap[eJson.DEPENDS] = depends
+    return jMap
+
+""" Node executer: sleep, fail when asked and keep the order nodes were executed """
+class nodeRecorder (object):
+    def __init__ (self):
+        self.done   = []
+        self.lock   = threading.Lock()
+
+    def __call__ (self, nodeName, sleep=0, fail=False):
+        time.sleep(sleep)
+        if fail:
+            raise ValueError("NODE %s FAILED" % nodeName)
+        with self.lock:
+            self.done.append(nodeName)
+
+class testDongScheduler (unittest.TestCase):
+    def test_all_nodes_executed (self):
+        execNode = nodeRecorder()
+        processList = [("n%s" % i, ("n%s" % i, 0.01)) for i in range(6)]
+        results = dongScheduler(processes=3, raiseOnError=False).execute(processList=processList, execFunc=execNode)
+
+        self.assertEqual(sorted(execNode.done), sorted(results.keys()))
+        self.assertEqual([results[n][nodeProp.NUM] for n in results], list(range(1, 7)))
+        self.assertTrue(all(results[n][nodeProp.STATUS] == nodeProp.STATUS_OK for n in results))
+        self.assertTrue(all(results[n][nodeProp.TIME] is not None for n in results))
+
+    def test_workers_run_in_parallel (self):
+        processList = [("n%s" % i, ("n%s" % i, 0.3)) for i in range(4)]
+        start = time.time()
+        dongScheduler(processes=4, raiseOnError=False).execute(processList=processList, execFunc=nodeRecorder())
+        self.assertLess(time.time() - start, 1.0)
+
+    def test_failed_node_does_not_stop_others (self):
+        execNode = nodeRecorder()
+        processList = [("ok1", ("ok1",)), ("bad", ("bad", 0, True)), ("ok2", ("ok2",))]
+        results = dongScheduler(processes=2, raiseOnError=False).execute(processList=processList, execFunc=execNode)
+
+        self.assertEqual(sorted(execNode.done), ["ok1", "ok2"])
+        self.assertEqual(results["bad"][nodeProp.STATUS], nodeProp.STATUS_FAILED)
+        self.assertIn("NODE bad FAILED", results["bad"][nodeProp.ERROR])
+
+    def test_raise_on_error (self):
+        processList = [("ok", ("ok",)), ("bad", ("bad", 0, True))]
+        with self.assertRaises(ValueError):
+            dongScheduler(processes=1, raiseOnError=True).execute(processList=processList, execFunc=nodeRecorder())
+
+    def test_empty_process_list (self):
+        self.assertEqual(len(dongScheduler(processes=2).execute(processList=[], execFunc=nodeRecorder())), 0)
+
+    def test_node_waits_for_dependencies (self):
+        execNode = nodeRecorder()
+        processList = [("load", ("load", 0.2)), ("other", ("other",)), ("report", ("report",))]
+        depends = {"report": ["load"]}
+        dongScheduler(processes=3, raiseOnError=False).execute(processList=processList, execFunc=execNode, depends=depends)
+        self.assertLess(execNode.done.index("load"), execNode.done.index("report"))
+        self.assertEqual(execNode.done[0], "other")
+
+    def test_failed_dependency_skips_node (self):
+        execNode = nodeRecorder()
+        processList = [("bad", ("bad", 0, True)), ("child", ("child",)), ("grandChild", ("grandChild",)), ("ok", ("ok",))]
+        depends = {"child": ["bad"], "grandChild": ["child"]}
+        results = dongScheduler(processes=2, raiseOnError=False).execute(processList=processList, execFunc=execNode, depends=depends)
+
+        self.assertEqual(execNode.done, ["ok"])
+        self.assertEqual(results["child"][nodeProp.STATUS], nodeProp.STATUS_SKIPPED)
+        self.assertEqual(results["grandChild"][nodeProp.STATUS], nodeProp.STATUS_SKIPPED)
+
+    def test_circular_dependency_fails_nodes (self):
+        processList = [("a", ("a",)), ("b", ("b",))]
+        results = dongScheduler(processes=2, raiseOnError=False).execute(processList=processList, execFunc=nodeRecorder(), depends={"a": ["b"], "b": ["a"]})
+        self.assertEqual([results[n][nodeProp.STATUS] for n in results], [nodeProp.STATUS_FAILED] * 2)
+
+class testNodesDependencies (unittest.TestCase):
+    def test_target_read_by_later_node (self):
+        nodeList = [("n1", _node("src", "stg")), ("n2", _node("stg", "dwh")), ("n3", _node("other", "tbl"))]
+        self.assertEqual(getNodesDependencies(nodeList), {"n1": [], "n2": ["n1"], "n3": []})
+
+    def test_same_target_keep_list_order (self):
+        nodeList = [("n1", _node("a", "tbl")), ("n2", _node("b", "tbl"))]
+        self.assertEqual(getNodesDependencies(nodeList)["n2"], ["n1"])
+
+    def test_source_overwritten_by_later_node (self):
+        nodeList = [("n1", _node("tbl", "a")), ("n2", _node("b", "tbl"))]
+        self.assertEqual(getNodesDependencies(nodeList)["n2"], ["n1"])
+
+    def test_schema_and_brackets_ignored (self):
+        nodeList = [("n1", _node("src", "dbo.[stg]")), ("n2", _node("STG", "dwh"))]
+        self.assertEqual(getNodesDependencies(nodeList)["n2"], ["n1"])
+
+    def test_different_connections_are_independent (self):
+        nodeList = [("n1", _node("src", "stg", connType="db1")), ("n2", _node("stg", "dwh", connType="db2"))]
+        self.assertEqual(getNodesDependencies(nodeList)["n2"], [])
+
+    def test_explicit_depends (self):
+        nodeList = [("n1", _node("a", "b", depends="dwh")), ("n2", _node("src", "dwh")), ("n3", _node("c", "d", depends="missing"))]
+        dep = getNodesDependencies(nodeList)
+        self.assertEqual(dep["n1"], ["n2"])
+        self.assertEqual(dep["n3"], [])
+
+    def test_backfill_windows_of_same_node_are_independent (self):
+        windows = [_node("src", "tbl") for i in range(3)]
+        for i, jMap in enumerate(windows):
+            jMap[eJson.BACKFILL] = {eJson.backfill.NODE: "db:src>db:tbl", eJson.backfill.WINDOW: [i, i + 1]}
+        nodeList = [("w%s" % i, jMap) for i, jMap in enumerate(windows)] + [("n", _node("tbl", "dwh"))]
+        dep = getNodesDependencies(nodeList)
+
+        self.assertTrue(_isSameBackfill(windows[0], windows[1]))
+        self.assertEqual(dep["w1"], [])
+        self.assertEqual(dep["w2"], [])
+        self.assertEqual(dep["n"], ["w0", "w1", "w2"])
+
+    def test_backfill_of_other_node_is_not_same (self):
+        jMap1, jMap2 = _node("a", "tbl"), _node("b", "tbl")
+        jMap1[eJson.BACKFILL] = {eJson.backfill.NODE: "db:a>db:tbl"}
+        jMap2[eJson.BACKFILL] = {eJson.backfill.NODE: "db:b>db:tbl"}
+        self.assertFalse(_isSameBackfill(jMap1, jMap2))
+        self.assertFalse(_isSameBackfill(jMap1, _node("a", "tbl")))
+        self.assertEqual(getNodesDependencies([("n1", jMap1), ("n2", jMap2)])["n2"], ["n1"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+# Copyright (c) 2017-2021, BPMK LTD (BiSkilled) Tal Shany <tal@biSkilled.com>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+#
+# This file is part of dingDONG
+#
+# dingDong is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# dingDong is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with dingDong.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import os
+import json
+import shutil
+import datetime
+import decimal
+import tempfile
+import unittest
+import multiprocessing
+
+from dingDONG.bl.ddState import stateStore
+
+""" Worker process: set one property for each key, state file is updated by all workers at the same time """
+def _setKeys (fileName, worker, cntKeys):
+    store = stateStore(fileName=fileName)
+    for i in range(cntKeys):
+        store.set(key="w%s_%s" % (worker, i), prop='watermark', val=i)
+
+class testStateStore (unittest.TestCase):
+    def setUp (self):
+        self.folder     = tempfile.mkdtemp()
+        self.fileName   = os.path.join(self.folder, 'state.json')
+
+    def tearDown (self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def test_round_trip (self):
+        store = stateStore(fileName=self.fileName)
+        store.set(key='node', prop='watermark', val=datetime.datetime(2020, 1, 2, 3, 4, 5))
+        store.set(key='node', prop='amount', val=decimal.Decimal('10.5'))
+        store.set(key='other', prop='watermark', val=7)
+
+        store = stateStore(fileName=self.fileName)
+        self.assertEqual(store.get(key='node', prop='watermark'), '2020-01-02 03:04:05')
+        self.assertEqual(store.get(key='node', prop='amount'), 10.5)
+        self.assertEqual(store.get(key='other', prop='watermark'), 7)
+        self.assertIsNone(store.get(key='missing', prop='watermark'))
+
+    def test_remove_and_clear (self):
+        store = stateStore(fileName=self.fileName)
+        store.set(key='node', prop='watermark', val=1)
+        store.set(key='node', prop='window', val='OK')
+        store.remove(key='node', prop='window')
+        self.assertIsNone(store.get(key='node', prop='window'))
+        self.assertEqual(store.get(key='node', prop='watermark'), 1)
+
+        store.remove(key='node')
+        self.assertIsNone(store.get(key='node', prop='watermark'))
+
+        store.set(key='node', prop='watermark', val=1)
+        store.clear()
+        with open(self.fileName) as f:
+            self.assertEqual(json.load(f), {})
+
+    def test_without_file_state_kept_in_memory (self):
+        store = stateStore()
+        store.getFile = lambda: None
+        store.set(key='node', prop='watermark', val=5)
+        self.assertEqual(store.get(key='node', prop='watermark'), 5)
+        self.assertEqual(os.listdir(self.folder), [])
+
+    def test_properties_set_by_other_store_are_kept (self):
+        store1, store2 = stateStore(fileName=self.fileName), stateStore(fileName=self.fileName)
+        store1.set(key='node1', prop='watermark', val=1)
+        store2.set(key='node2', prop='watermark', val=2)
+        store1.set(key='node1', prop='window', val='OK')
+        self.assertEqual(store2.get(key='node2', prop='watermark'), 2)
+        self.assertEqual(store2.get(key='node1', prop='window'), 'OK')
+
+    def test_processes_update_same_file (self):
+        cntWorkers, cntKeys = 4, 25
+        workers = [multiprocessing.Process(target=_setKeys, args=(self.fileName, w, cntKeys)) for w in range(cntWorkers)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(60)
+            self.assertEqual(worker.exitcode, 0)
+
+        with open(self.fileName) as f:
+            state = json.load(f)
+        self.assertEqual(len(state), cntWorkers * cntKeys)
+        self.assertEqual([f for f in os.listdir(self.folder) if f.endswith('.tmp')], [])
+
+if __name__ == '__main__':
+    unittest.main()